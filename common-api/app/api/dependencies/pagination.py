@@ -1,18 +1,47 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import uuid
 from datetime import UTC, datetime
-from enum import Enum
-from typing import Generic, TypeVar
+from decimal import Decimal
+from enum import Enum, StrEnum
+from typing import Any, Generic, TypeVar
 
 import sqlalchemy as sa
 from fastapi import HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.utils.redis import count_cache
+
+logger = logging.getLogger(__name__)
+
 
 class OrderDirection(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
 
+class CountStrategy(StrEnum):
+    """How a page gets its total.
+
+    exact: count(*) of the filtered rows.
+    estimated: the planner's row estimate (PostgreSQL only); small results are
+        still counted exactly, since that is cheap and estimates are poorest there.
+    cached: an exact count kept in Redis for PAGINATION_COUNT_CACHE_TTL seconds,
+        keyed by the count query and its parameters.
+    none: no total; has_next comes from fetching one row past the page.
+    """
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
+
+
 class PaginationParams(BaseModel):
     limit: int | None = Field(default=None, ge=1, le=1000000)
     offset: int = Field(default=0, ge=0)
@@ -22,6 +51,8 @@ class PaginationParams(BaseModel):
     search_by: str | None = Field(default=None)
     since: datetime | None = Field(default=None)
     until: datetime | None = Field(default=None)
+    cursor: str | None = Field(default=None)
+    count: CountStrategy = Field(default=CountStrategy.EXACT)
 
 
 T = TypeVar("T")
@@ -29,13 +60,60 @@ T = TypeVar("T")
 
 # PaginationResponse uses Generic[T] as required by typing and pydantic generics
 class PaginationResponse(BaseModel, Generic[T]):
-    total: int
+    total: int | None
     docs: list[T]
     limit: int
     offset: int
     has_next: bool
     has_prev: bool
     timestamp: datetime
+    next_cursor: str | None = None
+    count: CountStrategy = CountStrategy.EXACT
+
+
+ERR_INVALID_CURSOR = "Invalid cursor"
+ERR_CURSOR_ORDER_MISMATCH = "Cursor was issued for a different order_by or order"
+
+
+def encode_cursor(order_by: str, order: OrderDirection, value: Any, id: Any) -> str:
+    """Opaque token for the position after a row: its order_by value and id."""
+    payload = json.dumps(
+        [order_by, order.value, _cursor_value(value), _cursor_value(id)]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, OrderDirection, Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_by, order, value, id = json.loads(base64.urlsafe_b64decode(padded))
+        return order_by, OrderDirection(order), value, id
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=ERR_INVALID_CURSOR) from None
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID | Decimal):
+        return str(value)
+    return value
+
+
+def _column_value(column, value: Any) -> Any:
+    """Turn a decoded cursor value back into the column's Python type."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type in (uuid.UUID, Decimal, int, float):
+            return python_type(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=ERR_INVALID_CURSOR) from None
+    return value
 
 
 class PaginationBuilder:
@@ -46,6 +124,8 @@ class PaginationBuilder:
         self.session = session
         self.query = session.query(model)
         self.count_query = session.query(sa.func.count(model.id))
+        self.order_column = None
+        self.order_direction = OrderDirection.DESC
 
     def filter_deleted(self, include_deleted: bool = False):
         if not include_deleted and hasattr(self.model, "deleted_at"):
@@ -63,26 +143,48 @@ class PaginationBuilder:
         return self
 
     def search(self, search: str | None = None, search_by: str | None = None):
+        """Keep rows where any of the comma-separated search_by columns matches.
+
+        Text columns match with ILIKE '%search%', which the pg_trgm indexes
+        serve on PostgreSQL. Searches of several words on a column with a
+        tsvector (the model's __search_vectors__) also match those words in
+        any order through the tsvector index. Other columns match by value.
+        """
         if search and search_by:
             search_columns = [c.strip() for c in search_by.split(',')]
             search_filters = []
+            postgres = self.session.get_bind().dialect.name == "postgresql"
             for col_name in search_columns:
                 if hasattr(self.model, col_name):
                     column = getattr(self.model, col_name)
                     if hasattr(column.type, "python_type") and column.type.python_type is str:
-                        search_filters.append(column.ilike(f"%{search}%"))
+                        search_filters.append(
+                            self._text_search(col_name, column, search, postgres)
+                        )
                     else:
                         try:
                             converted_search = column.type.python_type(search)
                             search_filters.append(column == converted_search)
                         except (ValueError, TypeError):
                             pass
-            
+
             if search_filters:
                 self.query = self.query.filter(sa.or_(*search_filters))
                 self.count_query = self.count_query.filter(sa.or_(*search_filters))
         return self
 
+    def _text_search(self, col_name: str, column, search: str, postgres: bool):
+        condition = column.ilike(f"%{search}%")
+        vector = getattr(self.model, "__search_vectors__", {}).get(col_name)
+        if postgres and vector and len(search.split()) > 1:
+            # The tsvector only matches whole words; keep the ILIKE for partial
+            # words and Thai text written without spaces
+            words = sa.literal_column(f"{self.model.__tablename__}.{vector}").op("@@")(
+                sa.func.websearch_to_tsquery("simple", search)
+            )
+            return sa.or_(condition, words)
+        return condition
+
     def custom_filter(self, **filters):
         for key, value in filters.items():
             if hasattr(self.model, key) and value is not None:
@@ -100,46 +202,207 @@ class PaginationBuilder:
     ):
         if hasattr(self.model, order_by):
             column = getattr(self.model, order_by)
+            self.order_column = column
+            self.order_direction = order
+            # id breaks ties, so rows sharing a value keep one order across pages
+            columns = [column] if order_by == "id" else [column, self.model.id]
             if order == OrderDirection.DESC:
-                self.query = self.query.order_by(column.desc())
+                self.query = self.query.order_by(*(c.desc() for c in columns))
             else:
-                self.query = self.query.order_by(column.asc())
+                self.query = self.query.order_by(*(c.asc() for c in columns))
         return self
 
     def paginate(
-        self, limit: int | None = None, offset: int = 0, serializer: type[T] | None = None
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        serializer: type[T] | None = None,
+        cursor: str | None = None,
+        count: CountStrategy = CountStrategy.EXACT,
     ) -> PaginationResponse[T]:
-        total = self.count_query.scalar()
+        """Offset pagination with a total, or keyset pagination when a cursor is given.
+
+        Pass the previous page's next_cursor to seek past its last row, or an
+        empty cursor to start from the top; cursor pages skip the count and
+        report total as None. `count` picks how offset pages get their total,
+        and the response's `count` says which one was used.
+        """
+        if cursor is not None:
+            return self._paginate_cursor(limit, cursor, serializer)
+
+        total, count = self._count(count)
         query = self.query.offset(offset)
         if limit is not None:
-            query = query.limit(limit)
+            # Without an exact total, one extra row tells whether there is a next page
+            query = query.limit(limit if count == CountStrategy.EXACT else limit + 1)
         items = query.all()
-        if serializer:
-            docs = [serializer.from_orm(item) for item in items]
+        if limit is None:
+            has_next = False
+        elif count == CountStrategy.EXACT:
+            has_next = (offset + limit) < total
         else:
-            docs = []
-            for item in items:
-                if hasattr(item, "__dict__"):
-                    doc = {
-                        key: value
-                        for key, value in item.__dict__.items()
-                        if not key.startswith("_")
-                    }
-                    docs.append(doc)
-                else:
-                    docs.append(item)
-        has_next = False if limit is None else (offset + limit) < total
+            has_next = len(items) > limit
+            items = items[:limit]
         has_prev = offset > 0
         return PaginationResponse[T](
             total=total,
-            docs=docs,
+            docs=self._serialize(items, serializer),
             limit=(limit if limit is not None else len(items)),
             offset=offset,
             has_next=has_next,
             has_prev=has_prev,
             timestamp=datetime.now(UTC),
+            next_cursor=self._next_cursor(items) if has_next else None,
+            count=count,
+        )
+
+    def _count(self, strategy: CountStrategy) -> tuple[int | None, CountStrategy]:
+        if strategy == CountStrategy.NONE:
+            return None, strategy
+        if strategy == CountStrategy.CACHED:
+            return self._cached_count(), strategy
+        if strategy == CountStrategy.ESTIMATED:
+            estimate = self._estimated_count()
+            exact_below = settings.PAGINATION_EXACT_COUNT_BELOW
+            if estimate is not None and estimate >= exact_below:
+                return estimate, strategy
+        return self.count_query.scalar(), CountStrategy.EXACT
+
+    def _cached_count(self) -> int:
+        statement = self._compile(self.count_query, self.session.get_bind().dialect)
+        digest = hashlib.sha1(
+            json.dumps(
+                [str(statement), statement.params], sort_keys=True, default=str
+            ).encode()
+        ).hexdigest()
+        key = f"{self.model.__tablename__}:{digest}"
+        total = count_cache.get(key)
+        if total is None:
+            total = self.count_query.scalar()
+            count_cache.set(key, total)
+        return total
+
+    def _estimated_count(self) -> int | None:
+        """Rows the PostgreSQL planner expects the list query to return.
+
+        None off PostgreSQL, or when EXPLAIN fails.
+        """
+        dialect = self.session.get_bind().dialect
+        if dialect.name != "postgresql":
+            return None
+        # The rows themselves, without the eager-load joins and the sort
+        statement = self._compile(
+            self.query.enable_eagerloads(False).order_by(None), dialect
+        )
+        try:
+            # A savepoint, so a failed EXPLAIN leaves the request's transaction usable
+            with self.session.begin_nested():
+                plan = (
+                    self.session.connection()
+                    .exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}", statement.params
+                    )
+                    .scalar()
+                )
+        except sa.exc.SQLAlchemyError as e:
+            logger.warning(f"EXPLAIN failed, counting exactly instead: {e}")
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _compile(query, dialect):
+        # IN lists (custom_filter with a list) are expanded into one parameter
+        # per value, so the SQL runs as written and the values are in params
+        return query.statement.compile(
+            dialect=dialect, compile_kwargs={"render_postcompile": True}
+        )
+
+    def _paginate_cursor(
+        self, limit: int | None, cursor: str, serializer: type[T] | None
+    ) -> PaginationResponse[T]:
+        column = self._cursor_column()
+        query = self.query
+        if cursor:
+            order_by, order, value, id = decode_cursor(cursor)
+            if order_by != column.key or order != self.order_direction:
+                raise HTTPException(status_code=400, detail=ERR_CURSOR_ORDER_MISMATCH)
+            boundary = sa.tuple_(
+                _column_value(column, value), _column_value(self.model.id, id)
+            )
+            row = sa.tuple_(column, self.model.id)
+            query = query.filter(
+                row < boundary if order == OrderDirection.DESC else row > boundary
+            )
+
+        # One extra row tells whether there is a next page without counting
+        if limit is not None:
+            query = query.limit(limit + 1)
+        items = query.all()
+        has_next = limit is not None and len(items) > limit
+        items = items[:limit]
+        return PaginationResponse[T](
+            total=None,
+            docs=self._serialize(items, serializer),
+            limit=(limit if limit is not None else len(items)),
+            offset=0,
+            has_next=has_next,
+            has_prev=bool(cursor),
+            timestamp=datetime.now(UTC),
+            next_cursor=self._next_cursor(items) if has_next else None,
+            count=CountStrategy.NONE,
         )
 
+    def _cursor_column(self):
+        if self.order_column is None:
+            raise HTTPException(
+                status_code=400, detail="Cursor pagination needs an order_by field"
+            )
+        if not self._seekable(self.order_column):
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"order_by={self.order_column.key} can be null "
+                    "and cannot be used with a cursor"
+                ),
+            )
+        return self.order_column
+
+    @staticmethod
+    def _seekable(column) -> bool:
+        # A NULL in the row-value comparison would drop rows from every later page
+        return column.key == "id" or column.expression.nullable is False
+
+    def _next_cursor(self, items) -> str | None:
+        if (
+            self.order_column is None
+            or not self._seekable(self.order_column)
+            or not items
+        ):
+            return None
+        column = self.order_column
+        last = items[-1]
+        return encode_cursor(
+            column.key, self.order_direction, getattr(last, column.key), last.id
+        )
+
+    def _serialize(self, items, serializer: type[T] | None) -> list:
+        if serializer:
+            return [serializer.model_validate(item) for item in items]
+        docs = []
+        for item in items:
+            if hasattr(item, "__dict__"):
+                doc = {
+                    key: value
+                    for key, value in item.__dict__.items()
+                    if not key.startswith("_")
+                }
+                docs.append(doc)
+            else:
+                docs.append(item)
+        return docs
+
 
 def get_pagination_params(
     limit: int | None = Query(None, ge=1, le=1000000, description="Number of items per page"),
@@ -154,6 +417,17 @@ def get_pagination_params(
     until: datetime | None = Query(
         None, description="Filter records created before this date"
     ),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "next_cursor of the previous page, or empty for the first page, "
+            "to page by keyset without counting"
+        ),
+    ),
+    count: CountStrategy = Query(
+        CountStrategy.EXACT,
+        description="How total is computed: exact, estimated, cached or none",
+    ),
 ) -> PaginationParams:
     return PaginationParams(
         limit=limit,
@@ -164,6 +438,8 @@ def get_pagination_params(
         search_by=search_by,
         since=since,
         until=until,
+        cursor=cursor,
+        count=count,
     )
 
 
@@ -181,6 +457,8 @@ def create_pagination_dependency(
         search_by: str | None = Query(None),
         since: datetime | None = Query(None),
         until: datetime | None = Query(None),
+        cursor: str | None = Query(None),
+        count: CountStrategy = Query(CountStrategy.EXACT),
     ) -> PaginationParams:
         if allowed_order_by and order_by not in allowed_order_by:
             raise HTTPException(
@@ -206,6 +484,8 @@ def create_pagination_dependency(
             search_by=search_by,
             since=since,
             until=until,
+            cursor=cursor,
+            count=count,
         )
 
     return get_validated_pagination_params
@@ -1,5 +1,6 @@
 from uuid import UUID
 
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
@@ -14,6 +15,7 @@ from app.db.models.campaigns_products import CampaignProduct
 from app.db.models.facebook_post import FacebookPost
 from app.db.models.orders import Order as OrderModel
 from app.db.models.orders_products import OrderProduct as OrderProductModel
+from app.db.models.products import Product as ProductModel
 from app.db.repositories.campaign import campaign_repo
 from app.db.session import get_db
 from app.schemas.campaign import (
@@ -44,7 +46,13 @@ def list_campaigns(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=Campaign)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=Campaign,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -156,14 +164,8 @@ def get_campaign_summary(
 ):
     """Get campaign summary with product statistics, orders, sales, and profits"""
 
-    # Get campaign with products
     campaign = (
         db.query(CampaignModel)
-        .options(
-            joinedload(CampaignModel.campaigns_products).joinedload(
-                CampaignProduct.product
-            ),
-        )
         .filter(CampaignModel.id == campaign_id, CampaignModel.deleted_at.is_(None))
         .first()
     )
@@ -171,77 +173,72 @@ def get_campaign_summary(
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
-    # Get orders for this campaign
-    orders = (
-        db.query(OrderModel)
-        .options(
-            joinedload(OrderModel.orders_products)
-            .joinedload(OrderProductModel.campaign_product)
-            .joinedload(CampaignProduct.product),
+    # Quantity sold per campaign product, over the campaign's live orders
+    sold = (
+        db.query(
+            OrderProductModel.campaign_product_id.label("campaign_product_id"),
+            sa.func.sum(OrderProductModel.quantity).label("quantity"),
         )
+        .join(OrderModel, OrderModel.id == OrderProductModel.order_id)
         .filter(OrderModel.campaign_id == campaign_id, OrderModel.deleted_at.is_(None))
-        .all()
+        .group_by(OrderProductModel.campaign_product_id)
+        .subquery()
     )
+    sold_quantity = sa.func.coalesce(sold.c.quantity, 0)
+    selling_price = sa.func.coalesce(ProductModel.selling_price, 0)
+    cost = sa.func.coalesce(ProductModel.cost, 0)
+
+    def campaign_products(*columns):
+        return (
+            db.query(*columns)
+            .select_from(CampaignProduct)
+            .join(ProductModel, ProductModel.id == CampaignProduct.product_id)
+            .outerjoin(sold, sold.c.campaign_product_id == CampaignProduct.id)
+            .filter(CampaignProduct.campaign_id == campaign_id)
+        )
 
-    # Calculate summary statistics
-    total_orders = len(orders)
-    total_sales = 0
-    total_cost = 0
-    total_profit = 0
-
-    # Product summary data with pagination
-    product_summary = []
-
-    for cp in campaign.campaigns_products:
-        if not cp.product:
-            continue
-
-        # Calculate sold quantity for this product
-        sold_quantity = 0
-        product_sales = 0
-        product_cost = 0
-        product_profit = 0
+    total_products, total_sales, total_cost = campaign_products(
+        sa.func.count(CampaignProduct.id),
+        sa.func.coalesce(sa.func.sum(sold_quantity * selling_price), 0),
+        sa.func.coalesce(sa.func.sum(sold_quantity * cost), 0),
+    ).one()
 
-        for order in orders:
-            for op in order.orders_products:
-                if op.campaign_product_id == cp.id:
-                    sold_quantity += op.quantity
-                    unit_price = cp.product.selling_price or 0
-                    unit_cost = cp.product.cost or 0
-                    product_sales += op.quantity * unit_price
-                    product_cost += op.quantity * unit_cost
-                    product_profit += op.quantity * (unit_price - unit_cost)
+    # Paginate the product list in SQL (support unlimited when limit is None)
+    start_idx = pagination.offset or 0
+    products_query = (
+        campaign_products(ProductModel, sold_quantity.label("sold_quantity"))
+        .order_by(CampaignProduct.created_at, CampaignProduct.id)
+        .offset(start_idx)
+    )
+    if pagination.limit is not None:
+        products_query = products_query.limit(pagination.limit)
+    limit = pagination.limit if pagination.limit is not None else total_products
 
-        product_summary.append(
+    paginated_products = []
+    for product, quantity in products_query.all():
+        unit_price = product.selling_price or 0
+        unit_cost = product.cost or 0
+        paginated_products.append(
             {
-                "product_id": str(cp.product.id),
-                "product_name": cp.product.name,
-                "selling_price": float(cp.product.selling_price or 0),
-                "selling_unit": cp.product.unit or "piece",
-                "cost": float(cp.product.cost or 0),
-                "profit": product_profit,
-                "sold_quantity": sold_quantity,
-                "total_sales": product_sales,
-                "total_cost": product_cost,
+                "product_id": str(product.id),
+                "product_name": product.name,
+                "selling_price": float(unit_price),
+                "selling_unit": product.unit or "piece",
+                "cost": float(unit_cost),
+                "profit": quantity * (unit_price - unit_cost),
+                "sold_quantity": quantity,
+                "total_sales": quantity * unit_price,
+                "total_cost": quantity * unit_cost,
             }
         )
 
-        total_sales += product_sales
-        total_cost += product_cost
-        total_profit += product_profit
-
-    # Apply pagination to product summary (support unlimited when limit is None)
-    total_products = len(product_summary)
-    start_idx = pagination.offset or 0
-    limit = pagination.limit if pagination.limit is not None else total_products
-    end_idx = start_idx + limit
-    paginated_products = product_summary[start_idx:end_idx]
-
     # Order status breakdown
-    order_status_count = {}
-    for order in orders:
-        status = order.status
-        order_status_count[status] = order_status_count.get(status, 0) + 1
+    order_status_count = dict(
+        db.query(OrderModel.status, sa.func.count(OrderModel.id))
+        .filter(OrderModel.campaign_id == campaign_id, OrderModel.deleted_at.is_(None))
+        .group_by(OrderModel.status)
+        .all()
+    )
 
     return {
         "campaign": {
@@ -250,10 +247,10 @@ def get_campaign_summary(
             "status": campaign.status,
         },
         "summary": {
-            "total_orders": total_orders,
+            "total_orders": sum(order_status_count.values()),
             "total_sales": total_sales,
             "total_cost": total_cost,
-            "total_profit": total_profit,
+            "total_profit": total_sales - total_cost,
             "order_status_breakdown": order_status_count,
         },
         "products": {
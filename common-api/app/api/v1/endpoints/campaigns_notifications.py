@@ -34,7 +34,13 @@ def list_campaign_notifications(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=CampaignNotification)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=CampaignNotification,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -41,6 +41,8 @@ def list_campaign_products(
             pagination.limit,
             pagination.offset,
             serializer=CampaignProductResponse,
+            cursor=pagination.cursor,
+            count=pagination.count,
         )
     )
 
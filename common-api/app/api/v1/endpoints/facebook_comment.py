@@ -1,10 +1,9 @@
-from datetime import UTC, datetime
-
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.api.dependencies.pagination import (
+    OrderDirection,
     PaginationBuilder,
     PaginationParams,
     PaginationResponse,
@@ -37,9 +36,14 @@ def list_facebook_comments(
     post_id: str | None = None,
     profile_id: str | None = None,
     group_by: str | None = None,
-    before_created_at: str | None = None,
 ) -> PaginationResponse[FacebookComment]:
+    builder = PaginationBuilder(FacebookCommentModel, db)
+    builder.query = builder.query.options(
+        joinedload(FacebookCommentModel.profile), joinedload(FacebookCommentModel.post)
+    )
+
     if group_by == "profile_id":
+        # Latest comment of each profile, newest first
         sub = (
             db.query(
                 FacebookCommentModel.profile_id.label("profile_id"),
@@ -51,69 +55,26 @@ def list_facebook_comments(
             .group_by(FacebookCommentModel.profile_id)
             .subquery()
         )
-
-        base_q = (
-            db.query(FacebookCommentModel)
-            .options(
-                joinedload(FacebookCommentModel.profile),
-                joinedload(FacebookCommentModel.post),
-            )
-            .join(
-                sub,
-                sa.and_(
-                    FacebookCommentModel.profile_id == sub.c.profile_id,
-                    FacebookCommentModel.published_at == sub.c.max_published_at,
-                ),
-            )
-            .filter(FacebookCommentModel.deleted_at.is_(None))
-            .order_by(FacebookCommentModel.published_at.desc())
+        builder.query = builder.query.join(
+            sub,
+            sa.and_(
+                FacebookCommentModel.profile_id == sub.c.profile_id,
+                FacebookCommentModel.published_at == sub.c.max_published_at,
+            ),
         )
-
-        if before_created_at:
-            try:
-                before_date = datetime.fromisoformat(
-                    before_created_at.replace("Z", "+00:00")
-                )
-                base_q = base_q.filter(FacebookCommentModel.created_at < before_date)
-            except ValueError:
-                pass
-
-        total = db.query(sa.func.count(sub.c.profile_id)).scalar() or 0
-        q = base_q.offset(pagination.offset)
-        if pagination.limit is not None:
-            q = q.limit(pagination.limit)
-        rows = q.all()
-        docs = [FacebookComment.model_validate(r) for r in rows]
-        has_next = (
-            False
-            if pagination.limit is None
-            else (pagination.offset + pagination.limit) < total
-        )
-        return PaginationResponse[FacebookComment](
-            total=total,
-            docs=docs,
-            limit=pagination.limit or len(docs),
-            offset=pagination.offset,
-            has_next=has_next,
-            has_prev=pagination.offset > 0,
-            timestamp=datetime.now(UTC),
-        )
-
-    builder = PaginationBuilder(FacebookCommentModel, db)
-    builder.query = builder.query.options(
-        joinedload(FacebookCommentModel.profile), joinedload(FacebookCommentModel.post)
-    )
-
-    if before_created_at:
-        try:
-            before_date = datetime.fromisoformat(
-                before_created_at.replace("Z", "+00:00")
-            )
-            builder.query = builder.query.filter(
-                FacebookCommentModel.created_at < before_date
+        builder.filter_deleted()
+        # One row per profile, so count the profiles rather than the comments
+        builder.count_query = db.query(sa.func.count(sub.c.profile_id))
+        return (
+            builder.order_by("published_at", OrderDirection.DESC)
+            .paginate(
+                pagination.limit,
+                pagination.offset,
+                serializer=FacebookComment,
+                cursor=pagination.cursor,
+                count=pagination.count,
             )
-        except ValueError:
-            pass
+        )
 
     return (
         builder.filter_deleted()
@@ -121,7 +82,13 @@ def list_facebook_comments(
         .search(pagination.search, pagination.search_by)
         .custom_filter(post_id=post_id, profile_id=profile_id)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=FacebookComment)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=FacebookComment,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -1,4 +1,3 @@
-from datetime import UTC, datetime
 from uuid import UUID
 
 import sqlalchemy as sa
@@ -7,6 +6,7 @@ from sqlalchemy.orm import Session, joinedload
 
 from app.api.dependencies.database import get_db
 from app.api.dependencies.pagination import (
+    OrderDirection,
     PaginationBuilder,
     PaginationParams,
     PaginationResponse,
@@ -36,9 +36,12 @@ def list_facebook_inboxes(
     profile_id: str | None = None,
     messenger_id: str | None = None,
     group_by: str | None = None,
-    before_created_at: str | None = None,
 ) -> PaginationResponse[FacebookInbox]:
+    builder = PaginationBuilder(FacebookInboxModel, db)
+    builder.query = builder.query.options(joinedload(FacebookInboxModel.profile))
+
     if group_by == "profile_id":
+        # Latest message of each profile, newest first
         sub = (
             db.query(
                 FacebookInboxModel.profile_id.label("profile_id"),
@@ -48,63 +51,40 @@ def list_facebook_inboxes(
             .group_by(FacebookInboxModel.profile_id)
             .subquery()
         )
-
-        base_q = (
-            db.query(FacebookInboxModel)
-            .options(joinedload(FacebookInboxModel.profile))
-            .join(
-                sub,
-                sa.and_(
-                    FacebookInboxModel.profile_id == sub.c.profile_id,
-                    FacebookInboxModel.published_at == sub.c.max_published_at,
-                ),
-            )
-            .filter(FacebookInboxModel.deleted_at.is_(None))
-            .order_by(FacebookInboxModel.published_at.desc())
+        builder.query = builder.query.join(
+            sub,
+            sa.and_(
+                FacebookInboxModel.profile_id == sub.c.profile_id,
+                FacebookInboxModel.published_at == sub.c.max_published_at,
+            ),
         )
-
-        if before_created_at:
-            try:
-                before_date = datetime.fromisoformat(before_created_at.replace('Z', '+00:00'))
-                base_q = base_q.filter(FacebookInboxModel.created_at < before_date)
-            except ValueError:
-                pass
-
-        # Manual paginate
-        total = db.query(sa.func.count(sub.c.profile_id)).scalar() or 0
-        q = base_q.offset(pagination.offset)
-        if pagination.limit is not None:
-            q = q.limit(pagination.limit)
-        rows = q.all()
-        docs = [FacebookInbox.model_validate(r) for r in rows]
-        has_next = False if pagination.limit is None else (pagination.offset + pagination.limit) < total
-        return PaginationResponse[FacebookInbox](
-            total=total,
-            docs=docs,
-            limit=pagination.limit or len(docs),
-            offset=pagination.offset,
-            has_next=has_next,
-            has_prev=pagination.offset > 0,
-            timestamp=datetime.now(UTC),
+        builder.filter_deleted()
+        # One row per profile, so count the profiles rather than the messages
+        builder.count_query = db.query(sa.func.count(sub.c.profile_id))
+        return (
+            builder.order_by("published_at", OrderDirection.DESC)
+            .paginate(
+                pagination.limit,
+                pagination.offset,
+                serializer=FacebookInbox,
+                cursor=pagination.cursor,
+                count=pagination.count,
+            )
         )
 
-    builder = PaginationBuilder(FacebookInboxModel, db)
-    builder.query = builder.query.options(joinedload(FacebookInboxModel.profile))
-    
-    if before_created_at:
-        try:
-            before_date = datetime.fromisoformat(before_created_at.replace('Z', '+00:00'))
-            builder.query = builder.query.filter(FacebookInboxModel.created_at < before_date)
-        except ValueError:
-            pass
-    
     return (
         builder.filter_deleted()
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .custom_filter(profile_id=profile_id, messenger_id=messenger_id)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=FacebookInbox)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=FacebookInbox,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -45,7 +45,13 @@ def list_facebook_posts(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=FacebookPost)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=FacebookPost,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
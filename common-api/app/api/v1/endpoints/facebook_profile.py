@@ -40,7 +40,13 @@ def list_facebook_profiles(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=FacebookProfile)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=FacebookProfile,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -82,7 +88,12 @@ def get_facebook_profile_with_relations(
         inbox_builder.filter_deleted()
         .custom_filter(profile_id=str(profile_id))
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
     comment_builder = PaginationBuilder(FacebookCommentModel, db)
@@ -93,7 +104,12 @@ def get_facebook_profile_with_relations(
         comment_builder.filter_deleted()
         .custom_filter(profile_id=str(profile_id))
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
     return {
@@ -53,7 +53,13 @@ def list_orders(
         if status:
             filter_kwargs["status"] = status
         builder = builder.custom_filter(**filter_kwargs)
-    page = builder.paginate(pagination.limit, pagination.offset, serializer=Order)
+    page = builder.paginate(
+        pagination.limit,
+        pagination.offset,
+        serializer=Order,
+        cursor=pagination.cursor,
+        count=pagination.count,
+    )
     for order in page.docs:
         profile_contacts = (
             order.profile.profiles_contacts
@@ -32,7 +32,13 @@ def list_order_products(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=OrderProduct)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=OrderProduct,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
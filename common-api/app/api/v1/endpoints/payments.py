@@ -28,7 +28,13 @@ def list_payments(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=Payment)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=Payment,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -52,7 +52,13 @@ def list_products(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=Product)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=Product,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
@@ -32,7 +32,13 @@ def list_profile_contacts(
         .date_range(pagination.since, pagination.until)
         .search(pagination.search, pagination.search_by)
         .order_by(pagination.order_by, pagination.order)
-        .paginate(pagination.limit, pagination.offset, serializer=ProfileContact)
+        .paginate(
+            pagination.limit,
+            pagination.offset,
+            serializer=ProfileContact,
+            cursor=pagination.cursor,
+            count=pagination.count,
+        )
     )
 
 
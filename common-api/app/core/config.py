@@ -52,6 +52,13 @@ class Settings(BaseSettings):
     REDIS_DB: int = os.getenv("REDIS_DB", 0)
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
 
+    # Pagination
+    PAGINATION_COUNT_CACHE_TTL: int = os.getenv("PAGINATION_COUNT_CACHE_TTL", 30)
+    PAGINATION_COUNT_CACHE_BACKOFF: int = os.getenv(
+        "PAGINATION_COUNT_CACHE_BACKOFF", 30
+    )
+    PAGINATION_EXACT_COUNT_BELOW: int = os.getenv("PAGINATION_EXACT_COUNT_BELOW", 1000)
+
     # Admin Configuration
     ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL", "admin@example.com")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "adminpass123")
@@ -11,6 +11,9 @@ class FacebookComment(Base, UUIDPrimaryKeyMixin):
     __table_args__ = (
         UniqueConstraint("comment_id", name="facebook_comments_comment_id_unique"),
     )
+    # tsvector generated from message (db-migrations 000021); not mapped, since
+    # it only exists on PostgreSQL, but PaginationBuilder.search() uses it
+    __search_vectors__ = {"message": "message_tsv"}
 
     profile_id = Column(
         UUID(as_uuid=True),
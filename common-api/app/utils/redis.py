@@ -1,9 +1,15 @@
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
 import redis.asyncio as redis
+from redis import Redis as SyncRedis
+from redis.exceptions import (
+    ConnectionError as RedisConnectionError,
+    TimeoutError as RedisTimeoutError,
+)
 
 from app.core.config import settings
 
@@ -244,5 +250,70 @@ class RedisClient:
             return False
 
 
+class CountCache:
+    """Short-lived cache of paginated list counts.
+
+    Synchronous, because the list endpoints run in the threadpool with a
+    synchronous session. Redis being unavailable only costs a count query;
+    after a connection failure Redis is skipped for backoff seconds, so
+    requests do not each wait out the connect timeout first.
+    """
+
+    def __init__(self):
+        self.redis_client: SyncRedis | None = None
+        self.ttl = int(settings.PAGINATION_COUNT_CACHE_TTL)
+        self.backoff = float(settings.PAGINATION_COUNT_CACHE_BACKOFF)
+        self.unavailable_until = 0.0
+
+    def _get_client(self) -> SyncRedis:
+        if not self.redis_client:
+            password = (
+                settings.REDIS_PASSWORD
+                if settings.REDIS_PASSWORD and settings.REDIS_PASSWORD.strip()
+                else None
+            )
+            self.redis_client = SyncRedis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=password,
+                decode_responses=True,
+                socket_connect_timeout=1,
+                socket_timeout=1,
+            )
+        return self.redis_client
+
+    def _get_cache_key(self, key: str) -> str:
+        return f"pagination:count:{key}"
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    def _failed(self, message: str, error: Exception) -> None:
+        if isinstance(error, RedisConnectionError | RedisTimeoutError):
+            self.unavailable_until = time.monotonic() + self.backoff
+            message += f", skipping Redis for {self.backoff:g}s"
+        logger.warning(f"{message}: {error}")
+
+    def get(self, key: str) -> int | None:
+        if not self._available():
+            return None
+        try:
+            value = self._get_client().get(self._get_cache_key(key))
+            return int(value) if value is not None else None
+        except Exception as e:
+            self._failed(f"Failed to read cached count {key}", e)
+            return None
+
+    def set(self, key: str, value: int) -> None:
+        if not self._available():
+            return
+        try:
+            self._get_client().setex(self._get_cache_key(key), self.ttl, value)
+        except Exception as e:
+            self._failed(f"Failed to cache count {key}", e)
+
+
 # Global Redis client instance
 redis_client = RedisClient()
+count_cache = CountCache()
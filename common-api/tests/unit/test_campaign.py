@@ -1,8 +1,17 @@
 from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
-from app.api.dependencies.pagination import OrderDirection, PaginationBuilder
+from app.api.dependencies.pagination import (
+    OrderDirection,
+    PaginationBuilder,
+    PaginationParams,
+)
+from app.api.v1.endpoints.campaign import get_campaign_summary
 from app.db.models.campaign import Campaign
+from app.db.models.campaigns_products import CampaignProduct
+from app.db.models.facebook_profile import FacebookProfile
+from app.db.models.orders import Order
+from app.db.models.orders_products import OrderProduct
 from app.db.repositories.campaign import campaign_repo
 from app.db.repositories.products.repo import product_repo
 from app.schemas.campaign import CampaignCreate, CampaignWithProductsUpdate
@@ -177,3 +186,97 @@ def test_update_campaign_with_products_status(db):
             assert cp.quantity == 15
         elif str(cp.product_id) == str(product2.id):
             assert cp.quantity == 25
+
+
+def test_campaign_summary(db):
+    campaign, other = seed_campaigns(db, count=2)
+    shirt, mug, poster = (create_product(db) for _ in range(3))
+    mug.selling_price, mug.cost = 20.5, 10
+    campaign_products = []
+    for i, product in enumerate((shirt, mug, poster)):
+        cp = CampaignProduct(
+            campaign_id=campaign.id,
+            product_id=product.id,
+            keyword=f"cf{i}",
+            quantity=100,
+            status="active",
+            created_at=datetime.now(UTC) + timedelta(seconds=i),
+        )
+        db.add(cp)
+        campaign_products.append(cp)
+    other_cp = CampaignProduct(
+        campaign_id=other.id,
+        product_id=shirt.id,
+        keyword="cf0",
+        quantity=100,
+        status="active",
+    )
+    db.add(other_cp)
+    db.commit()
+    shirt_cp, mug_cp, _ = campaign_products
+
+    def order(campaign, status, items, deleted=False):
+        profile = FacebookProfile(
+            facebook_id=f"fb_{uuid4()}", type="user", name="Buyer"
+        )
+        db.add(profile)
+        db.flush()
+        row = Order(
+            code=f"ORD-{uuid4()}",
+            profile_id=profile.id,
+            campaign_id=campaign.id,
+            status=status,
+            deleted_at=datetime.now(UTC) if deleted else None,
+        )
+        db.add(row)
+        db.flush()
+        for cp, quantity in items:
+            db.add(
+                OrderProduct(
+                    order_id=row.id,
+                    profile_id=profile.id,
+                    campaign_product_id=cp.id,
+                    quantity=quantity,
+                )
+            )
+
+    order(campaign, "pending", [(shirt_cp, 2), (mug_cp, 1)])
+    order(campaign, "pending", [(mug_cp, 3)])
+    order(campaign, "paid", [(shirt_cp, 1)])
+    order(campaign, "paid", [(shirt_cp, 10)], deleted=True)
+    order(other, "paid", [(other_cp, 5)])
+    db.commit()
+
+    # SQLite stores ids as text; filter with the string form like the other tests
+    result = get_campaign_summary(
+        str(campaign.id), db=db, pagination=PaginationParams(limit=2)
+    )
+
+    summary = result["summary"]
+    assert summary["total_orders"] == 3
+    assert summary["order_status_breakdown"] == {"pending": 2, "paid": 1}
+    # shirt: 3 x 100 / 50, mug: 4 x 20.5 / 10
+    assert summary["total_sales"] == 382
+    assert summary["total_cost"] == 190
+    assert summary["total_profit"] == 192
+
+    products = result["products"]
+    assert products["total"] == 3
+    assert products["limit"] == 2
+    assert [doc["product_id"] for doc in products["docs"]] == [
+        str(shirt.id),
+        str(mug.id),
+    ]
+    shirt_doc, mug_doc = products["docs"]
+    assert shirt_doc["sold_quantity"] == 3
+    assert shirt_doc["total_sales"] == 300
+    assert mug_doc["sold_quantity"] == 4
+    assert mug_doc["total_cost"] == 40
+    assert mug_doc["profit"] == 42
+
+    last_page = get_campaign_summary(
+        str(campaign.id), db=db, pagination=PaginationParams(limit=2, offset=2)
+    )["products"]
+    assert [doc["product_id"] for doc in last_page["docs"]] == [str(poster.id)]
+    assert last_page["docs"][0]["sold_quantity"] == 0
+    assert last_page["docs"][0]["total_sales"] == 0
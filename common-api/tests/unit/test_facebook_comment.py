@@ -2,8 +2,14 @@ from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
-from app.api.dependencies.pagination import OrderDirection, PaginationBuilder
+from app.api.dependencies.pagination import (
+    OrderDirection,
+    PaginationBuilder,
+    PaginationParams,
+)
+from app.api.v1.endpoints.facebook_comment import list_facebook_comments
 from app.db.models.facebook_comment import FacebookComment
 from app.db.models.facebook_post import FacebookPost
 from app.db.repositories.facebook_comment.repo import facebook_comment_repo
@@ -176,3 +182,79 @@ def test_pagination_search(db, profile, post):
     result = builder.search(search=unique_message, search_by="message").paginate()
     assert result.total >= 1
     assert any(unique_message in doc["message"] for doc in result.docs)
+
+
+def test_group_by_profile_cursor_pages(db, post):
+    # One profile per latest comment, the newest first
+    profiles = []
+    for i in range(5):
+        profile = facebook_profile_repo.create(
+            db,
+            obj_in=FacebookProfileCreate(
+                facebook_id=f"fbid-{uuid4()}",
+                type="user",
+                name=f"User {i}",
+                profile_picture_url="http://example.com/pic.jpg",
+            ),
+        )
+        for j in range(2):
+            facebook_comment_repo.create(
+                db,
+                obj_in=FacebookCommentCreate(
+                    profile_id=profile.id,
+                    post_id=post.id,
+                    comment_id=f"comment-{i}-{j}",
+                    message=f"Message {i}-{j}",
+                    type="comment",
+                    link=None,
+                    published_at=datetime.now(UTC) - timedelta(minutes=i * 10 + j),
+                ),
+            )
+        profiles.append(profile)
+
+    first = list_facebook_comments(
+        db=db, pagination=PaginationParams(limit=3), group_by="profile_id"
+    )
+    assert first.total == 5
+    second = list_facebook_comments(
+        db=db,
+        pagination=PaginationParams(limit=3, cursor=first.next_cursor),
+        group_by="profile_id",
+    )
+    assert second.total is None
+    assert second.has_next is False
+    docs = first.docs + second.docs
+    assert [doc.profile_id for doc in docs] == [profile.id for profile in profiles]
+    assert all(doc.comment_id.endswith("-0") for doc in docs)
+
+
+def test_search_falls_back_to_ilike_on_sqlite(db, profile, post):
+    seed_comments(db, profile, post, count=5)
+    # Several words would use the tsvector on PostgreSQL
+    result = (
+        PaginationBuilder(FacebookComment, db)
+        .search(search="message 3", search_by="message")
+        .paginate()
+    )
+    assert [doc["comment_id"] for doc in result.docs] == ["comment-3"]
+
+
+def test_search_operator_on_postgres(db):
+    builder = PaginationBuilder(FacebookComment, db)
+
+    def compiled(search):
+        condition = builder._text_search(
+            "message", FacebookComment.message, search, postgres=True
+        )
+        return str(condition.compile(dialect=postgresql.dialect()))
+
+    # One word: substring match, served by the trigram index
+    assert "ILIKE" in compiled("shirt")
+    # Several words: the substring match, or the words in any order through
+    # the tsvector index
+    words = compiled("red shirt")
+    assert "ILIKE" in words
+    assert " OR (facebook_comments.message_tsv @@ websearch_to_tsquery" in words
+    # Columns without a tsvector always use ILIKE
+    link = builder._text_search("link", FacebookComment.link, "a b", postgres=True)
+    assert "ILIKE" in str(link.compile(dialect=postgresql.dialect()))
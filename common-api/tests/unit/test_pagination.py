@@ -1,9 +1,23 @@
+import contextlib
 from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
 
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
 from sqlalchemy import Column, DateTime, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from app.api.dependencies.pagination import OrderDirection, PaginationBuilder
+from app.api.dependencies import pagination
+from app.api.dependencies.pagination import (
+    CountStrategy,
+    OrderDirection,
+    PaginationBuilder,
+    encode_cursor,
+)
+from app.utils import redis as redis_utils
+from app.utils.redis import CountCache
 
 Base = declarative_base()
 
@@ -17,6 +31,13 @@ class DummyModel(Base):
     deleted_at = Column(DateTime, nullable=True)
 
 
+class SeekModel(Base):
+    __tablename__ = "seek"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    created_at = Column(DateTime, nullable=False)
+
+
 def setup_db():
     engine = create_engine("sqlite:///:memory:")
     Base.metadata.create_all(engine)
@@ -249,3 +270,289 @@ def test_pagination_offset_and_search():
     # Should match Alice, Charlie, David
     # (all have 'a'), ordered by value ascending, offset 1
     assert [doc["name"] for doc in result.docs] == ["Charlie", "David"]
+
+
+# Cursor (keyset) mode
+def seed_seek_data(session, count=7):
+    now = datetime.now(UTC)
+    # Pairs of rows share a created_at, so the id has to break the ties
+    items = [
+        SeekModel(name=f"Row {i}", created_at=now - timedelta(minutes=i // 2))
+        for i in range(count)
+    ]
+    session.add_all(items)
+    session.commit()
+    return items
+
+
+def walk_cursor(session, order, limit):
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        result = (
+            PaginationBuilder(SeekModel, session)
+            .order_by("created_at", order)
+            .paginate(limit=limit, cursor=cursor)
+        )
+        pages.append(result)
+        cursor = result.next_cursor
+    return pages
+
+
+def test_cursor_pages_cover_every_row_once():
+    session = setup_db()
+    seed_seek_data(session)
+    for order in (OrderDirection.DESC, OrderDirection.ASC):
+        pages = walk_cursor(session, order, limit=3)
+        names = [doc["name"] for page in pages for doc in page.docs]
+        offset_names = [
+            doc["name"]
+            for doc in PaginationBuilder(SeekModel, session)
+            .order_by("created_at", order)
+            .paginate()
+            .docs
+        ]
+        assert names == offset_names
+        assert [len(page.docs) for page in pages] == [3, 3, 1]
+        assert [page.has_next for page in pages] == [True, True, False]
+        assert [page.has_prev for page in pages] == [False, True, True]
+
+
+def test_cursor_pages_skip_the_count():
+    session = setup_db()
+    seed_seek_data(session)
+    builder = PaginationBuilder(SeekModel, session).order_by("created_at")
+    builder.count_query = None  # would fail if it were run
+    result = builder.paginate(limit=2, cursor="")
+    assert result.total is None
+    assert len(result.docs) == 2
+
+
+def test_offset_page_hands_over_to_cursor():
+    session = setup_db()
+    seed_seek_data(session)
+    first = (
+        PaginationBuilder(SeekModel, session)
+        .order_by("created_at", OrderDirection.DESC)
+        .paginate(limit=4)
+    )
+    assert first.total == 7
+    second = (
+        PaginationBuilder(SeekModel, session)
+        .order_by("created_at", OrderDirection.DESC)
+        .paginate(limit=4, cursor=first.next_cursor)
+    )
+    # Row 4 and Row 5 tie on created_at, the higher id comes first
+    assert [doc["name"] for doc in second.docs] == ["Row 5", "Row 4", "Row 6"]
+    assert second.has_next is False
+    assert second.next_cursor is None
+
+
+def test_cursor_must_match_the_order():
+    session = setup_db()
+    seed_seek_data(session)
+    cursor = encode_cursor("created_at", OrderDirection.ASC, datetime.now(UTC), 1)
+    builder = PaginationBuilder(SeekModel, session).order_by(
+        "created_at", OrderDirection.DESC
+    )
+    with pytest.raises(HTTPException) as exc:
+        builder.paginate(limit=2, cursor=cursor)
+    assert exc.value.status_code == 400
+
+
+def test_invalid_cursor():
+    session = setup_db()
+    seed_seek_data(session)
+    builder = PaginationBuilder(SeekModel, session).order_by("created_at")
+    with pytest.raises(HTTPException) as exc:
+        builder.paginate(limit=2, cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_cursor_needs_a_non_null_order_column():
+    session = setup_db()
+    seed_data(session)
+    builder = PaginationBuilder(DummyModel, session).order_by("value")
+    with pytest.raises(HTTPException) as exc:
+        builder.paginate(limit=2, cursor="")
+    assert exc.value.status_code == 400
+    # Offset mode still works, without a cursor to hand over
+    result = PaginationBuilder(DummyModel, session).order_by("value").paginate(limit=2)
+    assert result.has_next is True
+    assert result.next_cursor is None
+
+
+# Count strategies
+class FakeCountCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+class FakeExplainConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def exec_driver_sql(self, statement, parameters):
+        self.statements.append((statement, parameters))
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": self.rows}}])
+
+
+def test_count_none_fetches_one_extra_row():
+    session = setup_db()
+    seed_data(session)
+    first = PaginationBuilder(DummyModel, session).paginate(
+        limit=3, count=CountStrategy.NONE
+    )
+    assert first.total is None
+    assert first.count == CountStrategy.NONE
+    assert len(first.docs) == 3
+    assert first.has_next is True
+    last = PaginationBuilder(DummyModel, session).paginate(
+        limit=2, offset=2, count=CountStrategy.NONE
+    )
+    assert len(last.docs) == 2
+    assert last.has_next is False
+
+
+def test_count_estimated_counts_exactly_off_postgres():
+    session = setup_db()
+    seed_data(session)
+    result = PaginationBuilder(DummyModel, session).paginate(
+        limit=2, count=CountStrategy.ESTIMATED
+    )
+    assert result.total == 4
+    assert result.count == CountStrategy.EXACT
+    assert result.has_next is True
+
+
+def test_count_estimated_uses_large_estimates(monkeypatch):
+    session = setup_db()
+    seed_data(session)
+    builder = PaginationBuilder(DummyModel, session)
+    monkeypatch.setattr(builder, "_estimated_count", lambda: 250000)
+    result = builder.paginate(limit=2, offset=3, count=CountStrategy.ESTIMATED)
+    assert result.total == 250000
+    assert result.count == CountStrategy.ESTIMATED
+    # has_next follows the rows, not the estimate
+    assert len(result.docs) == 1
+    assert result.has_next is False
+
+
+def test_count_cached_per_filter(monkeypatch):
+    session = setup_db()
+    seed_data(session)
+    cache = FakeCountCache()
+    monkeypatch.setattr(pagination, "count_cache", cache)
+
+    first = PaginationBuilder(DummyModel, session).paginate(
+        limit=2, count=CountStrategy.CACHED
+    )
+    assert first.total == 4
+    assert first.count == CountStrategy.CACHED
+    assert list(cache.values.values()) == [4]
+
+    # Served from the cache, even after rows were added
+    session.add(DummyModel(name="Eve", value=50, created_at=datetime.now(UTC)))
+    session.commit()
+    second = PaginationBuilder(DummyModel, session).paginate(
+        limit=2, count=CountStrategy.CACHED
+    )
+    assert second.total == 4
+
+    # A different filter is a different key
+    filtered = (
+        PaginationBuilder(DummyModel, session)
+        .custom_filter(value=10)
+        .paginate(limit=2, count=CountStrategy.CACHED)
+    )
+    assert filtered.total == 1
+    assert len(cache.values) == 2
+
+
+def test_count_cached_without_redis(monkeypatch):
+    session = setup_db()
+    seed_data(session)
+    cache = FakeCountCache()
+    cache.get = lambda key: None  # what CountCache returns when Redis is down
+    monkeypatch.setattr(pagination, "count_cache", cache)
+    result = PaginationBuilder(DummyModel, session).paginate(
+        limit=2, count=CountStrategy.CACHED
+    )
+    assert result.total == 4
+
+
+def test_count_estimated_with_list_filter(monkeypatch):
+    session = setup_db()
+    builder = PaginationBuilder(DummyModel, session).custom_filter(value=[10, 20])
+    explain = FakeExplainConnection(rows=250000)
+    postgres = SimpleNamespace(dialect=postgresql.dialect())
+    monkeypatch.setattr(session, "get_bind", lambda *args, **kwargs: postgres)
+    monkeypatch.setattr(session, "begin_nested", contextlib.nullcontext)
+    monkeypatch.setattr(session, "connection", lambda *args, **kwargs: explain)
+
+    assert builder._estimated_count() == 250000
+    statement, parameters = explain.statements[0]
+    assert statement.startswith("EXPLAIN (FORMAT JSON) ")
+    assert "POSTCOMPILE" not in statement
+    assert sorted(parameters.values()) == [10, 20]
+
+
+def test_count_cached_with_list_filter(monkeypatch):
+    session = setup_db()
+    seed_data(session)
+    cache = FakeCountCache()
+    monkeypatch.setattr(pagination, "count_cache", cache)
+
+    def total(values):
+        return (
+            PaginationBuilder(DummyModel, session)
+            .custom_filter(value=values)
+            .paginate(limit=2, count=CountStrategy.CACHED)
+            .total
+        )
+
+    assert total([10, 20]) == 2
+    assert total([10, 20, 30]) == 3
+    assert total([10, 20]) == 2
+    assert len(cache.values) == 2
+
+
+class FailingRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+    def setex(self, key, ttl, value):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+
+def test_count_cache_skips_redis_after_connection_failure(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(redis_utils.time, "monotonic", lambda: now[0])
+    cache = CountCache()
+    cache.backoff = 30
+    cache.redis_client = FailingRedis()
+
+    assert cache.get("orders") is None
+    assert cache.redis_client.calls == 1
+
+    # Within the backoff window Redis is not tried at all
+    now[0] += 29
+    assert cache.get("orders") is None
+    cache.set("orders", 4)
+    assert cache.redis_client.calls == 1
+
+    now[0] += 1
+    cache.set("orders", 4)
+    assert cache.redis_client.calls == 2
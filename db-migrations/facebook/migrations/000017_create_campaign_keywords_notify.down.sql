@@ -0,0 +1,9 @@
+BEGIN;
+
+DROP TRIGGER IF EXISTS campaigns_products_keywords_updated ON campaigns_products;
+DROP TRIGGER IF EXISTS campaigns_products_keywords_inserted_deleted ON campaigns_products;
+DROP TRIGGER IF EXISTS campaigns_keywords_changed ON campaigns;
+
+DROP FUNCTION IF EXISTS notify_campaign_keywords_changed();
+
+COMMIT;
@@ -0,0 +1,34 @@
+BEGIN;
+
+-- Workers LISTEN on this channel to refresh their in-memory keyword index
+CREATE OR REPLACE FUNCTION notify_campaign_keywords_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('campaign_keywords_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER campaigns_keywords_changed
+AFTER INSERT OR DELETE OR UPDATE OF status ON campaigns
+FOR EACH STATEMENT EXECUTE FUNCTION notify_campaign_keywords_changed();
+
+CREATE OR REPLACE TRIGGER campaigns_products_keywords_inserted_deleted
+AFTER INSERT OR DELETE ON campaigns_products
+FOR EACH STATEMENT EXECUTE FUNCTION notify_campaign_keywords_changed();
+
+-- Stock decrements only matter to the index when a product sells out or is restocked
+CREATE OR REPLACE TRIGGER campaigns_products_keywords_updated
+AFTER UPDATE ON campaigns_products
+FOR EACH ROW
+WHEN (
+    OLD.keyword IS DISTINCT FROM NEW.keyword
+    OR OLD.status IS DISTINCT FROM NEW.status
+    OR OLD.campaign_id IS DISTINCT FROM NEW.campaign_id
+    OR OLD.product_id IS DISTINCT FROM NEW.product_id
+    OR OLD.max_order_quantity IS DISTINCT FROM NEW.max_order_quantity
+    OR (OLD.quantity > 0) IS DISTINCT FROM (NEW.quantity > 0)
+)
+EXECUTE FUNCTION notify_campaign_keywords_changed();
+
+COMMIT;
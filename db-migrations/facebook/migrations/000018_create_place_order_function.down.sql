@@ -0,0 +1,5 @@
+BEGIN;
+
+DROP FUNCTION IF EXISTS place_order(UUID, UUID, UUID, INT, INT);
+
+COMMIT;
@@ -0,0 +1,70 @@
+BEGIN;
+
+-- Creates or fetches the buyer's pending order and reserves stock in one call.
+-- result is 'placed', 'exceeds_max_quantity' or 'out_of_stock'; the order is
+-- returned in every case so the buyer can still be pointed at it.
+CREATE OR REPLACE FUNCTION place_order(
+    p_profile_id UUID,
+    p_campaign_id UUID,
+    p_campaign_product_id UUID,
+    p_quantity INT,
+    p_default_max_quantity INT DEFAULT 100
+)
+RETURNS TABLE (out_order_id UUID, out_order_code TEXT, out_result TEXT) AS $$
+DECLARE
+    v_ordered INT;
+    v_stock INT;
+    v_max_quantity INT;
+BEGIN
+    INSERT INTO orders (profile_id, campaign_id, status)
+    VALUES (p_profile_id, p_campaign_id, 'pending')
+    ON CONFLICT (profile_id, campaign_id) DO NOTHING
+    RETURNING id, code INTO out_order_id, out_order_code;
+
+    -- Locking the order serialises concurrent comments from the same buyer
+    IF out_order_id IS NULL THEN
+        SELECT o.id, o.code INTO out_order_id, out_order_code
+        FROM orders o
+        WHERE o.profile_id = p_profile_id AND o.campaign_id = p_campaign_id
+        FOR UPDATE;
+    END IF;
+
+    SELECT cp.quantity, COALESCE(cp.max_order_quantity, p_default_max_quantity)
+    INTO v_stock, v_max_quantity
+    FROM campaigns_products cp
+    WHERE cp.id = p_campaign_product_id
+    FOR UPDATE;
+
+    SELECT COALESCE(SUM(op.quantity), 0) INTO v_ordered
+    FROM orders_products op
+    WHERE op.order_id = out_order_id
+        AND op.profile_id = p_profile_id
+        AND op.campaign_product_id = p_campaign_product_id;
+
+    IF v_ordered + p_quantity > v_max_quantity THEN
+        out_result := 'exceeds_max_quantity';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    IF v_stock IS NULL OR v_stock < p_quantity THEN
+        out_result := 'out_of_stock';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    UPDATE campaigns_products
+    SET quantity = quantity - p_quantity
+    WHERE id = p_campaign_product_id;
+
+    INSERT INTO orders_products (order_id, profile_id, campaign_product_id, quantity)
+    VALUES (out_order_id, p_profile_id, p_campaign_product_id, p_quantity)
+    ON CONFLICT (order_id, profile_id, campaign_product_id)
+    DO UPDATE SET quantity = orders_products.quantity + EXCLUDED.quantity, updated_at = CURRENT_TIMESTAMP;
+
+    out_result := 'placed';
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,6 @@
+BEGIN;
+
+DROP INDEX IF EXISTS notifications_outbox_pending_idx;
+DROP TABLE IF EXISTS notifications_outbox;
+
+COMMIT;
@@ -0,0 +1,26 @@
+BEGIN;
+
+-- Notifications are queued here in the same transaction as the row they
+-- describe and delivered by the workers' OutboxDispatcher
+CREATE TABLE IF NOT EXISTS notifications_outbox (
+    id BIGSERIAL NOT NULL,
+    topic TEXT NOT NULL,
+    recipient_id TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT notifications_outbox_pkey PRIMARY KEY (id),
+    CONSTRAINT notifications_outbox_status_check CHECK (status IN ('pending', 'sent', 'failed'))
+);
+
+-- Oldest pending notification per recipient, used to keep per-recipient order
+CREATE INDEX IF NOT EXISTS notifications_outbox_pending_idx
+    ON notifications_outbox (recipient_id, id)
+    WHERE status = 'pending';
+
+COMMIT;
@@ -0,0 +1,6 @@
+BEGIN;
+
+DROP FUNCTION IF EXISTS record_reserved_order(UUID, UUID, UUID, INT, TEXT);
+DROP TABLE IF EXISTS stock_ledger_flushes;
+
+COMMIT;
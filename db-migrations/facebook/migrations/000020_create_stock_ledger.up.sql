@@ -0,0 +1,47 @@
+BEGIN;
+
+-- Write-behind flushes from the workers' Redis stock ledger, recorded in the
+-- same statement as the stock update so a retried flush is applied once
+CREATE TABLE IF NOT EXISTS stock_ledger_flushes (
+    batch_id TEXT NOT NULL,
+    products INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT stock_ledger_flushes_pkey PRIMARY KEY (batch_id)
+);
+
+-- Same as place_order() for stock already reserved in the ledger: creates or
+-- fetches the pending order and records the line without touching
+-- campaigns_products. p_result is the ledger's reservation result.
+CREATE OR REPLACE FUNCTION record_reserved_order(
+    p_profile_id UUID,
+    p_campaign_id UUID,
+    p_campaign_product_id UUID,
+    p_quantity INT,
+    p_result TEXT
+)
+RETURNS TABLE (out_order_id UUID, out_order_code TEXT, out_result TEXT) AS $$
+BEGIN
+    INSERT INTO orders (profile_id, campaign_id, status)
+    VALUES (p_profile_id, p_campaign_id, 'pending')
+    ON CONFLICT (profile_id, campaign_id) DO NOTHING
+    RETURNING id, code INTO out_order_id, out_order_code;
+
+    IF out_order_id IS NULL THEN
+        SELECT o.id, o.code INTO out_order_id, out_order_code
+        FROM orders o
+        WHERE o.profile_id = p_profile_id AND o.campaign_id = p_campaign_id;
+    END IF;
+
+    IF p_result = 'placed' THEN
+        INSERT INTO orders_products (order_id, profile_id, campaign_product_id, quantity)
+        VALUES (out_order_id, p_profile_id, p_campaign_product_id, p_quantity)
+        ON CONFLICT (order_id, profile_id, campaign_product_id)
+        DO UPDATE SET quantity = orders_products.quantity + EXCLUDED.quantity, updated_at = CURRENT_TIMESTAMP;
+    END IF;
+
+    out_result := p_result;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
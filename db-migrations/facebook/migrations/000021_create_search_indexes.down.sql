@@ -0,0 +1,18 @@
+BEGIN;
+
+DROP INDEX IF EXISTS facebook_inboxes_message_tsv_idx;
+DROP INDEX IF EXISTS facebook_comments_message_tsv_idx;
+DROP INDEX IF EXISTS facebook_posts_message_tsv_idx;
+
+ALTER TABLE facebook_inboxes DROP COLUMN IF EXISTS message_tsv;
+ALTER TABLE facebook_comments DROP COLUMN IF EXISTS message_tsv;
+ALTER TABLE facebook_posts DROP COLUMN IF EXISTS message_tsv;
+
+DROP INDEX IF EXISTS products_code_trgm_idx;
+DROP INDEX IF EXISTS products_name_trgm_idx;
+DROP INDEX IF EXISTS facebook_inboxes_message_trgm_idx;
+DROP INDEX IF EXISTS facebook_comments_message_trgm_idx;
+DROP INDEX IF EXISTS facebook_posts_message_trgm_idx;
+DROP INDEX IF EXISTS facebook_profiles_name_trgm_idx;
+
+COMMIT;
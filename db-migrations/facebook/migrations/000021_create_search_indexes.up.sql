@@ -0,0 +1,40 @@
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Trigram indexes let the list endpoints' ILIKE '%term%' searches use an
+-- index instead of scanning the table (terms of 3+ characters)
+CREATE INDEX IF NOT EXISTS facebook_profiles_name_trgm_idx
+    ON facebook_profiles USING GIN ("name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS facebook_posts_message_trgm_idx
+    ON facebook_posts USING GIN (message gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS facebook_comments_message_trgm_idx
+    ON facebook_comments USING GIN (message gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS facebook_inboxes_message_trgm_idx
+    ON facebook_inboxes USING GIN (message gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS products_name_trgm_idx
+    ON products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS products_code_trgm_idx
+    ON products USING GIN (code gin_trgm_ops);
+
+-- Word search over message bodies, for searches of several words. The
+-- 'simple' configuration only lowercases, so words match as typed in any
+-- language; Thai text without spaces is left to the trigram indexes.
+ALTER TABLE facebook_posts
+    ADD COLUMN IF NOT EXISTS message_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message, ''))) STORED;
+ALTER TABLE facebook_comments
+    ADD COLUMN IF NOT EXISTS message_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message, ''))) STORED;
+ALTER TABLE facebook_inboxes
+    ADD COLUMN IF NOT EXISTS message_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS facebook_posts_message_tsv_idx
+    ON facebook_posts USING GIN (message_tsv);
+CREATE INDEX IF NOT EXISTS facebook_comments_message_tsv_idx
+    ON facebook_comments USING GIN (message_tsv);
+CREATE INDEX IF NOT EXISTS facebook_inboxes_message_tsv_idx
+    ON facebook_inboxes USING GIN (message_tsv);
+
+COMMIT;
@@ -0,0 +1,15 @@
+BEGIN;
+
+DROP INDEX IF EXISTS campaigns_products_keyword_status_idx;
+DROP INDEX IF EXISTS campaigns_products_campaign_id_idx;
+DROP INDEX IF EXISTS profiles_contacts_profile_id_idx;
+DROP INDEX IF EXISTS payments_order_id_idx;
+DROP INDEX IF EXISTS orders_products_campaign_product_id_idx;
+DROP INDEX IF EXISTS orders_campaign_id_status_created_at_idx;
+DROP INDEX IF EXISTS facebook_inboxes_published_at_idx;
+DROP INDEX IF EXISTS facebook_inboxes_profile_id_published_at_idx;
+DROP INDEX IF EXISTS facebook_comments_published_at_idx;
+DROP INDEX IF EXISTS facebook_comments_post_id_published_at_idx;
+DROP INDEX IF EXISTS facebook_comments_profile_id_published_at_idx;
+
+COMMIT;
@@ -0,0 +1,37 @@
+BEGIN;
+
+-- Comments: a profile's timeline and latest comment, a post's comments, and
+-- the newest-first list (id breaks ties for keyset pages)
+CREATE INDEX IF NOT EXISTS facebook_comments_profile_id_published_at_idx
+    ON facebook_comments (profile_id, published_at DESC) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS facebook_comments_post_id_published_at_idx
+    ON facebook_comments (post_id, published_at DESC) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS facebook_comments_published_at_idx
+    ON facebook_comments (published_at DESC, id DESC) WHERE deleted_at IS NULL;
+
+-- Inboxes: a profile's timeline and latest message, and the newest-first list
+CREATE INDEX IF NOT EXISTS facebook_inboxes_profile_id_published_at_idx
+    ON facebook_inboxes (profile_id, published_at DESC) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS facebook_inboxes_published_at_idx
+    ON facebook_inboxes (published_at DESC, id DESC) WHERE deleted_at IS NULL;
+
+-- Orders: a campaign's orders, by status, newest first
+CREATE INDEX IF NOT EXISTS orders_campaign_id_status_created_at_idx
+    ON orders (campaign_id, status, created_at DESC) WHERE deleted_at IS NULL;
+
+-- Foreign keys no other index leads with. Not partial: ON DELETE CASCADE and
+-- the API's relationship loads look rows up without a deleted_at condition
+CREATE INDEX IF NOT EXISTS orders_products_campaign_product_id_idx
+    ON orders_products (campaign_product_id);
+CREATE INDEX IF NOT EXISTS payments_order_id_idx
+    ON payments (order_id);
+CREATE INDEX IF NOT EXISTS profiles_contacts_profile_id_idx
+    ON profiles_contacts (profile_id);
+CREATE INDEX IF NOT EXISTS campaigns_products_campaign_id_idx
+    ON campaigns_products (campaign_id);
+
+-- Keyword matching in the comment and inbox workers (status, no deleted_at)
+CREATE INDEX IF NOT EXISTS campaigns_products_keyword_status_idx
+    ON campaigns_products (keyword, status);
+
+COMMIT;
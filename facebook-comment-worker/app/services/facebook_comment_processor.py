@@ -1,30 +1,59 @@
 from app.core.config import settings
+from app.services.keyword_index import ACTIVE_STATUS, DEFAULT_MAX_QUANTITY, KeywordIndex, MatchingProduct
+from app.services.outbox_dispatcher import TOPIC_FACEBOOK_COMMENT, TOPIC_ORDER_PLACED
+from app.services.stock_ledger import StockLedger
+from app.utils.cache import LRUCache
 from app.utils.database import Database
+from app.utils.dedupe import SeenFilter
 from app.utils.logging import log_message
-from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 import uuid
-import httpx
-
-@dataclass
-class MatchingProduct:
-    keyword: str
-    campaign_product_id: str
-    product_id: str
-    campaign_id: str
-    quantity: int = 1
-    max_quantity: int = 100
 
 
 # Constants
-ACTIVE_STATUS = "active"
-PENDING_STATUS = "pending"
-DEFAULT_MAX_QUANTITY = 100
+ORDER_PLACED = "placed"
+ORDER_EXCEEDS_MAX_QUANTITY = "exceeds_max_quantity"
+ORDER_OUT_OF_STOCK = "out_of_stock"
+
+# Campaign product for a keyword when the keyword index is off; common-api's
+# tests/integration/test_query_plans.py EXPLAINs these
+MATCHING_PRODUCT_SQL = """
+    WITH active_campaigns AS (
+        SELECT id FROM campaigns WHERE status = %s
+    )
+    SELECT
+        cp.keyword, cp.id, cp.product_id, cp.campaign_id, cp.max_order_quantity as max_quantity
+    FROM campaigns_products cp
+    JOIN active_campaigns ac ON cp.campaign_id = ac.id
+    WHERE cp.keyword = %s AND cp.quantity > 0 AND cp.status = 'active'
+    LIMIT 1;
+"""
+MATCHING_PRODUCTS_BULK_SQL = """
+    WITH active_campaigns AS (
+        SELECT id FROM campaigns WHERE status = %s
+    )
+    SELECT DISTINCT ON (cp.keyword)
+        cp.keyword, cp.id, cp.product_id, cp.campaign_id, cp.max_order_quantity as max_quantity
+    FROM campaigns_products cp
+    JOIN active_campaigns ac ON cp.campaign_id = ac.id
+    WHERE cp.keyword = ANY(%s) AND cp.quantity > 0 AND cp.status = 'active';
+"""
 
 class FacebookCommentProcessor:
-    def __init__(self):
+    def __init__(self, database: Optional[Database] = None, keyword_index: Optional[KeywordIndex] = None, stock_ledger: Optional[StockLedger] = None,
+                 profile_cache: Optional[LRUCache] = None, post_cache: Optional[LRUCache] = None, seen_comments: Optional[SeenFilter] = None):
+        self.keyword_index = keyword_index
+        self.stock_ledger = stock_ledger
+        self.seen_comments = seen_comments
+        self.profile_cache = profile_cache or LRUCache(settings.PROFILE_CACHE_SIZE, settings.PROFILE_CACHE_TTL)
+        self.post_cache = post_cache or LRUCache(settings.POST_CACHE_SIZE, settings.POST_CACHE_TTL)
+
+        if database is not None:
+            self.database = database
+            return
+
         self.database = Database(
             host=settings.DATABASE_HOST,
             port=settings.DATABASE_PORT,
@@ -39,78 +68,13 @@ class FacebookCommentProcessor:
         if hasattr(self, 'database') and self.database:
             self.database.close()
 
-    def _noti_order_to_messenger(self, profile_id: str, order_id: str, order_code: str, order_status: str) -> Tuple[bool, Optional[Exception]]:
-        try:
-            if order_status == "success":
-                facebook_page_url = f"http://{settings.FACEBOOK_PAGE_API_HOST}:{settings.FACEBOOK_PAGE_API_PORT}/api/v1/messengers/send-template-message"
-                payload = {
-                    "recipient_id": profile_id,
-                    "template": {
-                        "template_type": "button",
-                        "text": f"ออเดอร์: {order_code} ของคุณได้รับจองแล้ว",
-                        "buttons": [{ "type": "web_url", "url": f"http://{settings.WEB_HOST}:{settings.WEB_PORT}/orders/{order_id}", "title": "ดูออเดอร์" }]
-                    }
-                }
-            else:
-                facebook_page_url = f"http://{settings.FACEBOOK_PAGE_API_HOST}:{settings.FACEBOOK_PAGE_API_PORT}/api/v1/messengers/send-text-message"
-                payload = {
-                    "recipient_id": profile_id,
-                    "message": "ไม่สามารถจองสินค้าได้ เนื่องจากสินค้าหมด หรือถึงลิมิตการจอง"
-                }
-
-            with httpx.Client() as client:
-                response = client.post(
-                    facebook_page_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    log_message("FacebookCommentProcessor", "debug", f"Sending facebook notification to profile: {profile_id}, order: {order_id} successfully")
-                    return True, None
-                else:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    log_message("FacebookCommentProcessor", "error", f"Sending facebook notification to profile: {profile_id}, order: {order_id} failed - {error_msg}")
-                    return False, Exception(error_msg)
-
-        except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error sending facebook notification to profile: {profile_id}, order: {order_id} with error: {e}")
-            return False, e
-
-
-    def _noti_facebook_comment(self, host: str, comment_id: str) -> Tuple[bool, Optional[Exception]]:
-        """Send notification about Facebook comment to webhook endpoint."""
-        try:
-            webhook_url = f"http://{host}/api/v1/webhooks/facebook-comments"
-            payload = {
-                "event": "seeded_event",
-                "id": comment_id
-            }
-
-            with httpx.Client() as client:
-                response = client.post(
-                    webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    log_message("FacebookCommentProcessor", "debug", f"Webhook notification sent successfully for comment: {comment_id}")
-                    return True, None
-                else:
-                    log_message("FacebookCommentProcessor", "error", f"Webhook notification failed with status {response.status_code}: {response.text}")
-                    return False, None
-
-        except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error sending webhook notification for comment {comment_id}: {e}")
-            return False, e
-
-
     def process_facebook_comment(self, message: Dict[str, Any]) -> Optional[Exception]:
         """Process and save a Facebook comment from a message."""
         try:
+            if self.seen_comments is not None and not self.seen_comments.unseen([message.get("id")]):
+                log_message("FacebookCommentProcessor", "info", f"Comment already processed, skipped: {message.get('id')}")
+                return None
+
             profile_id, error = self._get_profile_id(message["from_id"], message["from_name"])
             if error or not profile_id:
                 log_message("FacebookCommentProcessor", "error", f"Profile not found: {message['from_id']}")
@@ -131,224 +95,307 @@ class FacebookCommentProcessor:
                 log_message("FacebookCommentProcessor", "error", f"Error saving Facebook comment: {error}")
                 raise Exception("Error saving Facebook comment")
 
-            matching_product, error = self._get_matching_products(comment_data["message"])
+            if self.seen_comments is not None:
+                self.seen_comments.mark([comment_data["comment_id"]])
+
+            matching_products, error = self._get_matching_products(comment_data["message"])
             if error:
                 log_message("FacebookCommentProcessor", "error", f"Error getting matching product: {error}")
                 raise error
 
-            if not matching_product:
+            if not matching_products:
                 log_message("FacebookCommentProcessor", "info", f"No matching product found for comment message: {comment_data['message']}, skipped")
                 return None
 
-            order_id, order_code, error = self._create_order(
-                profile_id,
-                matching_product.campaign_id,
-                matching_product.campaign_product_id,
-                matching_product.quantity,
-                matching_product.max_quantity,
-            )
+            return self._place_orders(message, profile_id, matching_products)
 
+        except Exception as e:
+            log_message("FacebookCommentProcessor", "error", f"Error processing Facebook comment: {e}")
+            return e
+
+
+    def process_facebook_comments(self, messages: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        """Process a batch of Facebook comments, returning one error slot per message."""
+        errors: List[Optional[Exception]] = [None] * len(messages)
+        try:
+            if self.seen_comments is not None:
+                unseen = self.seen_comments.unseen([m.get("id") for m in messages])
+                first_index = {}
+                for index, message in enumerate(messages):
+                    first_index.setdefault(message.get("id"), index)
+                fresh = {first_index[id] for id in unseen}
+                if len(fresh) < len(messages):
+                    log_message("FacebookCommentProcessor", "info", f"Skipped {len(messages) - len(fresh)} already processed comments")
+                messages = [message if index in fresh else None for index, message in enumerate(messages)]
+
+            profile_ids, error = self._get_profile_ids({m["from_id"]: m.get("from_name") for m in messages if m and "from_id" in m})
             if error:
-                if "exceeds max allowed" in str(error):
-                    log_message("FacebookCommentProcessor", "info", f"Order product quantity exceeds max allowed for order_code={order_code}")
-                    _, notify_error = self._noti_order_to_messenger(message["from_id"], order_id, order_code, "failed")
-                    if notify_error:
-                        log_message("FacebookCommentProcessor", "error", f"Failed to send facebook notification for order: {order_code}")
-                        return notify_error
+                raise error
 
-                    return None
+            post_ids, error = self._get_post_ids([m["post_id"] for m in messages if m and "post_id" in m])
+            if error:
+                raise error
 
-                log_message("FacebookCommentProcessor", "error", f"Failed to create order: {error}")
-                return error
+            comments = []
+            for index, message in enumerate(messages):
+                if message is None:
+                    continue
 
-            if order_code is None:
-                log_message("FacebookCommentProcessor", "error", f"Failed to create order: {error}, not found order code")
-                return error
+                profile_id = profile_ids.get(message.get("from_id"))
+                if not profile_id:
+                    log_message("FacebookCommentProcessor", "error", f"Profile not found: {message.get('from_id')}")
+                    errors[index] = Exception("Profile not found")
+                    continue
 
-            _, notify_error = self._noti_order_to_messenger(message["from_id"], order_id, order_code, "success")
-            if notify_error:
-                log_message("FacebookCommentProcessor", "error", f"Failed to send facebook notification for order: {order_code}")
-                return notify_error
+                post_id = post_ids.get(message.get("post_id"))
+                if not post_id:
+                    log_message("FacebookCommentProcessor", "error", f"Post not found: {message.get('post_id')}")
+                    errors[index] = Exception("Post not found")
+                    continue
 
-            return None
+                comment_data, error = self._extract_comment_data(profile_id, post_id, message)
+                if error:
+                    errors[index] = error
+                    continue
+
+                comments.append((index, comment_data))
+
+            if not comments:
+                return errors
+
+            error = self._save_facebook_comments([comment_data for _, comment_data in comments])
+            if error:
+                log_message("FacebookCommentProcessor", "error", f"Error saving Facebook comments batch: {error}")
+                for index, _ in comments:
+                    errors[index] = error
+                return errors
+
+            if self.seen_comments is not None:
+                self.seen_comments.mark([comment_data["comment_id"] for _, comment_data in comments])
+
+            matching_products, error = self._get_matching_products_bulk([comment_data["message"] for _, comment_data in comments])
+            if error:
+                log_message("FacebookCommentProcessor", "error", f"Error getting matching products: {error}")
+                for index, _ in comments:
+                    errors[index] = error
+                return errors
+
+            for index, comment_data in comments:
+                matching_product_list = matching_products.get(comment_data["message"])
+                if not matching_product_list:
+                    log_message("FacebookCommentProcessor", "info", f"No matching product found for comment message: {comment_data['message']}, skipped")
+                    continue
+
+                errors[index] = self._place_orders(messages[index], comment_data["profile_id"], matching_product_list)
+
+            return errors
 
         except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error processing Facebook comment: {e}")
-            return e
+            log_message("FacebookCommentProcessor", "error", f"Error processing Facebook comments batch: {e}")
+            return [error or e for error in errors]
+
+
+    def _place_orders(self, message: Dict[str, Any], profile_id: str, matching_products: List[MatchingProduct]) -> Optional[Exception]:
+        """Place one order line per matched keyword, returning the first error."""
+        first_error = None
+        for matching_product in matching_products:
+            error = self._place_order(message, profile_id, matching_product)
+            first_error = first_error or error
+        return first_error
+
+
+    def _place_order(self, message: Dict[str, Any], profile_id: str, matching_product: MatchingProduct) -> Optional[Exception]:
+        """Place the order; the buyer is notified through the outbox either way."""
+        order_id, order_code, error = self._create_order(
+            profile_id,
+            message["from_id"],
+            matching_product.campaign_id,
+            matching_product.campaign_product_id,
+            matching_product.quantity,
+            matching_product.max_quantity,
+        )
+
+        if error:
+            if "exceeds max allowed" in str(error) or "out of stock" in str(error):
+                log_message("FacebookCommentProcessor", "info", f"Order rejected for order_code={order_code}: {error}")
+                return None
+
+            log_message("FacebookCommentProcessor", "error", f"Failed to create order: {error}")
+            return error
+
+        if order_code is None:
+            log_message("FacebookCommentProcessor", "error", f"Failed to create order: {error}, not found order code")
+            return error
+
+        return None
 
 
     def _get_profile_id(self, id: str, name: str) -> Tuple[Optional[str], Optional[Exception]]:
+        profile_ids, error = self._get_profile_ids({id: name})
+        if error:
+            log_message("FacebookCommentProcessor", "error", f"Error getting profile ID for facebook_id={id}, name={name}: {error}")
+            return None, error
+        return profile_ids.get(id), None
+
+
+    def _get_post_id(self, id: str) -> Tuple[Optional[str], Optional[Exception]]:
+        post_ids, error = self._get_post_ids([id])
+        if error:
+            return None, error
+        return post_ids.get(id), None
+
+
+    def _get_profile_ids(self, profiles: Dict[str, Optional[str]]) -> Tuple[Dict[str, str], Optional[Exception]]:
+        """Resolve facebook_id -> profile id through the cache, creating missing profiles."""
+        if not profiles:
+            return {}, None
         try:
-            query = """
-                SELECT id FROM facebook_profiles WHERE facebook_id = %s LIMIT 1
-            """
-            result = self.database.execute_query(query, (id,))
-
-            if result:
-                return result[0]["id"], None
-
-            # If not found, insert new profile with proper error handling
-            query = """
-                INSERT INTO facebook_profiles (type, facebook_id, name)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (facebook_id) DO UPDATE SET name = EXCLUDED.name
-                RETURNING id
-            """
-
-            # Get the newly created profile ID
-            query = """
-                SELECT id FROM facebook_profiles WHERE facebook_id = %s LIMIT 1
-            """
-            result = self.database.execute_query(query, (id,))
-
-            return result[0]["id"], None
+            found = self.profile_cache.get_many(profiles.keys())
+            missing = [id for id in profiles if id not in found]
+            if not missing:
+                return found, None
+
+            query = "SELECT facebook_id, id FROM facebook_profiles WHERE facebook_id = ANY(%s)"
+            result = self.database.execute_query(query, (missing,))
+            loaded = {row["facebook_id"]: row["id"] for row in result}
+
+            unknown = [(id, profiles[id] or id) for id in missing if id not in loaded]
+            if unknown:
+                query = """
+                    INSERT INTO facebook_profiles (type, facebook_id, name)
+                    VALUES %s
+                    ON CONFLICT (facebook_id) DO UPDATE SET name = EXCLUDED.name
+                    RETURNING facebook_id, id
+                """
+                result = self.database.execute_values(query, unknown, template="('user', %s, %s)", fetch=True)
+                loaded.update({row["facebook_id"]: row["id"] for row in result})
+
+            self.profile_cache.set_many(loaded)
+            found.update(loaded)
+            return found, None
         except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error getting profile ID for facebook_id={id}, name={name}: {e}")
-            return None, e
+            log_message("FacebookCommentProcessor", "error", f"Error getting profile IDs for {len(profiles)} facebook_ids: {e}")
+            self.database.rollback_transaction()
+            return {}, e
 
 
-    def _get_post_id(self, id: str) -> Tuple[Optional[str], Optional[Exception]]:
-        query = "SELECT id FROM facebook_posts WHERE post_id = %s LIMIT 1"
-        result = self.database.execute_query(query, (id,))
-        if result:
-            return result[0]["id"], None
-        return None, None
+    def _get_post_ids(self, ids: List[str]) -> Tuple[Dict[str, str], Optional[Exception]]:
+        """Resolve post_id -> facebook_posts id through the cache; unknown posts are not cached."""
+        if not ids:
+            return {}, None
+        try:
+            found = self.post_cache.get_many(set(ids))
+            missing = list(set(ids) - found.keys())
+            if not missing:
+                return found, None
+
+            query = "SELECT post_id, id FROM facebook_posts WHERE post_id = ANY(%s)"
+            result = self.database.execute_query(query, (missing,))
+            loaded = {row["post_id"]: row["id"] for row in result}
+
+            self.post_cache.set_many(loaded)
+            found.update(loaded)
+            return found, None
+        except Exception as e:
+            log_message("FacebookCommentProcessor", "error", f"Error getting post IDs for {len(ids)} post_ids: {e}")
+            return {}, e
+
 
+    def _get_matching_products(self, message: str) -> Tuple[List[MatchingProduct], Optional[Exception]]:
+        if self.keyword_index is not None:
+            return self.keyword_index.match(message), None
 
-    def _get_matching_products(self, message: str) -> Tuple[Optional[MatchingProduct], Optional[Exception]]:
         keyword = message.strip().lower()
-        query = f"""
-            WITH active_campaigns AS (
-                SELECT id FROM campaigns WHERE status = %s
-            )
-            SELECT
-                cp.keyword, cp.id, cp.product_id, cp.campaign_id, cp.max_order_quantity as max_quantity
-            FROM campaigns_products cp
-            JOIN active_campaigns ac ON cp.campaign_id = ac.id
-            WHERE cp.keyword = %s AND cp.quantity > 0 AND cp.status = 'active'
-            LIMIT 1;
-        """
-        found = self.database.execute_query(query, (ACTIVE_STATUS, keyword))
+        found = self.database.execute_query(MATCHING_PRODUCT_SQL, (ACTIVE_STATUS, keyword))
         if found:
-            return MatchingProduct(
+            return [MatchingProduct(
                 keyword=found[0]["keyword"],
                 campaign_product_id=found[0]["id"],
                 product_id=found[0]["product_id"],
                 campaign_id=found[0]["campaign_id"],
                 quantity=1,
                 max_quantity=found[0]["max_quantity"] or DEFAULT_MAX_QUANTITY
-            ), None
-        return None, None
+            )], None
+        return [], None
 
 
-    def _create_order(self, profile_id: str, campaign_id: str, campaign_product_id: str, quantity: int, max_quantity: int) -> Tuple[Optional[str], Optional[str], Optional[Exception]]:
-        try:
-            order_id, error = self._create_pending_order(profile_id, campaign_id)
-            if error:
-                log_message("FacebookCommentProcessor", "error", f"Failed to create or fetch order for profile_id={profile_id}, campaign_id={campaign_id}")
-                return None, None, error
+    def _get_matching_products_bulk(self, messages: List[str]) -> Tuple[Dict[str, List[MatchingProduct]], Optional[Exception]]:
+        """Return the matched products for each distinct message."""
+        if self.keyword_index is not None:
+            return {message: self.keyword_index.match(message) for message in set(messages)}, None
 
-            if not order_id:
-                log_message("FacebookCommentProcessor", "error", f"Failed to create or fetch order for profile_id={profile_id}, campaign_id={campaign_id}")
-                return None, None, error
+        keywords = list({message.strip().lower() for message in messages})
 
-            order_code, error = self._get_order_code(order_id)
-            if error:
-                log_message("FacebookCommentProcessor", "error", f"Failed to get order code for order_id={order_id}")
-                return None, None, error
+        try:
+            found = self.database.execute_query(MATCHING_PRODUCTS_BULK_SQL, (ACTIVE_STATUS, keywords))
+            products = {
+                row["keyword"]: MatchingProduct(
+                    keyword=row["keyword"],
+                    campaign_product_id=row["id"],
+                    product_id=row["product_id"],
+                    campaign_id=row["campaign_id"],
+                    quantity=1,
+                    max_quantity=row["max_quantity"] or DEFAULT_MAX_QUANTITY
+                )
+                for row in found
+            }
+            return {
+                message: [products[message.strip().lower()]]
+                for message in set(messages) if message.strip().lower() in products
+            }, None
+        except Exception as e:
+            log_message("FacebookCommentProcessor", "error", f"Error getting matching products: {e}")
+            return {}, e
 
-            _, error = self._create_order_product(order_id, profile_id, campaign_product_id, quantity, max_quantity)
-            if error:
-                if "exceeds max allowed" in str(error):
-                    log_message("FacebookCommentProcessor", "info", f"Order product quantity exceeds max allowed for order_id={order_id}")
-                    return order_id, order_code, None
 
-                log_message("FacebookCommentProcessor", "error", f"Failed to create order product for order_id={order_id}")
-                return None, None, error
+    def _create_order(self, profile_id: str, recipient_id: str, campaign_id: str, campaign_product_id: str, quantity: int, max_quantity: int) -> Tuple[Optional[str], Optional[str], Optional[Exception]]:
+        """Create or fetch the pending order, reserve stock and queue the buyer's notification in one statement.
 
-            _, error = self._deduct_campaign_product_quantity(campaign_product_id, quantity)
+        With the stock ledger enabled, stock is reserved in Redis first and
+        record_reserved_order() only writes the order, leaving the
+        campaigns_products row to the ledger's write-behind flush.
+        """
+        function, params = "place_order", (profile_id, campaign_id, campaign_product_id, quantity, max_quantity)
+        reserved = None
+        if self.stock_ledger is not None:
+            reserved, error = self.stock_ledger.reserve(self.database, campaign_product_id, profile_id, quantity, max_quantity)
             if error:
-                log_message("FacebookCommentProcessor", "error", f"Failed to deduct product quantity for campaign_product_id={campaign_product_id}")
                 return None, None, error
+            function, params = "record_reserved_order", (profile_id, campaign_id, campaign_product_id, quantity, reserved)
 
-            return order_id, order_code, None
-        except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error creating order: {e}")
-            return None, None, e
-
-
-    def _get_order_code(self, order_id: str) -> Tuple[Optional[str], Optional[Exception]]:
-        query = """
-            SELECT code FROM orders WHERE id = %s
-        """
-        result = self.database.execute_query(query, (order_id,))
-        return result[0]["code"] if result else None, None
-
-
-    def _create_pending_order(self, profile_id: str, campaign_id: str) -> Tuple[Optional[str], Optional[Exception]]:
-        query = """
-            WITH ins AS (
-                INSERT INTO orders (profile_id, campaign_id, status)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (profile_id, campaign_id) DO NOTHING
-                RETURNING id
+        query = f"""
+            WITH placed AS (
+                SELECT out_order_id AS order_id, out_order_code AS order_code, out_result AS result
+                FROM {function}(%s, %s, %s, %s, %s)
+            ), queued AS (
+                INSERT INTO notifications_outbox (topic, recipient_id, payload)
+                SELECT %s, %s, jsonb_build_object('order_id', order_id, 'order_code', order_code, 'result', result)
+                FROM placed
+                WHERE order_id IS NOT NULL
             )
-            SELECT id FROM ins
-            UNION ALL
-            SELECT id FROM orders WHERE profile_id = %s AND campaign_id = %s LIMIT 1
+            SELECT order_id, order_code, result FROM placed
         """
         try:
-            result = self.database.execute_query(
-                query, (profile_id, campaign_id, PENDING_STATUS, profile_id, campaign_id)
-            )
-            order_id = result[0]["id"] if result else None
-            return order_id, None
-        except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error creating/fetching pending order for profile_id={profile_id}, campaign_id={campaign_id}: {e}")
-            return None, e
+            # A bounded write: errors that retrying cannot fix reach the except below
+            result = self.database.execute_write(query, params + (TOPIC_ORDER_PLACED, recipient_id))
 
+            if not result or not result[0]["order_id"]:
+                log_message("FacebookCommentProcessor", "error", f"Failed to create or fetch order for profile_id={profile_id}, campaign_id={campaign_id}")
+                return None, None, Exception("Order not created")
 
-    def _create_order_product(self, order_id: str, profile_id: str, campaign_product_id: str, quantity: int, max_quantity: int) -> Tuple[Optional[str], Optional[Exception]]:
-        select_query = """
-            SELECT quantity FROM orders_products
-            WHERE order_id = %s AND profile_id = %s AND campaign_product_id = %s
-        """
-        try:
-            result = self.database.execute_query(select_query, (order_id, profile_id, campaign_product_id))
-            current_quantity = result[0]["quantity"] if result else 0
-
-            if current_quantity + quantity > max_quantity:
-                error_msg = f"Order product quantity ({current_quantity} + {quantity}) exceeds max allowed ({max_quantity})"
-                log_message("FacebookCommentProcessor", "info", error_msg)
-                return None, Exception(error_msg)
-
-            query = """
-                INSERT INTO orders_products (order_id, profile_id, campaign_product_id, quantity)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (order_id, profile_id, campaign_product_id)
-                DO UPDATE
-                SET quantity = orders_products.quantity + %s
-                RETURNING id;
-            """
-            order_product_id = self.database.execute_command(query, (order_id, profile_id, campaign_product_id, quantity, quantity))
-            return order_product_id, None
-        except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error creating order product: {e}")
-            return None, e
-
+            order_id, order_code = result[0]["order_id"], result[0]["order_code"]
+            if result[0]["result"] == ORDER_EXCEEDS_MAX_QUANTITY:
+                return order_id, order_code, Exception(f"Order product quantity exceeds max allowed ({max_quantity})")
+            if result[0]["result"] == ORDER_OUT_OF_STOCK:
+                return order_id, order_code, Exception(f"Campaign product {campaign_product_id} is out of stock")
 
-    def _deduct_campaign_product_quantity(self, campaign_product_id: str, quantity: int) -> Tuple[Optional[str], Optional[Exception]]:
-        query = """
-            UPDATE campaigns_products
-            SET quantity = quantity - %s
-            WHERE id = %s
-        """
-        try:
-            self.database.execute_command(query, (quantity, campaign_product_id))
-            return campaign_product_id, None
+            return order_id, order_code, None
         except Exception as e:
-            log_message("FacebookCommentProcessor", "error", f"Error deducting campaign product quantity: {e}")
-            return None, e
+            self.database.rollback_transaction()
+            if reserved == ORDER_PLACED:
+                self.stock_ledger.release(campaign_product_id, profile_id, quantity)
+            log_message("FacebookCommentProcessor", "error", f"Error creating order: {e}")
+            return None, None, e
 
 
     def _extract_comment_data(self, profile_id: str, post_id: str, message: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
@@ -384,13 +431,21 @@ class FacebookCommentProcessor:
 
     def _save_facebook_comment(self, comment_data: Dict[str, Any]) -> Optional[Exception]:
         query = """
-            INSERT INTO facebook_comments (
-                id, profile_id, post_id, comment_id, message, type,
-                link, published_at, created_at, updated_at, deleted_at
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+            WITH inserted AS (
+                INSERT INTO facebook_comments (
+                    id, profile_id, post_id, comment_id, message, type,
+                    link, published_at, created_at, updated_at, deleted_at
+                ) VALUES (
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                )
+                ON CONFLICT (comment_id) DO NOTHING
+                RETURNING comment_id
+            ), queued AS (
+                INSERT INTO notifications_outbox (topic, recipient_id, payload)
+                SELECT %s, comment_id, jsonb_build_object('id', comment_id)
+                FROM inserted
             )
-            ON CONFLICT (comment_id) DO NOTHING
+            SELECT comment_id FROM inserted
         """
 
         params = (
@@ -405,13 +460,14 @@ class FacebookCommentProcessor:
             comment_data['created_at'],
             comment_data['updated_at'],
             comment_data['deleted_at'],
+            TOPIC_FACEBOOK_COMMENT,
         )
 
         try:
-            affected_rows = self.database.execute_command(query, params)
-            if affected_rows > 0:
+            inserted = self.database.execute_query(query, params)
+            self.database.commit_transaction()
+            if inserted:
                 log_message("FacebookCommentProcessor", "debug", f"Facebook comment saved successfully: {comment_data['post_id']}")
-                self._noti_facebook_comment(f"{settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}", comment_data['comment_id'])
             else:
                 log_message("FacebookCommentProcessor", "info", f"Comment already exists, skipped: {comment_data['post_id']}")
 
@@ -420,3 +476,48 @@ class FacebookCommentProcessor:
         except Exception as e:
             log_message("FacebookCommentProcessor", "error", f"Database error saving comment {comment_data['post_id']}: {e}")
             return e
+
+
+    def _save_facebook_comments(self, comments: List[Dict[str, Any]]) -> Optional[Exception]:
+        query = f"""
+            WITH inserted AS (
+                INSERT INTO facebook_comments (
+                    id, profile_id, post_id, comment_id, message, type,
+                    link, published_at, created_at, updated_at, deleted_at
+                ) VALUES %s
+                ON CONFLICT (comment_id) DO NOTHING
+                RETURNING comment_id
+            ), queued AS (
+                INSERT INTO notifications_outbox (topic, recipient_id, payload)
+                SELECT '{TOPIC_FACEBOOK_COMMENT}', comment_id, jsonb_build_object('id', comment_id)
+                FROM inserted
+            )
+            SELECT comment_id FROM inserted
+        """
+
+        params_list = [
+            (
+                str(uuid.uuid4()),
+                comment_data['profile_id'],
+                comment_data['post_id'],
+                comment_data['comment_id'],
+                f"{comment_data['message']}",
+                comment_data['type'],
+                comment_data['link'],
+                comment_data['published_at'],
+                comment_data['created_at'],
+                comment_data['updated_at'],
+                comment_data['deleted_at'],
+            )
+            for comment_data in comments
+        ]
+
+        try:
+            inserted = self.database.execute_values(query, params_list, fetch=True)
+            log_message("FacebookCommentProcessor", "debug", f"Facebook comments batch saved: {len(inserted)}/{len(comments)} new")
+
+            return None
+
+        except Exception as e:
+            log_message("FacebookCommentProcessor", "error", f"Database error saving comments batch of {len(comments)}: {e}")
+            return e
@@ -1,18 +1,45 @@
 from app.core.config import settings
 from app.services.facebook_comment_processor import FacebookCommentProcessor
+from app.services.keyword_index import KeywordIndex
+from app.services.outbox_dispatcher import OutboxDispatcher
+from app.services.stock_ledger import StockLedger
+from app.utils.cache import LRUCache
+from app.utils.database import Database, DatabasePool
+from app.utils.dedupe import SeenFilter
 from app.utils.logging import log_message
 from app.utils.queue import Queue
-from typing import Dict, Any
+from app.utils.redis import Redis
+from typing import Dict, Any, List, Optional
 
 import threading
 
 
 class QueueConsumer:
-    def __init__(self):
-        self.queue = None
-        self.facebook_comment_processor = FacebookCommentProcessor()
-        self.consumer_thread = None
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = max(int(concurrency or settings.QUEUE_CONSUMER_CONCURRENCY), 1)
+        self.database_pool = None
+        self.keyword_index = None
+        self.outbox_dispatcher = None
+        self.stock_ledger = None
+        self.profile_cache = LRUCache(settings.PROFILE_CACHE_SIZE, settings.PROFILE_CACHE_TTL)
+        self.post_cache = LRUCache(settings.POST_CACHE_SIZE, settings.POST_CACHE_TTL)
+        self.seen_comments = None
+        if settings.COMMENT_DEDUPE_ENABLED:
+            self.seen_comments = SeenFilter(
+                "processed_comments",
+                max_size=settings.COMMENT_DEDUPE_SIZE,
+                ttl=settings.COMMENT_DEDUPE_TTL,
+                redis=Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                    password=settings.REDIS_PASSWORD,
+                ) if settings.COMMENT_DEDUPE_REDIS_ENABLED else None,
+            )
+        self.queues: List[Queue] = []
+        self.consumer_threads: List[threading.Thread] = []
         self.is_running = False
+        self._lock = threading.Lock()
 
     def start(self):
         """Start the queue consumer."""
@@ -21,21 +48,96 @@ class QueueConsumer:
             return
 
         try:
-            # Initialize queue connection
-            self.queue = Queue(
-                host=settings.QUEUE_HOST,
-                username=settings.QUEUE_USER,
-                password=settings.QUEUE_PASS,
+            self.database_pool = DatabasePool(
+                settings.DATABASE_POOL_MIN_CONNECTIONS,
+                max(int(settings.DATABASE_POOL_MAX_CONNECTIONS), self.concurrency),
+                host=settings.DATABASE_HOST,
+                port=settings.DATABASE_PORT,
+                user=settings.DATABASE_USER,
+                password=settings.DATABASE_PASSWORD,
+                database=settings.DATABASE_NAME,
+                sslmode=settings.DATABASE_SSLMODE,
+                connect_timeout=settings.DATABASE_TIMEOUT,
             )
-            self.queue.connect()
 
-            # Start consumer thread
+            if self.seen_comments and self.seen_comments.redis:
+                self.seen_comments.redis.connect()
+
+            if settings.KEYWORD_INDEX_ENABLED:
+                self.keyword_index = KeywordIndex(
+                    host=settings.DATABASE_HOST,
+                    port=settings.DATABASE_PORT,
+                    user=settings.DATABASE_USER,
+                    password=settings.DATABASE_PASSWORD,
+                    database=settings.DATABASE_NAME,
+                    sslmode=settings.DATABASE_SSLMODE,
+                    timeout=settings.DATABASE_TIMEOUT,
+                    ttl=settings.KEYWORD_INDEX_TTL,
+                )
+                self.keyword_index.start()
+
+            if settings.STOCK_LEDGER_ENABLED:
+                self.stock_ledger = StockLedger(
+                    redis=Redis(
+                        host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        db=settings.REDIS_DB,
+                        password=settings.REDIS_PASSWORD,
+                    ),
+                    database=Database(
+                        host=settings.DATABASE_HOST,
+                        port=settings.DATABASE_PORT,
+                        user=settings.DATABASE_USER,
+                        password=settings.DATABASE_PASSWORD,
+                        database=settings.DATABASE_NAME,
+                        sslmode=settings.DATABASE_SSLMODE,
+                        timeout=settings.DATABASE_TIMEOUT,
+                    ),
+                    flush_interval=settings.STOCK_LEDGER_FLUSH_INTERVAL,
+                )
+                self.stock_ledger.start()
+
+            if settings.OUTBOX_DISPATCHER_ENABLED:
+                self.outbox_dispatcher = OutboxDispatcher(
+                    database=Database(
+                        host=settings.DATABASE_HOST,
+                        port=settings.DATABASE_PORT,
+                        user=settings.DATABASE_USER,
+                        password=settings.DATABASE_PASSWORD,
+                        database=settings.DATABASE_NAME,
+                        sslmode=settings.DATABASE_SSLMODE,
+                        timeout=settings.DATABASE_TIMEOUT,
+                    ),
+                    batch_size=settings.OUTBOX_BATCH_SIZE,
+                    concurrency=settings.OUTBOX_CONCURRENCY,
+                    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+                    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+                    retry_delay=settings.OUTBOX_RETRY_DELAY,
+                    request_timeout=settings.OUTBOX_REQUEST_TIMEOUT,
+                )
+                self.outbox_dispatcher.start()
+
+            # Start one consumer thread per channel, each with its own queue connection
             self.is_running = True
-            self.consumer_thread = threading.Thread(target=self._consume_messages)
-            self.consumer_thread.daemon = True
-            self.consumer_thread.start()
-
-            log_message("QueueConsumer", "info", "Queue consumer started successfully")
+            self.queues = []
+            self.consumer_threads = []
+            for index in range(self.concurrency):
+                queue = Queue(
+                    host=settings.QUEUE_HOST,
+                    username=settings.QUEUE_USER,
+                    password=settings.QUEUE_PASS,
+                )
+                queue.connect()
+                self.queues.append(queue)
+
+                consumer_thread = threading.Thread(target=self._consume_messages, args=(queue,), name=f"QueueConsumer-{index}")
+                consumer_thread.daemon = True
+                self.consumer_threads.append(consumer_thread)
+
+            for consumer_thread in self.consumer_threads:
+                consumer_thread.start()
+
+            log_message("QueueConsumer", "info", f"Queue consumer started successfully with {self.concurrency} consumer threads")
 
         except Exception as e:
             log_message("QueueConsumer", "error", f"Failed to start queue consumer: {e}")
@@ -45,21 +147,61 @@ class QueueConsumer:
         """Stop the queue consumer."""
         self.is_running = False
 
-        if self.queue:
-            self.queue.close()
+        for queue in self.queues:
+            queue.close()
+
+        for consumer_thread in self.consumer_threads:
+            if consumer_thread.is_alive():
+                consumer_thread.join(timeout=5)
+
+        if self.keyword_index:
+            self.keyword_index.stop()
+            self.keyword_index = None
+
+        if self.stock_ledger:
+            self.stock_ledger.stop()
+            self.stock_ledger = None
+
+        if self.outbox_dispatcher:
+            self.outbox_dispatcher.stop()
+            self.outbox_dispatcher = None
+
+        if self.seen_comments and self.seen_comments.redis:
+            self.seen_comments.redis.close()
 
-        if self.consumer_thread and self.consumer_thread.is_alive():
-            self.consumer_thread.join(timeout=5)
+        if self.database_pool:
+            self.database_pool.closeall()
+            self.database_pool = None
 
         log_message("QueueConsumer", "info", "Queue consumer stopped")
 
-    def _consume_messages(self):
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit-rate counters of the ID caches shared by every consumer thread."""
+        return {
+            "profiles": self.profile_cache.stats(),
+            "posts": self.post_cache.stats(),
+        }
+
+    def dedupe_stats(self) -> Optional[Dict[str, Any]]:
+        """Share of consumed comments dropped as already processed."""
+        return self.seen_comments.stats() if self.seen_comments else None
+
+    def _create_processor(self) -> FacebookCommentProcessor:
+        """Create a processor bound to a connection borrowed from the shared pool."""
+        return FacebookCommentProcessor(
+            database=self.database_pool.get_database(), keyword_index=self.keyword_index, stock_ledger=self.stock_ledger,
+            profile_cache=self.profile_cache, post_cache=self.post_cache, seen_comments=self.seen_comments
+        )
+
+    def _consume_messages(self, queue: Queue):
         """Consume messages from the queue."""
+        facebook_comment_processor = self._create_processor()
+
         def message_callback(message: Dict[str, Any]):
             """Callback function for processing messages."""
             try:
                 log_message("QueueConsumer", "debug", f"Processing message: {message.get('id', 'unknown')}")
-                error = self.facebook_comment_processor.process_facebook_comment(message)
+                error = facebook_comment_processor.process_facebook_comment(message)
 
                 if error:
                     log_message("QueueConsumer", "error", f"Failed to process message: {message.get('id', 'unknown')} with error: {error}")
@@ -68,17 +210,42 @@ class QueueConsumer:
             except Exception as e:
                 log_message("QueueConsumer", "error", f"Error in message callback: {e}")
 
+        def batch_callback(messages: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+            """Callback function for processing a batch of messages."""
+            log_message("QueueConsumer", "debug", f"Processing batch of {len(messages)} messages")
+            errors = facebook_comment_processor.process_facebook_comments(messages)
+
+            for message, error in zip(messages, errors):
+                if error:
+                    log_message("QueueConsumer", "error", f"Failed to process message: {message.get('id', 'unknown')} with error: {error}")
+
+            return errors
+
         def log_callback():
             """Callback function for logging."""
             log_message("QueueConsumer", "debug", "Consuming messages from queue")
 
         try:
-            self.queue.consume(
-                queue_name=settings.QUEUE_NAME,
-                log=log_callback,
-                callback=message_callback
-            )
+            if settings.QUEUE_BATCH_ENABLED:
+                queue.consume_batch(
+                    queue_name=settings.QUEUE_NAME,
+                    log=log_callback,
+                    callback=batch_callback,
+                    batch_size=settings.QUEUE_BATCH_SIZE,
+                    batch_timeout=settings.QUEUE_BATCH_TIMEOUT,
+                    prefetch_count=settings.QUEUE_PREFETCH_COUNT
+                )
+            else:
+                queue.consume(
+                    queue_name=settings.QUEUE_NAME,
+                    log=log_callback,
+                    callback=message_callback,
+                    prefetch_count=settings.QUEUE_PREFETCH_COUNT
+                )
         except Exception as e:
             log_message("QueueConsumer", "error", f"Error in consume loop: {e}")
         finally:
-            self.is_running = False
\ No newline at end of file
+            facebook_comment_processor.database.close()
+            with self._lock:
+                if not any(t.is_alive() for t in self.consumer_threads if t is not threading.current_thread()):
+                    self.is_running = False
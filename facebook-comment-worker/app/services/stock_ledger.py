@@ -0,0 +1,334 @@
+from app.utils.database import Database
+from app.utils.logging import log_message
+from app.utils.redis import Redis
+from typing import Dict, Optional, Tuple
+
+import threading
+import uuid
+
+
+# Constants
+ORDER_PLACED = "placed"
+ORDER_EXCEEDS_MAX_QUANTITY = "exceeds_max_quantity"
+ORDER_OUT_OF_STOCK = "out_of_stock"
+PRODUCTS_KEY = "stock:products"
+PENDING_KEY = "stock:pending"
+FLUSHING_KEY = "stock:flushing"
+FLUSHING_BATCH_KEY = "stock:flushing:batch"
+FLUSHED_KEY = "stock:flushed"
+LOAD_ATTEMPTS = 3
+
+# KEYS: available, ordered, pending  ARGV: profile_id, quantity, max_quantity, campaign_product_id
+RESERVE_SCRIPT = """
+local available = redis.call('GET', KEYS[1])
+if not available then
+    return -2
+end
+local quantity = tonumber(ARGV[2])
+local ordered = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if ordered + quantity > tonumber(ARGV[3]) then
+    return -1
+end
+if tonumber(available) < quantity then
+    return 0
+end
+redis.call('DECRBY', KEYS[1], quantity)
+redis.call('HINCRBY', KEYS[2], ARGV[1], quantity)
+redis.call('HINCRBY', KEYS[3], ARGV[4], quantity)
+return 1
+"""
+
+# KEYS: available, ordered, pending  ARGV: profile_id, quantity, campaign_product_id
+RELEASE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('INCRBY', KEYS[1], ARGV[2])
+end
+redis.call('HINCRBY', KEYS[2], ARGV[1], -tonumber(ARGV[2]))
+redis.call('HINCRBY', KEYS[3], ARGV[3], -tonumber(ARGV[2]))
+return 1
+"""
+
+# KEYS: available, ordered, pending, flushing, products, flushed
+# ARGV: campaign_product_id, database quantity, flushed count read before the
+# database, then profile_id/quantity pairs
+# Returns -1 when a flush finished since the database read, so the quantity may
+# not include it yet.
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if (redis.call('GET', KEYS[6]) or '0') ~= ARGV[3] then
+    return -1
+end
+local unflushed = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0') + tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0')
+redis.call('SET', KEYS[1], tonumber(ARGV[2]) - unflushed)
+redis.call('DEL', KEYS[2])
+for i = 4, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('SADD', KEYS[5], ARGV[1])
+return 1
+"""
+
+# KEYS: available, pending, flushing, flushed
+# ARGV: campaign_product_id, database quantity, flushed count read before the database
+SYNC_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if (redis.call('GET', KEYS[4]) or '0') ~= ARGV[3] then
+    return -1
+end
+local unflushed = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0') + tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+redis.call('SET', KEYS[1], tonumber(ARGV[2]) - unflushed)
+return 1
+"""
+
+# KEYS: pending, flushing, flushing batch  ARGV: new batch id
+# Returns the batch left behind by an interrupted flush before taking a new one.
+TAKE_SCRIPT = """
+local batch = redis.call('GET', KEYS[3])
+if not batch then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('SET', KEYS[3], ARGV[1])
+    batch = ARGV[1]
+end
+local result = redis.call('HGETALL', KEYS[2])
+table.insert(result, 1, batch)
+return result
+"""
+
+# KEYS: flushing, flushing batch, flushed  ARGV: batch id
+DONE_SCRIPT = """
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    redis.call('INCR', KEYS[3])
+    return 1
+end
+return 0
+"""
+
+class StockLedger:
+    """Redis mirror of campaign product stock for hot live sales.
+
+    Reservations run through one Lua script that checks stock and the buyer's
+    max_order_quantity and decrements atomically, so buyers of the same product
+    never queue on the campaigns_products row. Reserved quantities accumulate in
+    stock:pending and a background reconciler writes them behind to Postgres,
+    one UPDATE per product per flush. Each flush is recorded in
+    stock_ledger_flushes (migration 000020) so a flush interrupted after commit
+    is not applied twice. After flushing, the reconciler re-reads the database
+    stock so restocks made elsewhere reach the ledger.
+
+    The comment and inbox workers each run a ledger over the same keys. Every
+    finished flush bumps stock:flushed, and a load or sync only writes a
+    database quantity when no flush finished since it was read; otherwise the
+    quantity could miss a flush that is no longer in stock:flushing and
+    overstate what is available. A skipped sync is retried on the next
+    reconcile.
+    """
+
+    def __init__(self, redis: Redis, database: Database, flush_interval: float = 1.0):
+        self.redis = redis
+        self.database = database
+        self.flush_interval = flush_interval
+        self.is_running = False
+        self.reconciler_thread = None
+        self._stopped = threading.Event()
+        self._reserve = None
+        self._release = None
+        self._load = None
+        self._sync = None
+        self._take = None
+        self._done = None
+
+    def start(self):
+        """Register the scripts and start the write-behind reconciler."""
+        self.redis.connect()
+        client = self.redis.client
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self._load = client.register_script(LOAD_SCRIPT)
+        self._sync = client.register_script(SYNC_SCRIPT)
+        self._take = client.register_script(TAKE_SCRIPT)
+        self._done = client.register_script(DONE_SCRIPT)
+
+        self.is_running = True
+        self._stopped.clear()
+        self.reconciler_thread = threading.Thread(target=self._reconcile, name="StockLedgerReconciler")
+        self.reconciler_thread.daemon = True
+        self.reconciler_thread.start()
+
+        log_message("StockLedger", "info", f"Stock ledger started, flushing every {self.flush_interval}s")
+
+    def stop(self):
+        """Flush what is left, then close both connections."""
+        self.is_running = False
+        self._stopped.set()
+
+        if self.reconciler_thread and self.reconciler_thread.is_alive():
+            self.reconciler_thread.join(timeout=self.flush_interval + 5)
+
+        try:
+            self.flush()
+        except Exception as e:
+            log_message("StockLedger", "error", f"Final stock flush failed: {e}")
+
+        self.database.close()
+        self.redis.close()
+        log_message("StockLedger", "info", "Stock ledger stopped")
+
+    def reserve(self, database: Database, campaign_product_id: str, profile_id: str, quantity: int, max_quantity: int) -> Tuple[Optional[str], Optional[Exception]]:
+        """Reserve stock for a buyer, loading the product from database on first use."""
+        try:
+            keys = [_available_key(campaign_product_id), _ordered_key(campaign_product_id), PENDING_KEY]
+            args = [str(profile_id), quantity, max_quantity, str(campaign_product_id)]
+
+            result = self._reserve(keys=keys, args=args)
+            if result == -2:
+                self._load_product(database, campaign_product_id)
+                result = self._reserve(keys=keys, args=args)
+
+            if result == 1:
+                return ORDER_PLACED, None
+            if result == -1:
+                return ORDER_EXCEEDS_MAX_QUANTITY, None
+            if result == 0:
+                return ORDER_OUT_OF_STOCK, None
+            return None, Exception(f"Campaign product {campaign_product_id} could not be loaded into the stock ledger")
+
+        except Exception as e:
+            log_message("StockLedger", "error", f"Error reserving stock for campaign_product_id={campaign_product_id}: {e}")
+            return None, e
+
+    def release(self, campaign_product_id: str, profile_id: str, quantity: int) -> Optional[Exception]:
+        """Give back a reservation whose order could not be written."""
+        try:
+            self._release(
+                keys=[_available_key(campaign_product_id), _ordered_key(campaign_product_id), PENDING_KEY],
+                args=[str(profile_id), quantity, str(campaign_product_id)]
+            )
+            return None
+        except Exception as e:
+            log_message("StockLedger", "error", f"Error releasing stock for campaign_product_id={campaign_product_id}: {e}")
+            return e
+
+    def flush(self) -> int:
+        """Write reserved quantities behind to campaigns_products; returns the products updated."""
+        taken = self._take(keys=[PENDING_KEY, FLUSHING_KEY, FLUSHING_BATCH_KEY], args=[str(uuid.uuid4())])
+        if not taken:
+            return 0
+
+        batch_id = taken[0]
+        deltas = [(taken[i], int(taken[i + 1])) for i in range(1, len(taken), 2) if int(taken[i + 1]) != 0]
+
+        if deltas:
+            query = """
+                WITH deltas (batch_id, id, quantity) AS (
+                    VALUES %s
+                ), batch AS (
+                    INSERT INTO stock_ledger_flushes (batch_id, products)
+                    SELECT batch_id, COUNT(*) FROM deltas GROUP BY batch_id
+                    ON CONFLICT (batch_id) DO NOTHING
+                    RETURNING batch_id
+                )
+                UPDATE campaigns_products cp
+                SET quantity = cp.quantity - deltas.quantity, updated_at = CURRENT_TIMESTAMP
+                FROM deltas
+                JOIN batch ON batch.batch_id = deltas.batch_id
+                WHERE cp.id = deltas.id::uuid
+            """
+            self.database.execute_values(query, [(batch_id, campaign_product_id, quantity) for campaign_product_id, quantity in deltas])
+
+        self._done(keys=[FLUSHING_KEY, FLUSHING_BATCH_KEY, FLUSHED_KEY], args=[batch_id])
+        log_message("StockLedger", "debug", f"Flushed stock batch {batch_id} for {len(deltas)} products")
+        return len(deltas)
+
+    def sync(self) -> int:
+        """Refresh every loaded product from the database stock; returns the products synced."""
+        campaign_product_ids = list(self.redis.client.smembers(PRODUCTS_KEY))
+        if not campaign_product_ids:
+            return 0
+
+        flushed = self.redis.client.get(FLUSHED_KEY) or "0"
+        found = self.database.execute_query(
+            "SELECT id::text AS id, quantity FROM campaigns_products WHERE id::text = ANY(%s) AND status = 'active'",
+            (campaign_product_ids,)
+        )
+        self.database.commit_transaction()
+        quantities: Dict[str, int] = {row["id"]: row["quantity"] for row in found}
+
+        synced = 0
+        for campaign_product_id in campaign_product_ids:
+            if campaign_product_id not in quantities:
+                self.redis.client.delete(_available_key(campaign_product_id), _ordered_key(campaign_product_id))
+                self.redis.client.srem(PRODUCTS_KEY, campaign_product_id)
+                continue
+
+            result = self._sync(
+                keys=[_available_key(campaign_product_id), PENDING_KEY, FLUSHING_KEY, FLUSHED_KEY],
+                args=[campaign_product_id, quantities[campaign_product_id], flushed]
+            )
+            if result == -1:
+                log_message("StockLedger", "debug", "A stock flush finished during sync, skipping until the next one")
+                break
+            synced += result
+
+        return synced
+
+    def _load_product(self, database: Database, campaign_product_id: str):
+        for _ in range(LOAD_ATTEMPTS):
+            if self._try_load_product(database, campaign_product_id) != -1:
+                return
+
+    def _try_load_product(self, database: Database, campaign_product_id: str) -> int:
+        flushed = self.redis.client.get(FLUSHED_KEY) or "0"
+        found = database.execute_query(
+            "SELECT quantity FROM campaigns_products WHERE id = %s AND status = 'active'",
+            (campaign_product_id,)
+        )
+        ordered = database.execute_query(
+            """
+            SELECT profile_id::text AS profile_id, SUM(quantity) AS quantity
+            FROM orders_products
+            WHERE campaign_product_id = %s
+            GROUP BY profile_id
+            """,
+            (campaign_product_id,)
+        )
+        database.commit_transaction()
+
+        if not found:
+            return 0
+
+        args = [str(campaign_product_id), found[0]["quantity"], flushed]
+        for row in ordered:
+            args.extend([row["profile_id"], int(row["quantity"])])
+
+        return self._load(
+            keys=[_available_key(campaign_product_id), _ordered_key(campaign_product_id), PENDING_KEY, FLUSHING_KEY, PRODUCTS_KEY, FLUSHED_KEY],
+            args=args
+        )
+
+    def _reconcile(self):
+        """Flush and resync every flush_interval seconds until stopped."""
+        while self.is_running:
+            try:
+                self.flush()
+                self.sync()
+            except Exception as e:
+                log_message("StockLedger", "error", f"Stock reconcile failed: {e}")
+                self.database.rollback_transaction()
+
+            self._stopped.wait(self.flush_interval)
+
+
+def _available_key(campaign_product_id: str) -> str:
+    return f"stock:{campaign_product_id}:available"
+
+
+def _ordered_key(campaign_product_id: str) -> str:
+    return f"stock:{campaign_product_id}:ordered"
@@ -0,0 +1,79 @@
+from .cache import LRUCache
+from .logging import log_message
+from .redis import Redis
+from typing import Any, Dict, Iterable, List, Optional
+
+import threading
+
+class SeenFilter:
+    """Remembers ids seen in the last ttl seconds so duplicates are dropped early.
+
+    Lookups go to an in-process LRU first. When a Redis connection is given,
+    every id is also kept as its own key with the same TTL, so all replicas
+    share what they have seen. Redis errors fall back to the local cache.
+    """
+
+    def __init__(self, namespace: str, max_size: int = 100000, ttl: int = 3600, redis: Optional[Redis] = None):
+        self.namespace = namespace
+        self.ttl = int(ttl)
+        self.redis = redis
+        self.checked = 0
+        self.duplicates = 0
+        self._seen = LRUCache(max_size, ttl)
+        self._lock = threading.Lock()
+
+    def unseen(self, ids: Iterable[str]) -> List[str]:
+        """Return the ids not seen before, in order and without repeats."""
+        ids = list(ids)
+        found = self._seen.get_many(ids)
+        candidates = list(dict.fromkeys(id for id in ids if id not in found))
+
+        if candidates and self.redis is not None and self.redis.client is not None:
+            try:
+                pipeline = self.redis.client.pipeline(transaction=False)
+                for id in candidates:
+                    pipeline.exists(self._key(id))
+                remote = {id for id, exists in zip(candidates, pipeline.execute()) if exists}
+                if remote:
+                    self._seen.set_many({id: True for id in remote})
+                    candidates = [id for id in candidates if id not in remote]
+            except Exception as e:
+                log_message("SeenFilter", "warning", f"Redis lookup failed for {self.namespace}, using local cache only: {e}")
+
+        with self._lock:
+            self.checked += len(ids)
+            self.duplicates += len(ids) - len(candidates)
+
+        return candidates
+
+    def mark(self, ids: Iterable[str]):
+        """Record ids as seen."""
+        ids = [id for id in ids if id]
+        if not ids:
+            return
+
+        self._seen.set_many({id: True for id in ids})
+
+        if self.redis is not None and self.redis.client is not None:
+            try:
+                pipeline = self.redis.client.pipeline(transaction=False)
+                for id in ids:
+                    pipeline.set(self._key(id), 1, ex=self.ttl)
+                pipeline.execute()
+            except Exception as e:
+                log_message("SeenFilter", "warning", f"Redis write failed for {self.namespace}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checked, duplicates = self.checked, self.duplicates
+
+        return {
+            "checked": checked,
+            "duplicates": duplicates,
+            "dedupe_ratio": round(duplicates / checked, 4) if checked else 0.0,
+            "redis_enabled": self.redis is not None,
+            "local": self._seen.stats(),
+        }
+
+    def _key(self, id: str) -> str:
+        return f"seen:{self.namespace}:{id}"
@@ -0,0 +1,131 @@
+from .logging import log_message
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import re
+import unicodedata
+
+# "A1 x3", "A1x3", "A1 * 3", "A1×3"; Thai may follow without a space ("A1x2ค่ะ")
+QUANTITY_PATTERN = re.compile(r"\s*[x×*]\s*(\d{1,4})(?![^\W_\u0e00-\u0e7f])", re.IGNORECASE)
+# Anything that starts like a quantity; when QUANTITY_PATTERN does not take all
+# of it ("A1 x 10000", "A1 x3x4") the keyword is rejected rather than ordered once
+QUANTITY_START = re.compile(r"\s*[x×*]\s*\d", re.IGNORECASE)
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over campaign keywords.
+
+    find() scans a message once and returns every keyword that stands on its
+    own (not inside a longer word) together with the quantity written after it,
+    e.g. "CF A1 x3 + B2" -> [(a1, 3), (b2, 1)]. Overlapping hits resolve to the
+    leftmost, then longest keyword, and repeated keywords add up. A keyword
+    followed by a quantity that cannot be read is not matched at all.
+
+    Thai is written without spaces between words, so Thai letters count as
+    word boundaries: "เอาเสื้อแดงค่ะ" matches the keyword เสื้อแดง. The catch is
+    that a Thai keyword also matches inside a longer Thai word that contains
+    it; only combining vowels and tone marks are kept attached to their letter.
+    """
+
+    def __init__(self, keywords: Dict[str, Any]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[str]] = [None]
+        self.dict_suffix: List[int] = [0]
+        self.payloads: Dict[str, Any] = {}
+
+        for keyword, payload in keywords.items():
+            keyword = keyword.strip().lower()
+            if keyword:
+                self._add(keyword)
+                self.payloads[keyword] = payload
+
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def find(self, text: str) -> List[Tuple[Any, int]]:
+        """Return (payload, quantity) for every standalone keyword in text."""
+        if not self.payloads:
+            return []
+
+        text = text.lower()
+        candidates = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+
+            match = node if self.output[node] is not None else self.dict_suffix[node]
+            while match:
+                keyword = self.output[match]
+                start, end = index - len(keyword) + 1, index + 1
+                if self._is_standalone(text, start, end):
+                    candidates.append((start, end, keyword))
+                match = self.dict_suffix[match]
+
+        quantities: Dict[str, int] = {}
+        last_end = 0
+        for start, end, keyword in sorted(candidates, key=lambda c: (c[0], c[0] - c[1])):
+            if start < last_end:
+                continue
+
+            quantity_match = QUANTITY_PATTERN.match(text, end)
+            if quantity_match is None and QUANTITY_START.match(text, end):
+                log_message("KeywordMatcher", "warning", f"Ignoring keyword {keyword} with an unreadable quantity: {text[start:end + 12]!r}")
+                last_end = end
+                continue
+            quantity = int(quantity_match.group(1)) if quantity_match else 1
+            last_end = quantity_match.end() if quantity_match else end
+
+            if quantity > 0:
+                quantities[keyword] = quantities.get(keyword, 0) + quantity
+
+        return [(self.payloads[keyword], quantity) for keyword, quantity in quantities.items()]
+
+    def _add(self, keyword: str):
+        node = 0
+        for char in keyword:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.dict_suffix.append(0)
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.output[node] = keyword
+
+    def _build(self):
+        """Compute failure links and dictionary-suffix links breadth first."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                if node:
+                    fallback = self.fail[node]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(char, 0)
+
+                target = self.fail[child]
+                self.dict_suffix[child] = target if self.output[target] is not None else self.dict_suffix[target]
+                queue.append(child)
+
+    @staticmethod
+    def _is_standalone(text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end]):
+            return QUANTITY_START.match(text, end) is not None
+        return True
+
+
+def _is_word_char(char: str) -> bool:
+    """Whether char continues the word next to it. Thai letters do not, since Thai
+    has no spaces between words, but combining vowels and tone marks always do."""
+    if unicodedata.category(char) == "Mn":
+        return True
+    if "\u0e00" <= char <= "\u0e7f":
+        return False
+    return char.isalnum()
@@ -13,6 +13,7 @@ class Queue:
         self.reconnect_delay = reconnect_delay
         self.consumer_active = True
         self.publisher_active = False
+        self.closed = False
 
     def connect(self):
         """Establishes a connection to RabbitMQ with retries."""
@@ -71,13 +72,15 @@ class Queue:
             time.sleep(self.reconnect_delay)
             self.connect()
 
-    def consume(self, queue_name, log, callback):
+    def consume(self, queue_name, log, callback, prefetch_count=None):
         """Consumes messages with auto-reconnection and control over consumer activity."""
-        while True:
+        while not self.closed:
             try:
                 if self.consumer_active:
                     self.ensure_connection()
                     self.channel.queue_declare(queue=queue_name, durable=True)
+                    if prefetch_count:
+                        self.channel.basic_qos(prefetch_count=prefetch_count)
 
                     log_message("Queue", "info", f"Consuming messages from {queue_name}")
 
@@ -98,12 +101,88 @@ class Queue:
                     time.sleep(1)
 
             except (pika.exceptions.AMQPConnectionError, pika.exceptions.ChannelClosed, Exception) as e:
+                if self.closed:
+                    break
                 log_message("Queue", "error", f"Consumer error: {e}. Reconnecting in {self.reconnect_delay} seconds...")
                 time.sleep(self.reconnect_delay)
                 self.connect()
 
+    def consume_batch(self, queue_name, log, callback, batch_size=50, batch_timeout=1.0, prefetch_count=100):
+        """Consumes messages in micro-batches collected by size or time window.
+
+        The callback receives a list of decoded messages and returns a list of the
+        same length holding None for success or an Exception for failure. Failed
+        messages are nacked one by one and the rest are acked with multiple=True.
+        """
+        while not self.closed:
+            try:
+                if self.consumer_active:
+                    self.ensure_connection()
+                    self.channel.queue_declare(queue=queue_name, durable=True)
+                    self.channel.basic_qos(prefetch_count=max(prefetch_count, batch_size))
+
+                    log_message("Queue", "info", f"Consuming messages from {queue_name} in batches of {batch_size}")
+
+                    batch = []
+                    deadline = None
+                    for method, properties, body in self.channel.consume(queue=queue_name, auto_ack=False, inactivity_timeout=batch_timeout):
+                        if method is not None:
+                            batch.append((method.delivery_tag, body))
+                            if deadline is None:
+                                deadline = time.monotonic() + batch_timeout
+
+                        if batch and (method is None or len(batch) >= batch_size or time.monotonic() >= deadline):
+                            log()
+                            self._process_batch(batch, callback)
+                            batch = []
+                            deadline = None
+                else:
+                    log_message("Queue", "debug", "Consumer is paused, skipping consumption.")
+                    time.sleep(1)
+
+            except (pika.exceptions.AMQPConnectionError, pika.exceptions.ChannelClosed, Exception) as e:
+                if self.closed:
+                    break
+                log_message("Queue", "error", f"Consumer error: {e}. Reconnecting in {self.reconnect_delay} seconds...")
+                time.sleep(self.reconnect_delay)
+                self.connect()
+
+    def _process_batch(self, batch, callback):
+        """Runs the batch callback and settles every delivery tag of the batch."""
+        failed_tags = []
+        messages = []
+        message_tags = []
+        for delivery_tag, body in batch:
+            try:
+                messages.append(json.loads(body))
+                message_tags.append(delivery_tag)
+            except Exception as e:
+                log_message("Queue", "error", f"Message decoding error: {e}")
+                failed_tags.append(delivery_tag)
+
+        if messages:
+            try:
+                errors = callback(messages)
+            except Exception as e:
+                log_message("Queue", "error", f"Batch processing error: {e}")
+                errors = [e] * len(messages)
+
+            for delivery_tag, error in zip(message_tags, errors):
+                if error:
+                    failed_tags.append(delivery_tag)
+
+        for delivery_tag in failed_tags:
+            self.channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+
+        acked_tags = [delivery_tag for delivery_tag, _ in batch if delivery_tag not in failed_tags]
+        if acked_tags:
+            self.channel.basic_ack(delivery_tag=max(acked_tags), multiple=True)
+
+        log_message("Queue", "debug", f"Batch settled: {len(acked_tags)} acked, {len(failed_tags)} nacked")
+
     def close(self):
         """Closes the RabbitMQ connection gracefully."""
+        self.closed = True
         if self.connection and not self.connection.is_closed:
             self.connection.close()
             log_message("Queue", "debug", "RabbitMQ connection closed.")
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""Measure messages/sec of the pooled QueueConsumer as concurrency grows.
+
+Requires a running RabbitMQ (and PostgreSQL for --mode db) configured through the
+usual QUEUE_* / DATABASE_* environment variables. Each round publishes the
+messages to its own throwaway queue so consumers from earlier rounds never
+compete for them.
+
+    poetry run python scripts/benchmark_consumer.py --messages 2000 --concurrency 1,2,4,8
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pika
+
+from app.core.config import settings
+from app.services.queue_consumer import QueueConsumer
+
+
+class SimulatedProcessor:
+    """Stands in for FacebookCommentProcessor with a fixed per-message latency."""
+
+    def __init__(self, database, mode: str, latency: float, counter: "Counter"):
+        self.database = database
+        self.mode = mode
+        self.latency = latency
+        self.counter = counter
+
+    def process_facebook_comment(self, message):
+        if self.mode == "db":
+            self.database.execute_query("SELECT pg_sleep(%s)", (self.latency,))
+        else:
+            time.sleep(self.latency)
+        self.counter.increment()
+        return None
+
+    def process_facebook_comments(self, messages):
+        return [self.process_facebook_comment(message) for message in messages]
+
+
+class Counter:
+    def __init__(self, target: int):
+        self.target = target
+        self.value = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def increment(self):
+        with self.lock:
+            self.value += 1
+            if self.value >= self.target:
+                self.done.set()
+
+
+class BenchmarkConsumer(QueueConsumer):
+    def __init__(self, concurrency: int, mode: str, latency: float, counter: Counter):
+        super().__init__(concurrency=concurrency)
+        self.mode = mode
+        self.latency = latency
+        self.counter = counter
+
+    def _create_processor(self):
+        database = self.database_pool.get_database() if self.mode == "db" else _NullDatabase()
+        return SimulatedProcessor(database, self.mode, self.latency, self.counter)
+
+
+class _NullDatabase:
+    def close(self):
+        pass
+
+
+def publish_messages(queue_name: str, count: int):
+    connection = pika.BlockingConnection(
+        pika.ConnectionParameters(
+            host=settings.QUEUE_HOST,
+            credentials=pika.PlainCredentials(settings.QUEUE_USER, settings.QUEUE_PASS),
+        )
+    )
+    channel = connection.channel()
+    channel.queue_declare(queue=queue_name, durable=True)
+    for index in range(count):
+        message = {
+            "id": f"benchmark_{index}",
+            "message": "CF A1",
+            "created_time": "2025-07-12T06:36:02+0000",
+            "from_name": "Benchmark",
+            "from_id": f"benchmark_profile_{index % 50}",
+            "post_id": "benchmark_post",
+            "type": "text",
+        }
+        channel.basic_publish(exchange="", routing_key=queue_name, body=json.dumps(message))
+    connection.close()
+
+
+def delete_queue(queue_name: str):
+    connection = pika.BlockingConnection(
+        pika.ConnectionParameters(
+            host=settings.QUEUE_HOST,
+            credentials=pika.PlainCredentials(settings.QUEUE_USER, settings.QUEUE_PASS),
+        )
+    )
+    connection.channel().queue_delete(queue=queue_name)
+    connection.close()
+
+
+def run_round(concurrency: int, messages: int, mode: str, latency: float) -> float:
+    queue_name = f"benchmark_consumer_{mode}_{concurrency}_{int(time.time())}"
+    publish_messages(queue_name, messages)
+
+    settings.QUEUE_NAME = queue_name
+    counter = Counter(messages)
+    consumer = BenchmarkConsumer(concurrency, mode, latency, counter)
+
+    started_at = time.perf_counter()
+    consumer.start()
+    counter.done.wait()
+    elapsed = time.perf_counter() - started_at
+
+    consumer.stop()
+    delete_queue(queue_name)
+    return messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--mode", choices=["sleep", "db"], default="sleep",
+                        help="sleep: simulated I/O in Python, db: pg_sleep through a pooled connection")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.mode == "sleep":
+        # No connection is ever borrowed, so don't open any up front
+        settings.DATABASE_POOL_MIN_CONNECTIONS = 0
+        settings.KEYWORD_INDEX_ENABLED = False
+        settings.OUTBOX_DISPATCHER_ENABLED = False
+
+    latency = args.latency_ms / 1000
+    baseline = None
+    print(f"{'N':>4} {'msg/s':>10} {'speedup':>8}")
+    for concurrency in [int(n) for n in args.concurrency.split(",")]:
+        rate = run_round(concurrency, args.messages, args.mode, latency)
+        baseline = baseline or rate
+        print(f"{concurrency:>4} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare KeywordMatcher against a per-keyword scan of each comment.
+
+Runs entirely in memory, no database or queue needed.
+
+    poetry run python scripts/benchmark_keyword_matcher.py --keywords 10000 --messages 5000
+"""
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.utils.keyword_matcher import KeywordMatcher
+
+FILLER = ["cf", "สนใจ", "ค่ะ", "ครับ", "รับ", "เอา", "please", "ราคาเท่าไหร่", "ส่งฟรีไหม", "+", ","]
+
+
+def make_keywords(count: int):
+    keywords = set()
+    while len(keywords) < count:
+        prefix = "".join(random.choices(string.ascii_lowercase, k=random.randint(1, 2)))
+        keywords.add(f"{prefix}{random.randint(1, 999)}")
+    return sorted(keywords)
+
+
+def make_messages(keywords, count: int):
+    messages = []
+    for _ in range(count):
+        words = random.choices(FILLER, k=random.randint(1, 6))
+        for _ in range(random.randint(0, 3)):
+            keyword = random.choice(keywords).upper()
+            words.insert(random.randint(0, len(words)), keyword + random.choice(["", " x2", "*3"]))
+        messages.append(" ".join(words))
+    return messages
+
+
+def naive_find(patterns, message: str):
+    """What matching every keyword one by one would cost."""
+    text = message.lower()
+    return [keyword for keyword, pattern in patterns if pattern.search(text)]
+
+
+def measure(function, messages) -> float:
+    started_at = time.perf_counter()
+    for message in messages:
+        function(message)
+    return (time.perf_counter() - started_at) / len(messages) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--naive-messages", type=int, default=200, help="the naive scan is slow, so time it on fewer messages")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    keywords = make_keywords(args.keywords)
+    messages = make_messages(keywords, args.messages)
+
+    started_at = time.perf_counter()
+    matcher = KeywordMatcher({keyword: keyword for keyword in keywords})
+    build_ms = (time.perf_counter() - started_at) * 1000
+
+    automaton_us = measure(matcher.find, messages)
+    patterns = [(keyword, re.compile(rf"(?<!\w){re.escape(keyword)}(?!\w)")) for keyword in keywords]
+    naive_us = measure(lambda message: naive_find(patterns, message), messages[:args.naive_messages])
+
+    print(f"keywords:          {len(keywords)}")
+    print(f"automaton build:   {build_ms:.1f} ms")
+    print(f"automaton match:   {automaton_us:.1f} us/message")
+    print(f"per-keyword scan:  {naive_us:.1f} us/message")
+    print(f"speedup:           {naive_us / automaton_us:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
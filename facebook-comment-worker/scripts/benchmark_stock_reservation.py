@@ -0,0 +1,138 @@
+"""Compare stock reservation under contention: Postgres row lock vs the Redis stock ledger.
+
+Every buyer tries to reserve one unit of the same SKU at once. The postgres
+mode does what place_order() does to the hot row (lock, check, decrement and
+write an order line in one transaction) on a scratch table; the redis mode runs
+the ledger's reserve script. Both check that exactly min(buyers, stock) units
+were sold. Requires PostgreSQL and Redis configured through the usual
+DATABASE_* / REDIS_* environment variables.
+
+    poetry run python scripts/benchmark_stock_reservation.py --buyers 1000 --stock 500 --concurrency 100
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from psycopg2 import pool
+
+from app.core.config import settings
+from app.services.stock_ledger import RESERVE_SCRIPT
+from app.utils.redis import Redis
+
+
+def run_buyers(reserve, buyers: int, concurrency: int):
+    barrier = threading.Barrier(min(buyers, concurrency))
+    latencies = []
+
+    def buyer(index: int):
+        if index < concurrency:
+            barrier.wait()
+        started_at = time.perf_counter()
+        placed = reserve(index)
+        latencies.append(time.perf_counter() - started_at)
+        return placed
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sold = sum(executor.map(buyer, range(buyers)))
+    return sold, time.perf_counter() - started_at, latencies
+
+
+def benchmark_postgres(buyers: int, stock: int, concurrency: int):
+    connections = pool.ThreadedConnectionPool(
+        1, concurrency,
+        host=settings.DATABASE_HOST,
+        port=settings.DATABASE_PORT,
+        user=settings.DATABASE_USER,
+        password=settings.DATABASE_PASSWORD,
+        database=settings.DATABASE_NAME,
+        sslmode=settings.DATABASE_SSLMODE,
+    )
+    sku = str(uuid.uuid4())
+
+    connection = connections.getconn()
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE IF NOT EXISTS benchmark_stock (id TEXT PRIMARY KEY, quantity INT NOT NULL)")
+        cursor.execute("CREATE TABLE IF NOT EXISTS benchmark_stock_orders (id SERIAL PRIMARY KEY, stock_id TEXT NOT NULL, profile_id TEXT NOT NULL, quantity INT NOT NULL)")
+        cursor.execute("INSERT INTO benchmark_stock (id, quantity) VALUES (%s, %s)", (sku, stock))
+    connection.commit()
+    connections.putconn(connection)
+
+    def reserve(index: int) -> bool:
+        connection = connections.getconn()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT quantity FROM benchmark_stock WHERE id = %s FOR UPDATE", (sku,))
+                if cursor.fetchone()[0] < 1:
+                    connection.rollback()
+                    return False
+                cursor.execute("UPDATE benchmark_stock SET quantity = quantity - 1 WHERE id = %s", (sku,))
+                cursor.execute("INSERT INTO benchmark_stock_orders (stock_id, profile_id, quantity) VALUES (%s, %s, 1)", (sku, f"buyer_{index}"))
+            connection.commit()
+            return True
+        finally:
+            connections.putconn(connection)
+
+    try:
+        return run_buyers(reserve, buyers, concurrency)
+    finally:
+        connection = connections.getconn()
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM benchmark_stock_orders WHERE stock_id = %s", (sku,))
+            cursor.execute("DELETE FROM benchmark_stock WHERE id = %s", (sku,))
+        connection.commit()
+        connections.putconn(connection)
+        connections.closeall()
+
+
+def benchmark_redis(buyers: int, stock: int, concurrency: int):
+    redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB, password=settings.REDIS_PASSWORD)
+    redis.connect()
+    reserve_script = redis.client.register_script(RESERVE_SCRIPT)
+
+    sku = f"benchmark:{uuid.uuid4()}"
+    keys = [f"stock:{sku}:available", f"stock:{sku}:ordered", f"stock:{sku}:pending"]
+    redis.client.set(keys[0], stock)
+
+    def reserve(index: int) -> bool:
+        return reserve_script(keys=keys, args=[f"buyer_{index}", 1, 1, sku]) == 1
+
+    try:
+        return run_buyers(reserve, buyers, concurrency)
+    finally:
+        redis.client.delete(*keys)
+        redis.close()
+
+
+def report(name: str, buyers: int, stock: int, sold: int, elapsed: float, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    status = "ok" if sold == min(buyers, stock) else "OVERSOLD" if sold > stock else "UNDERSOLD"
+    print(f"{name:<9} {buyers / elapsed:>10.0f} {statistics.median(latencies) * 1000:>9.2f} {p99 * 1000:>9.2f} {sold:>6} {status:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--mode", choices=["postgres", "redis", "both"], default="both")
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'buyers/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'sold':>6} {'check':>9}")
+    if args.mode in ("postgres", "both"):
+        report("postgres", args.buyers, args.stock, *benchmark_postgres(args.buyers, args.stock, args.concurrency))
+    if args.mode in ("redis", "both"):
+        report("redis", args.buyers, args.stock, *benchmark_redis(args.buyers, args.stock, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     DATABASE_TIMEOUT: int = os.getenv("DATABASE_TIMEOUT", 30)
     DATABASE_SSLMODE: str = os.getenv("DATABASE_SSLMODE", "disable")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "postgres")
+    DATABASE_POOL_MIN_CONNECTIONS: int = os.getenv("DATABASE_POOL_MIN_CONNECTIONS", 1)
+    DATABASE_POOL_MAX_CONNECTIONS: int = os.getenv("DATABASE_POOL_MAX_CONNECTIONS", 10)
 
     # Queue
     QUEUE_HOST: str = os.getenv("QUEUE_HOST", "localhost")
@@ -33,6 +35,35 @@ class Settings(BaseSettings):
     QUEUE_USER: str = os.getenv("QUEUE_USER", "guest")
     QUEUE_PASS: str = os.getenv("QUEUE_PASS", "guest")
     QUEUE_NAME: str = os.getenv("QUEUE_NAME", "facebook_inboxes")
+    QUEUE_CONSUMER_CONCURRENCY: int = os.getenv("QUEUE_CONSUMER_CONCURRENCY", 1)
+    QUEUE_PREFETCH_COUNT: int = os.getenv("QUEUE_PREFETCH_COUNT", 10)
+
+    # Keyword Index
+    KEYWORD_INDEX_ENABLED: bool = os.getenv("KEYWORD_INDEX_ENABLED", "True") == "True"
+    KEYWORD_INDEX_TTL: int = os.getenv("KEYWORD_INDEX_TTL", 60)
+
+    # ID Caches
+    PROFILE_CACHE_SIZE: int = os.getenv("PROFILE_CACHE_SIZE", 10000)
+    PROFILE_CACHE_TTL: int = os.getenv("PROFILE_CACHE_TTL", 3600)
+
+    # Redis
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = os.getenv("REDIS_PORT", 6379)
+    REDIS_DB: int = os.getenv("REDIS_DB", 0)
+    REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+
+    # Stock Ledger
+    STOCK_LEDGER_ENABLED: bool = os.getenv("STOCK_LEDGER_ENABLED", "False") == "True"
+    STOCK_LEDGER_FLUSH_INTERVAL: float = os.getenv("STOCK_LEDGER_FLUSH_INTERVAL", 1.0)
+
+    # Outbox Dispatcher
+    OUTBOX_DISPATCHER_ENABLED: bool = os.getenv("OUTBOX_DISPATCHER_ENABLED", "True") == "True"
+    OUTBOX_BATCH_SIZE: int = os.getenv("OUTBOX_BATCH_SIZE", 50)
+    OUTBOX_CONCURRENCY: int = os.getenv("OUTBOX_CONCURRENCY", 10)
+    OUTBOX_POLL_INTERVAL: float = os.getenv("OUTBOX_POLL_INTERVAL", 1.0)
+    OUTBOX_MAX_ATTEMPTS: int = os.getenv("OUTBOX_MAX_ATTEMPTS", 5)
+    OUTBOX_RETRY_DELAY: float = os.getenv("OUTBOX_RETRY_DELAY", 2.0)
+    OUTBOX_REQUEST_TIMEOUT: float = os.getenv("OUTBOX_REQUEST_TIMEOUT", 10.0)
 
     # Web
     WEB_HOST: str = os.getenv("WEB_HOST", "localhost")
@@ -78,4 +78,11 @@ def stop_queue_consumer():
     if queue_consumer and queue_consumer.is_running:
         queue_consumer.stop()
         return JSONResponse(content={"message": "Queue consumer stopped"}, status_code=200)
-    return JSONResponse(content={"message": "Queue consumer not running"}, status_code=400)
\ No newline at end of file
+    return JSONResponse(content={"message": "Queue consumer not running"}, status_code=400)
+
+@app.get("/cache/stats")
+def cache_stats():
+    global queue_consumer
+    if queue_consumer:
+        return JSONResponse(content=queue_consumer.cache_stats(), status_code=200)
+    return JSONResponse(content={"message": "Queue consumer not initialized"}, status_code=400)
@@ -0,0 +1,172 @@
+from app.utils.database import Database
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.logging import log_message
+from dataclasses import dataclass, replace
+from typing import Dict, List
+
+import psycopg2
+import psycopg2.extensions
+import select
+import threading
+import time
+
+@dataclass
+class MatchingProduct:
+    keyword: str
+    campaign_product_id: str
+    product_id: str
+    campaign_id: str
+    quantity: int = 1
+    max_quantity: int = 100
+
+
+# Constants
+ACTIVE_STATUS = "active"
+DEFAULT_MAX_QUANTITY = 100
+KEYWORDS_CHANNEL = "campaign_keywords_changed"
+LISTEN_POLL_INTERVAL = 5
+
+class KeywordIndex:
+    """Process-local map of active campaign keywords to MatchingProduct.
+
+    The index is reloaded whenever the campaign_keywords_changed notification
+    fires (see migration 000017) and, as a fallback for missed notifications,
+    whenever it is older than ttl seconds.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, database: str,
+                 sslmode: str = "disable", timeout: int = 30, ttl: int = 60, reconnect_delay: int = 1):
+        self.connection_params = {
+            "host": host,
+            "port": port,
+            "user": user,
+            "password": password,
+            "database": database,
+            "sslmode": sslmode,
+            "connect_timeout": timeout,
+        }
+        self.database = Database(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=database,
+            sslmode=sslmode,
+            timeout=timeout,
+            reconnect_delay=reconnect_delay,
+        )
+        self.ttl = ttl
+        self.reconnect_delay = reconnect_delay
+        self.keywords: Dict[str, MatchingProduct] = {}
+        self.matcher = KeywordMatcher({})
+        self.loaded_at = 0.0
+        self.is_running = False
+        self.listener_thread = None
+        self.listen_connection = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Load the index and start listening for keyword changes."""
+        self.database.connect()
+        self.refresh()
+
+        self.is_running = True
+        self.listener_thread = threading.Thread(target=self._listen, name="KeywordIndexListener")
+        self.listener_thread.daemon = True
+        self.listener_thread.start()
+
+        log_message("KeywordIndex", "info", f"Keyword index started with {len(self.keywords)} active keywords")
+
+    def stop(self):
+        """Stop listening and close both connections."""
+        self.is_running = False
+
+        if self.listener_thread and self.listener_thread.is_alive():
+            self.listener_thread.join(timeout=LISTEN_POLL_INTERVAL + 1)
+
+        self._close_listen_connection()
+        self.database.close()
+
+        log_message("KeywordIndex", "info", "Keyword index stopped")
+
+    def match(self, message: str) -> List[MatchingProduct]:
+        """Return every product whose keyword appears in message, with the quantity asked for."""
+        if self._is_stale():
+            self.refresh(only_if_stale=True)
+        return [replace(product, quantity=quantity) for product, quantity in self.matcher.find(message)]
+
+    def refresh(self, only_if_stale: bool = False):
+        """Reload every active keyword and swap the matcher in one assignment."""
+        query = """
+            WITH active_campaigns AS (
+                SELECT id FROM campaigns WHERE status = %s
+            )
+            SELECT
+                cp.keyword, cp.id, cp.product_id, cp.campaign_id, cp.max_order_quantity as max_quantity
+            FROM campaigns_products cp
+            JOIN active_campaigns ac ON cp.campaign_id = ac.id
+            WHERE cp.quantity > 0 AND cp.status = 'active'
+        """
+        with self._lock:
+            if only_if_stale and not self._is_stale():
+                return
+
+            try:
+                found = self.database.execute_query(query, (ACTIVE_STATUS,))
+                self.database.commit_transaction()
+
+                keywords = {}
+                for row in found:
+                    keywords.setdefault(row["keyword"], MatchingProduct(
+                        keyword=row["keyword"],
+                        campaign_product_id=row["id"],
+                        product_id=row["product_id"],
+                        campaign_id=row["campaign_id"],
+                        quantity=1,
+                        max_quantity=row["max_quantity"] or DEFAULT_MAX_QUANTITY
+                    ))
+
+                self.keywords = keywords
+                self.matcher = KeywordMatcher(keywords)
+                self.loaded_at = time.monotonic()
+                log_message("KeywordIndex", "debug", f"Keyword index reloaded with {len(keywords)} active keywords")
+
+            except Exception as e:
+                log_message("KeywordIndex", "error", f"Error reloading keyword index: {e}")
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > self.ttl
+
+    def _listen(self):
+        """Wait for NOTIFY on a dedicated autocommit connection and reload on each one."""
+        while self.is_running:
+            try:
+                if self.listen_connection is None or self.listen_connection.closed:
+                    self.listen_connection = psycopg2.connect(**self.connection_params)
+                    self.listen_connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                    with self.listen_connection.cursor() as cursor:
+                        cursor.execute(f"LISTEN {KEYWORDS_CHANNEL}")
+
+                    # Changes may have been missed while we were not listening
+                    self.refresh()
+                    log_message("KeywordIndex", "debug", f"Listening on {KEYWORDS_CHANNEL}")
+
+                if select.select([self.listen_connection], [], [], LISTEN_POLL_INTERVAL) == ([], [], []):
+                    if self._is_stale():
+                        self.refresh(only_if_stale=True)
+                    continue
+
+                self.listen_connection.poll()
+                if self.listen_connection.notifies:
+                    self.listen_connection.notifies.clear()
+                    self.refresh()
+
+            except Exception as e:
+                log_message("KeywordIndex", "error", f"Keyword listener error: {e}. Reconnecting in {self.reconnect_delay} seconds...")
+                self._close_listen_connection()
+                time.sleep(self.reconnect_delay)
+
+    def _close_listen_connection(self):
+        if self.listen_connection is not None and not self.listen_connection.closed:
+            self.listen_connection.close()
+        self.listen_connection = None
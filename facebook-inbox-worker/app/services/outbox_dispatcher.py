@@ -0,0 +1,192 @@
+from app.core.config import settings
+from app.utils.database import Database
+from app.utils.logging import log_message
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncio
+import httpx
+import threading
+
+
+# Constants
+TOPIC_ORDER_PLACED = "order_placed"
+TOPIC_FACEBOOK_COMMENT = "facebook_comment"
+TOPIC_FACEBOOK_INBOX = "facebook_inbox"
+ORDER_PLACED = "placed"
+MAX_RETRY_DELAY = 300
+
+class OutboxDispatcher:
+    """Delivers notifications_outbox rows (see migration 000019) over pooled keep-alive connections.
+
+    Each claim only takes the oldest pending row of every recipient and leases it
+    until it is sent or retried, so one recipient never has two notifications in
+    flight and always receives them in the order they were written. Rows that
+    keep failing are retried with exponential backoff and marked failed after
+    max_attempts, which unblocks the rest of that recipient's queue.
+    """
+
+    def __init__(self, database: Database, batch_size: int = 50, concurrency: int = 10, poll_interval: float = 1.0,
+                 max_attempts: int = 5, retry_delay: float = 2.0, request_timeout: float = 10.0):
+        self.database = database
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.request_timeout = request_timeout
+        self.lease_seconds = max(int(request_timeout * 3), 30)
+        self.is_running = False
+        self.dispatcher_thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start delivering in a background thread with its own event loop."""
+        self.is_running = True
+        self._stopped.clear()
+        self.dispatcher_thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="OutboxDispatcher")
+        self.dispatcher_thread.daemon = True
+        self.dispatcher_thread.start()
+
+        log_message("OutboxDispatcher", "info", f"Outbox dispatcher started with concurrency {self.concurrency}")
+
+    def stop(self):
+        """Stop after the batch in flight and close the database connection."""
+        self.is_running = False
+        self._stopped.set()
+
+        if self.dispatcher_thread and self.dispatcher_thread.is_alive():
+            self.dispatcher_thread.join(timeout=self.request_timeout + self.poll_interval + 1)
+
+        self.database.close()
+        log_message("OutboxDispatcher", "info", "Outbox dispatcher stopped")
+
+    async def _run(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with httpx.AsyncClient(limits=limits, timeout=self.request_timeout) as client:
+            while self.is_running:
+                try:
+                    rows = self._claim()
+                    if not rows:
+                        await asyncio.to_thread(self._stopped.wait, self.poll_interval)
+                        continue
+
+                    results = await asyncio.gather(*(self._send(client, semaphore, row) for row in rows))
+                    self._complete(rows, results)
+
+                except Exception as e:
+                    log_message("OutboxDispatcher", "error", f"Error dispatching outbox: {e}")
+                    await asyncio.to_thread(self._stopped.wait, self.poll_interval)
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        """Lease the oldest due notification of up to batch_size recipients."""
+        query = """
+            WITH heads AS (
+                SELECT DISTINCT ON (recipient_id) id, next_attempt_at
+                FROM notifications_outbox
+                WHERE status = 'pending'
+                ORDER BY recipient_id, id
+            ), due AS (
+                SELECT o.id
+                FROM notifications_outbox o
+                JOIN heads h ON h.id = o.id
+                WHERE h.next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY o.id
+                LIMIT %s
+                FOR UPDATE OF o SKIP LOCKED
+            )
+            UPDATE notifications_outbox o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                updated_at = CURRENT_TIMESTAMP
+            FROM due
+            WHERE o.id = due.id
+            RETURNING o.id, o.topic, o.recipient_id, o.payload, o.attempts
+        """
+        rows = self.database.execute_query(query, (self.batch_size, self.lease_seconds))
+        self.database.commit_transaction()
+        return rows
+
+    def _complete(self, rows: List[Dict[str, Any]], errors: List[Optional[Exception]]):
+        sent_ids = [row["id"] for row, error in zip(rows, errors) if error is None]
+        if sent_ids:
+            self.database.execute_command(
+                """
+                UPDATE notifications_outbox
+                SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s)
+                """,
+                (sent_ids,)
+            )
+
+        failed = []
+        for row, error in zip(rows, errors):
+            if error is None:
+                continue
+
+            status = "failed" if row["attempts"] >= self.max_attempts else "pending"
+            delay = min(self.retry_delay * 2 ** (row["attempts"] - 1), MAX_RETRY_DELAY)
+            failed.append((status, str(error)[:1000], delay, row["id"]))
+            log_message("OutboxDispatcher", "error" if status == "failed" else "warning",
+                        f"Notification {row['id']} ({row['topic']}) attempt {row['attempts']} failed: {error}")
+
+        if failed:
+            self.database.execute_many(
+                """
+                UPDATE notifications_outbox
+                SET status = %s, last_error = %s,
+                    next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+                """,
+                failed
+            )
+
+    async def _send(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, row: Dict[str, Any]) -> Optional[Exception]:
+        try:
+            url, payload = build_request(row["topic"], row["recipient_id"], row["payload"])
+            async with semaphore:
+                response = await client.post(url, json=payload, headers={"Content-Type": "application/json"})
+
+            if response.status_code == 200:
+                log_message("OutboxDispatcher", "debug", f"Notification {row['id']} ({row['topic']}) sent to {row['recipient_id']}")
+                return None
+
+            return Exception(f"HTTP {response.status_code}: {response.text}")
+
+        except Exception as e:
+            return e
+
+
+def build_request(topic: str, recipient_id: str, payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Return the URL and JSON body that deliver a notification."""
+    if topic == TOPIC_ORDER_PLACED:
+        if payload.get("result") == ORDER_PLACED:
+            return f"http://{settings.FACEBOOK_PAGE_API_HOST}:{settings.FACEBOOK_PAGE_API_PORT}/api/v1/messengers/send-template-message", {
+                "recipient_id": recipient_id,
+                "template": {
+                    "template_type": "button",
+                    "text": f"ออเดอร์: {payload['order_code']} ของคุณได้รับจองแล้ว",
+                    "buttons": [{ "type": "web_url", "url": f"http://{settings.WEB_HOST}:{settings.WEB_PORT}/orders/{payload['order_id']}", "title": "ดูออเดอร์" }]
+                }
+            }
+
+        return f"http://{settings.FACEBOOK_PAGE_API_HOST}:{settings.FACEBOOK_PAGE_API_PORT}/api/v1/messengers/send-text-message", {
+            "recipient_id": recipient_id,
+            "message": "ไม่สามารถจองสินค้าได้ เนื่องจากสินค้าหมด หรือถึงลิมิตการจอง"
+        }
+
+    if topic == TOPIC_FACEBOOK_COMMENT:
+        return f"http://{settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}/api/v1/webhooks/facebook-comments", {
+            "event": "seeded_event",
+            "id": payload["id"]
+        }
+
+    if topic == TOPIC_FACEBOOK_INBOX:
+        return f"http://{settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}/api/v1/webhooks/facebook-inboxes", {
+            "event": "seeded_event",
+            "id": payload["id"]
+        }
+
+    raise ValueError(f"Unknown outbox topic: {topic}")
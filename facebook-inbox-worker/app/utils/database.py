@@ -3,10 +3,11 @@ import psycopg2.extras
 import time
 from typing import Optional, Dict, Any, List
 from .logging import log_message
+from psycopg2 import pool
 
 class Database:
     def __init__(self, host: str, port: int, user: str, password: str, database: str,
-                 sslmode: str = "disable", timeout: int = 30, reconnect_delay: int = 1):
+                 sslmode: str = "disable", timeout: int = 30, reconnect_delay: int = 1, max_retries: int = 3):
         self.host = host
         self.port = port
         self.user = user
@@ -15,6 +16,7 @@ class Database:
         self.sslmode = sslmode
         self.timeout = timeout
         self.reconnect_delay = reconnect_delay
+        self.max_retries = max_retries
         self.connection = None
         self.cursor = None
 
@@ -104,6 +106,64 @@ class Database:
             self.connect()
             return self.execute_many(command, params_list)
 
+    def execute_values(self, command: str, params_list: List[tuple], template: Optional[str] = None, fetch: bool = False) -> List[Dict[str, Any]]:
+        """Executes a multi-row command in one statement and optionally returns RETURNING rows."""
+        def run():
+            results = psycopg2.extras.execute_values(
+                self.cursor, command, params_list, template=template, page_size=max(len(params_list), 1), fetch=fetch
+            )
+            return [dict(row) for row in results] if fetch else []
+
+        results = self._run_bounded("Bulk command", run)
+        log_message("Database", "debug", f"Bulk command executed successfully. Rows: {len(params_list)}")
+        return results
+
+    def execute_write(self, command: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """Executes a data-changing statement, commits and returns the rows it selects or RETURNs."""
+        def run():
+            self.cursor.execute(command, params)
+            return [dict(row) for row in self.cursor.fetchall()] if self.cursor.description else []
+
+        return self._run_bounded("Write command", run)
+
+    def _run_bounded(self, what: str, run):
+        """Runs and commits run() on the current connection.
+
+        Lost connections are retried on a fresh one, up to max_retries times; any other
+        error (a constraint violation, a bad cast) is rolled back and raised, since
+        running the same statement again would fail the same way.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.ensure_connection()
+                results = run()
+                self.connection.commit()
+                return results
+
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                self._rollback_quietly()
+                attempt += 1
+                if attempt > self.max_retries:
+                    log_message("Database", "error", f"{what} execution failed after {self.max_retries} retries: {e}")
+                    raise
+                log_message("Database", "error", f"{what} execution failed: {e}. Reconnecting (retry {attempt}/{self.max_retries})...")
+                time.sleep(self.reconnect_delay)
+                self.connect()
+
+            except Exception as e:
+                log_message("Database", "error", f"{what} execution failed: {e}. Rolling back.")
+                self._rollback_quietly()
+                raise
+
+    def _rollback_quietly(self):
+        """Rolls back after a failed statement; a connection that is already gone needs no rollback."""
+        try:
+            if self.connection and not self.connection.closed:
+                self.connection.rollback()
+        except psycopg2.Error as e:
+            log_message("Database", "warning", f"Rollback failed: {e}")
+
     def begin_transaction(self):
         """Begins a database transaction."""
         self.ensure_connection()
@@ -135,4 +195,64 @@ class Database:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
-        self.close()
\ No newline at end of file
+        self.close()
+
+class DatabasePool:
+    def __init__(self, minconn, maxconn, **db_params):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn, maxconn, cursor_factory=psycopg2.extras.RealDictCursor, **db_params
+        )
+
+    def get_conn(self):
+        return self.pool.getconn()
+
+    def put_conn(self, conn, close=False):
+        self.pool.putconn(conn, close=close)
+
+    def get_database(self) -> "PooledDatabase":
+        """Borrows a connection from the pool wrapped in the Database interface."""
+        database = PooledDatabase(self)
+        database.connect()
+        return database
+
+    def closeall(self):
+        self.pool.closeall()
+
+class PooledDatabase(Database):
+    """Database bound to a connection borrowed from a DatabasePool."""
+
+    def __init__(self, pool: DatabasePool, reconnect_delay: int = 1, max_retries: int = 3):
+        self.pool = pool
+        self.reconnect_delay = reconnect_delay
+        self.max_retries = max_retries
+        self.connection = None
+        self.cursor = None
+
+    def connect(self):
+        """Borrows a fresh connection from the pool, discarding a broken one."""
+        while True:
+            try:
+                if self.connection is not None:
+                    self.pool.put_conn(self.connection, close=True)
+                    self.connection = None
+
+                self.connection = self.pool.get_conn()
+                self.cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+                log_message("Database", "debug", "Borrowed connection from pool.")
+                return
+            except Exception as e:
+                if self.pool.pool.closed:
+                    raise
+                log_message("Database", "error", f"Borrowing connection failed: {e}. Retrying in {self.reconnect_delay} seconds...")
+                time.sleep(self.reconnect_delay)
+
+    def close(self):
+        """Returns the connection to the pool."""
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
+        if self.connection is not None:
+            self.pool.put_conn(self.connection, close=bool(self.connection.closed))
+            self.connection = None
+            log_message("Database", "debug", "Returned connection to pool.")
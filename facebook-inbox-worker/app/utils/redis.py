@@ -0,0 +1,47 @@
+import redis
+import time
+from typing import Optional
+from .logging import log_message
+
+class Redis:
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None,
+                 timeout: int = 5, reconnect_delay: int = 1):
+        self.host = host
+        self.port = port
+        self.db = db
+        # Only set password if it's not empty
+        self.password = password if password and password.strip() else None
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.client: Optional[redis.Redis] = None
+
+    def connect(self):
+        """Establishes a connection to Redis with retries."""
+        while True:
+            try:
+                log_message("Redis", "debug", "Connecting to Redis...")
+
+                self.client = redis.Redis(
+                    host=self.host,
+                    port=self.port,
+                    db=self.db,
+                    password=self.password,
+                    decode_responses=True,
+                    socket_connect_timeout=self.timeout,
+                    socket_timeout=self.timeout,
+                    retry_on_timeout=True,
+                )
+                self.client.ping()
+
+                log_message("Redis", "debug", "Connected to Redis.")
+                return
+            except Exception as e:
+                log_message("Redis", "error", f"Connection failed: {e}. Retrying in {self.reconnect_delay} seconds...")
+                time.sleep(self.reconnect_delay)
+
+    def close(self):
+        """Closes the Redis connection pool."""
+        if self.client:
+            self.client.close()
+            self.client = None
+            log_message("Redis", "debug", "Redis connection closed.")
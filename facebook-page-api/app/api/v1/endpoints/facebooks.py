@@ -1,4 +1,5 @@
 from app.core.config import get_settings
+from app.utils.http import get_http_client
 from app.schedule.facebook_posts import (
     start_posts_scheduler,
     stop_posts_scheduler,
@@ -79,25 +80,25 @@ async def get_facebook_page_profile(
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+        client = get_http_client(settings)
+        response = await client.get(url, params=params)
+        response.raise_for_status()
 
-            data = response.json()
+        data = response.json()
 
-            if "error" in data:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
-                )
+        if "error" in data:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
+            )
 
-            picture_url = data.get("picture", {}).get("data", {}).get("url") if data.get("picture") else None
+        picture_url = data.get("picture", {}).get("data", {}).get("url") if data.get("picture") else None
 
-            return FacebookPageProfileResponse(
-                id=data.get("id"),
-                name=data.get("name"),
-                picture=picture_url
-            )
+        return FacebookPageProfileResponse(
+            id=data.get("id"),
+            name=data.get("name"),
+            picture=picture_url
+        )
 
     except HTTPException:
         # Re-raise HTTPException (including Facebook API errors) without modification
@@ -142,32 +143,32 @@ async def get_facebook_page_posts(
         params["after"] = next_token
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if "error" in data:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
-                )
-
-            posts = []
-            for post in data.get("data", []):
-                posts.append(FacebookPostResponse(
-                    id=post.get("id"),
-                    created_time=post.get("created_time"),
-                    message=post.get("message"),
-                    from_user=post.get("from", {}).get("name", "") if post.get("from") else ""
-                ))
-
-            return FacebookPostsResponse(
-                data=posts,
-                paging=data.get("paging", {}).get("next")
+        client = get_http_client(settings)
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+
+        data = response.json()
+
+        if "error" in data:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
             )
 
+        posts = []
+        for post in data.get("data", []):
+            posts.append(FacebookPostResponse(
+                id=post.get("id"),
+                created_time=post.get("created_time"),
+                message=post.get("message"),
+                from_user=post.get("from", {}).get("name", "") if post.get("from") else ""
+            ))
+
+        return FacebookPostsResponse(
+            data=posts,
+            paging=data.get("paging", {}).get("next")
+        )
+
     except HTTPException:
         # Re-raise HTTPException (including Facebook API errors) without modification
         raise
@@ -206,34 +207,34 @@ async def get_facebook_post_comments(
         params["after"] = next_token
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if "error" in data:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
-                )
-
-            comments = []
-            for comment in data.get("data", []):
-                # Create proper FacebookCommentResponse objects
-                comment_obj = FacebookCommentResponse(
-                    id=comment.get("id"),
-                    created_time=comment.get("created_time"),
-                    message=comment.get("message", ""),
-                    from_user=comment.get("from", {}).get("name", "UNKNOWN") if comment.get("from") else "UNKNOWN"
-                )
-                comments.append(comment_obj)
-
-            return FacebookCommentsResponse(
-                data=comments,
-                paging=data.get("paging", {}).get("next")
+        client = get_http_client(settings)
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+
+        data = response.json()
+
+        if "error" in data:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Facebook API Error: {data['error'].get('message', 'Unknown error')}"
             )
 
+        comments = []
+        for comment in data.get("data", []):
+            # Create proper FacebookCommentResponse objects
+            comment_obj = FacebookCommentResponse(
+                id=comment.get("id"),
+                created_time=comment.get("created_time"),
+                message=comment.get("message", ""),
+                from_user=comment.get("from", {}).get("name", "UNKNOWN") if comment.get("from") else "UNKNOWN"
+            )
+            comments.append(comment_obj)
+
+        return FacebookCommentsResponse(
+            data=comments,
+            paging=data.get("paging", {}).get("next")
+        )
+
     except HTTPException:
         # Re-raise HTTPException (including Facebook API errors) without modification
         raise
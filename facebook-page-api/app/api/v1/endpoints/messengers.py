@@ -1,8 +1,12 @@
 from app.core.config import get_settings
+from app.utils.http import get_http_client, request_timeout
+from app.utils.rate_limit import TokenBucket
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, Union
 
+import asyncio
 import httpx
 import logging
 import json
@@ -10,6 +14,10 @@ import json
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Graph API throttling codes: app (4), user (17), page (32), per-hour (613) and Messenger send (80006) limits
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613, 80006}
+send_limiter: Optional[TokenBucket] = None
+
 class SendTextMessageRequest(BaseModel):
     recipient_id: str = Field(..., description="Facebook user ID to send message to")
     message: str = Field(..., description="Text message to send")
@@ -34,6 +42,7 @@ class SendMessageResponse(BaseModel):
     success: bool
     message_id: Optional[str] = None
     error: Optional[str] = None
+    error_code: Optional[int] = None
 
 class BatchMessageResponse(BaseModel):
     total_messages: int
@@ -107,31 +116,33 @@ async def send_facebook_text_message(
     try:
         logger.info(f"Sending message to recipient {recipient_id}")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                params=params,
-                headers={"Content-Type": "application/json"},
-                timeout=30.0
-            )
+        client = get_http_client(settings)
+        response = await client.post(
+            url,
+            json=payload,
+            params=params,
+            headers={"Content-Type": "application/json"},
+            timeout=request_timeout(settings, settings.HTTP_SEND_TIMEOUT)
+        )
 
-            response_data = response.json()
-
-            if response.status_code == 200:
-                message_id = response_data.get("message_id")
-                logger.info(f"Message sent successfully. Message ID: {message_id}")
-                return SendMessageResponse(
-                    success=True,
-                    message_id=message_id
-                )
-            else:
-                error_message = response_data.get("error", {}).get("message", "Unknown error")
-                logger.error(f"Facebook API error: {error_message}")
-                return SendMessageResponse(
-                    success=False,
-                    error=f"Facebook API error: {error_message}"
-                )
+        response_data = response.json()
+
+        if response.status_code == 200:
+            message_id = response_data.get("message_id")
+            logger.info(f"Message sent successfully. Message ID: {message_id}")
+            return SendMessageResponse(
+                success=True,
+                message_id=message_id
+            )
+        else:
+            error = response_data.get("error", {})
+            error_message = error.get("message", "Unknown error")
+            logger.error(f"Facebook API error: {error_message}")
+            return SendMessageResponse(
+                success=False,
+                error=f"Facebook API error: {error_message}",
+                error_code=error.get("code")
+            )
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error sending message: {e.response.text}")
@@ -186,31 +197,33 @@ async def send_facebook_template_message(
     try:
         logger.info(f"Sending template message to recipient {recipient_id}")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                params=params,
-                headers={"Content-Type": "application/json"},
-                timeout=30.0
-            )
+        client = get_http_client(settings)
+        response = await client.post(
+            url,
+            json=payload,
+            params=params,
+            headers={"Content-Type": "application/json"},
+            timeout=request_timeout(settings, settings.HTTP_SEND_TIMEOUT)
+        )
 
-            response_data = response.json()
-
-            if response.status_code == 200:
-                message_id = response_data.get("message_id")
-                logger.info(f"Template message sent successfully. Message ID: {message_id}")
-                return SendMessageResponse(
-                    success=True,
-                    message_id=message_id
-                )
-            else:
-                error_message = response_data.get("error", {}).get("message", "Unknown error")
-                logger.error(f"Facebook API error sending template: {error_message}")
-                return SendMessageResponse(
-                    success=False,
-                    error=f"Facebook API error: {error_message}"
-                )
+        response_data = response.json()
+
+        if response.status_code == 200:
+            message_id = response_data.get("message_id")
+            logger.info(f"Template message sent successfully. Message ID: {message_id}")
+            return SendMessageResponse(
+                success=True,
+                message_id=message_id
+            )
+        else:
+            error = response_data.get("error", {})
+            error_message = error.get("message", "Unknown error")
+            logger.error(f"Facebook API error sending template: {error_message}")
+            return SendMessageResponse(
+                success=False,
+                error=f"Facebook API error: {error_message}",
+                error_code=error.get("code")
+            )
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error sending template: {e.response.text}")
@@ -265,31 +278,33 @@ async def send_facebook_image_message(
     try:
         logger.info(f"Sending image message to recipient {recipient_id}")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                params=params,
-                headers={"Content-Type": "application/json"},
-                timeout=30.0
-            )
+        client = get_http_client(settings)
+        response = await client.post(
+            url,
+            json=payload,
+            params=params,
+            headers={"Content-Type": "application/json"},
+            timeout=request_timeout(settings, settings.HTTP_SEND_TIMEOUT)
+        )
 
-            response_data = response.json()
-
-            if response.status_code == 200:
-                message_id = response_data.get("message_id")
-                logger.info(f"Image message sent successfully. Message ID: {message_id}")
-                return SendMessageResponse(
-                    success=True,
-                    message_id=message_id
-                )
-            else:
-                error_message = response_data.get("error", {}).get("message", "Unknown error")
-                logger.error(f"Facebook API error sending image: {error_message}")
-                return SendMessageResponse(
-                    success=False,
-                    error=f"Facebook API error: {error_message}"
-                )
+        response_data = response.json()
+
+        if response.status_code == 200:
+            message_id = response_data.get("message_id")
+            logger.info(f"Image message sent successfully. Message ID: {message_id}")
+            return SendMessageResponse(
+                success=True,
+                message_id=message_id
+            )
+        else:
+            error = response_data.get("error", {})
+            error_message = error.get("message", "Unknown error")
+            logger.error(f"Facebook API error sending image: {error_message}")
+            return SendMessageResponse(
+                success=False,
+                error=f"Facebook API error: {error_message}",
+                error_code=error.get("code")
+            )
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error sending image: {e.response.text}")
@@ -392,6 +407,99 @@ async def send_template_message(
 
     return result
 
+async def send_batch_item(msg, settings) -> SendMessageResponse:
+    """Send one message of a batch with the sender for its type."""
+    if isinstance(msg, SendTextMessageRequest):
+        return await send_facebook_text_message(
+            recipient_id=msg.recipient_id,
+            message_text=msg.message,
+            settings=settings
+        )
+    elif isinstance(msg, SendImageMessageRequest):
+        return await send_facebook_image_message(
+            recipient_id=msg.recipient_id,
+            image_url=msg.image_url,
+            settings=settings
+        )
+    elif isinstance(msg, SendTemplateRequest):
+        return await send_facebook_template_message(
+            recipient_id=msg.recipient_id,
+            template=msg.template,
+            settings=settings
+        )
+
+    # Handle unknown message type
+    logger.error(f"Unknown message type for recipient {msg.recipient_id}: {type(msg)}")
+    return SendMessageResponse(
+        success=False,
+        error=f"Unknown message type: {type(msg)}"
+    )
+
+def get_send_limiter(settings) -> TokenBucket:
+    """Token bucket shared by every batch, so concurrent batches stay under the Send API limit together."""
+    global send_limiter
+    if send_limiter is None:
+        send_limiter = TokenBucket(settings.MESSENGER_SEND_RATE, settings.MESSENGER_SEND_BURST)
+    return send_limiter
+
+async def send_with_retry(msg, settings, limiter: TokenBucket) -> Tuple[SendMessageResponse, int]:
+    """Send msg, retrying rate-limited sends with exponential backoff; returns the result and the attempts made."""
+    retries = max(int(settings.MESSENGER_SEND_RETRIES), 0)
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        result = await send_batch_item(msg, settings)
+        if result.success or result.error_code not in RATE_LIMIT_ERROR_CODES or attempt == retries:
+            return result, attempt + 1
+
+        # Facebook is already throttling the page; hold every sender back, not only this one
+        delay = settings.MESSENGER_SEND_BACKOFF * 2 ** attempt
+        logger.warning(f"Rate limited sending to {msg.recipient_id} (code {result.error_code}), retrying in {delay}s")
+        limiter.pause(delay)
+
+async def iter_message_batch(messages: list, settings) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Send a batch concurrently and yield each message's result as it completes.
+
+    Messages to the same recipient are sent one after another in request order;
+    different recipients are sent in parallel, up to MESSENGER_SEND_CONCURRENCY
+    at once. Every attempt takes a token from the shared send limiter.
+    """
+    limiter = get_send_limiter(settings)
+    semaphore = asyncio.Semaphore(max(int(settings.MESSENGER_SEND_CONCURRENCY), 1))
+    completed: asyncio.Queue = asyncio.Queue()
+
+    by_recipient: Dict[str, List[Tuple[int, Any]]] = {}
+    for i, msg in enumerate(messages):
+        by_recipient.setdefault(msg.recipient_id, []).append((i, msg))
+
+    async def send_recipient(queued: List[Tuple[int, Any]]):
+        async with semaphore:
+            for i, msg in queued:
+                logger.info(f"Processing message {i+1}/{len(messages)} for recipient: {msg.recipient_id}")
+                try:
+                    result, attempts = await send_with_retry(msg, settings, limiter)
+                except Exception as e:
+                    logger.error(f"Unexpected error sending batch message {i}: {str(e)}")
+                    result, attempts = SendMessageResponse(success=False, error=f"Unexpected error: {str(e)}"), 1
+
+                await completed.put({
+                    "index": i,
+                    "recipient_id": msg.recipient_id,
+                    "success": result.success,
+                    "message_id": result.message_id,
+                    "error": result.error,
+                    "attempts": attempts
+                })
+
+    tasks = [asyncio.create_task(send_recipient(queued)) for queued in by_recipient.values()]
+    try:
+        for _ in range(len(messages)):
+            yield await completed.get()
+    finally:
+        # The caller stopped reading (e.g. the stream was closed); do not keep sending
+        for task in tasks:
+            task.cancel()
+
 @router.post("/send-message-batch", response_model=BatchMessageResponse)
 async def send_message_batch(
     request: SendMessageBatchRequest,
@@ -400,53 +508,37 @@ async def send_message_batch(
     """
     Send multiple Facebook Messenger messages in batch.
 
-    This endpoint allows sending multiple text messages to different users.
-    Each message will be processed individually and results will be returned for each.
+    This endpoint allows sending multiple messages to different users.
+    Recipients are sent to concurrently within the Send API rate limit, and
+    results are returned for each message in request order.
     """
     logger.info(f"Received batch send message request for {len(request.messages)} recipients")
 
-    results = []
-    for i, msg in enumerate(request.messages):
-        logger.info(f"Processing message {i+1}/{len(request.messages)} for recipient: {msg.recipient_id}")
-        result = None
-
-        if isinstance(msg, SendTextMessageRequest):
-            result = await send_facebook_text_message(
-                recipient_id=msg.recipient_id,
-                message_text=msg.message,
-                settings=settings
-            )
-        elif isinstance(msg, SendImageMessageRequest):
-            result = await send_facebook_image_message(
-                recipient_id=msg.recipient_id,
-                image_url=msg.image_url,
-                settings=settings
-            )
-        elif isinstance(msg, SendTemplateRequest):
-            result = await send_facebook_template_message(
-                recipient_id=msg.recipient_id,
-                template=msg.template,
-                settings=settings
-            )
-        else:
-            # Handle unknown message type
-            logger.error(f"Unknown message type for message {i}: {type(msg)}")
-            result = SendMessageResponse(
-                success=False,
-                error=f"Unknown message type: {type(msg)}"
-            )
-
-        results.append({
-            "index": i,
-            "recipient_id": msg.recipient_id,
-            "success": result.success,
-            "message_id": result.message_id,
-            "error": result.error
-        })
+    results = [result async for result in iter_message_batch(request.messages, settings)]
+    results.sort(key=lambda result: result["index"])
 
     return BatchMessageResponse(
         total_messages=len(request.messages),
         successful_messages=sum(1 for r in results if r["success"]),
         failed_messages=sum(1 for r in results if not r["success"]),
         results=results
-    )
\ No newline at end of file
+    )
+
+@router.post("/send-message-batch/stream")
+async def send_message_batch_stream(
+    request: SendMessageBatchRequest,
+    settings = Depends(get_settings)
+):
+    """
+    Send multiple Facebook Messenger messages in batch, streaming results.
+
+    Sends like /send-message-batch but writes each message's result as one
+    JSON line as soon as it completes, so large batches report progress.
+    """
+    logger.info(f"Received streaming batch send message request for {len(request.messages)} recipients")
+
+    async def lines():
+        async for result in iter_message_batch(request.messages, settings):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,11 +1,11 @@
 from functools import lru_cache
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings # type: ignore
-from app.utils.queue import Queue
+from app.utils.queue import Publisher
 
 import os
 
-queue: Queue = None
+queue: Publisher = None
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = os.getenv("PROJECT_NAME", "Facebook Page API")
@@ -26,6 +26,70 @@ class Settings(BaseSettings):
     QUEUE_PORT: int = os.getenv("QUEUE_PORT", 15672)
     QUEUE_USER: str = os.getenv("QUEUE_USER", "guest")
     QUEUE_PASS: str = os.getenv("QUEUE_PASS", "guest")
+    QUEUE_CONFIRM_TIMEOUT: float = os.getenv("QUEUE_CONFIRM_TIMEOUT", 30.0)
+    QUEUE_PUBLISH_RETRIES: int = os.getenv("QUEUE_PUBLISH_RETRIES", 3)
+
+    # Redis
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = os.getenv("REDIS_PORT", 6379)
+    REDIS_DB: int = os.getenv("REDIS_DB", 0)
+    REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    REDIS_CONNECT_ATTEMPTS: int = os.getenv("REDIS_CONNECT_ATTEMPTS", 3)
+
+    # Comment Dedupe
+    COMMENT_DEDUPE_ENABLED: bool = os.getenv("COMMENT_DEDUPE_ENABLED", "True") == "True"
+    COMMENT_DEDUPE_SIZE: int = os.getenv("COMMENT_DEDUPE_SIZE", 100000)
+    COMMENT_DEDUPE_TTL: int = os.getenv("COMMENT_DEDUPE_TTL", 3600)
+    COMMENT_DEDUPE_REDIS_ENABLED: bool = os.getenv("COMMENT_DEDUPE_REDIS_ENABLED", "False") == "True"
+
+    # Comment Sync
+    COMMENT_SYNC_PAGE_SIZE: int = os.getenv("COMMENT_SYNC_PAGE_SIZE", 100)
+    COMMENT_SYNC_MAX_PAGES: int = os.getenv("COMMENT_SYNC_MAX_PAGES", 10)
+    COMMENT_CURSOR_REDIS_ENABLED: bool = os.getenv("COMMENT_CURSOR_REDIS_ENABLED", "True") == "True"
+    COMMENT_FETCH_CONCURRENCY: int = os.getenv("COMMENT_FETCH_CONCURRENCY", 10)
+    COMMENT_FETCH_TIMEOUT: float = os.getenv("COMMENT_FETCH_TIMEOUT", 30.0)
+    COMMENT_POLL_MODE: str = os.getenv("COMMENT_POLL_MODE", "single")
+    COMMENT_BATCH_SIZE: int = os.getenv("COMMENT_BATCH_SIZE", 50)
+
+    # Adaptive Comment Polling
+    COMMENT_ADAPTIVE_TICK: int = os.getenv("COMMENT_ADAPTIVE_TICK", 1)
+    COMMENT_ADAPTIVE_MIN_INTERVAL: float = os.getenv("COMMENT_ADAPTIVE_MIN_INTERVAL", 3.0)
+    COMMENT_ADAPTIVE_TARGET_COMMENTS: float = os.getenv("COMMENT_ADAPTIVE_TARGET_COMMENTS", 5.0)
+    COMMENT_ADAPTIVE_BACKOFF: float = os.getenv("COMMENT_ADAPTIVE_BACKOFF", 2.0)
+    COMMENT_POLL_BUDGET_PER_MINUTE: int = os.getenv("COMMENT_POLL_BUDGET_PER_MINUTE", 600)
+
+    # Comment Feed Webhook
+    COMMENT_WEBHOOK_ENABLED: bool = os.getenv("COMMENT_WEBHOOK_ENABLED", "False") == "True"
+    COMMENT_RECONCILE_INTERVAL: int = os.getenv("COMMENT_RECONCILE_INTERVAL", 300)
+
+    # Webhook
+    WEBHOOK_QUEUE_SIZE: int = os.getenv("WEBHOOK_QUEUE_SIZE", 1000)
+    WEBHOOK_BATCH_SIZE: int = os.getenv("WEBHOOK_BATCH_SIZE", 100)
+    WEBHOOK_DRAIN_TIMEOUT: float = os.getenv("WEBHOOK_DRAIN_TIMEOUT", 10.0)
+
+    # HTTP Client
+    HTTP_MAX_CONNECTIONS: int = os.getenv("HTTP_MAX_CONNECTIONS", 100)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+    HTTP_KEEPALIVE_EXPIRY: float = os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "False") == "True"
+    HTTP_CONNECT_TIMEOUT: float = os.getenv("HTTP_CONNECT_TIMEOUT", 5.0)
+    HTTP_POOL_TIMEOUT: float = os.getenv("HTTP_POOL_TIMEOUT", 5.0)
+    HTTP_READ_TIMEOUT: float = os.getenv("HTTP_READ_TIMEOUT", 15.0)
+    HTTP_SEND_TIMEOUT: float = os.getenv("HTTP_SEND_TIMEOUT", 30.0)
+    HTTP_BATCH_TIMEOUT: float = os.getenv("HTTP_BATCH_TIMEOUT", 60.0)
+
+    # Graph API Usage Throttling (percent of the rate limit from the usage headers)
+    GRAPH_USAGE_SLOW_AT: float = os.getenv("GRAPH_USAGE_SLOW_AT", 50.0)
+    GRAPH_USAGE_STOP_AT: float = os.getenv("GRAPH_USAGE_STOP_AT", 85.0)
+    GRAPH_USAGE_MAX_POLL_DELAY: float = os.getenv("GRAPH_USAGE_MAX_POLL_DELAY", 300.0)
+    GRAPH_USAGE_STALE_AFTER: float = os.getenv("GRAPH_USAGE_STALE_AFTER", 300.0)
+
+    # Messenger Batch Sending
+    MESSENGER_SEND_RATE: float = os.getenv("MESSENGER_SEND_RATE", 250.0)
+    MESSENGER_SEND_BURST: int = os.getenv("MESSENGER_SEND_BURST", 50)
+    MESSENGER_SEND_CONCURRENCY: int = os.getenv("MESSENGER_SEND_CONCURRENCY", 50)
+    MESSENGER_SEND_RETRIES: int = os.getenv("MESSENGER_SEND_RETRIES", 3)
+    MESSENGER_SEND_BACKOFF: float = os.getenv("MESSENGER_SEND_BACKOFF", 1.0)
 
     # Scheduler
     SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "True") == "True"
@@ -57,15 +121,26 @@ def get_settings() -> Settings:
     return Settings()
 
 
-def connect_queue(settings: Settings):
-    queue = Queue(
-        host=settings.QUEUE_HOST,
-        username=settings.QUEUE_USER,
-        password=settings.QUEUE_PASS
-    )
-    queue.connect()
+def connect_queue(settings: Settings) -> Publisher:
+    """Shared publisher; each thread opens its RabbitMQ connection on first publish."""
+    global queue
+    if queue is None:
+        queue = Publisher(
+            host=settings.QUEUE_HOST,
+            username=settings.QUEUE_USER,
+            password=settings.QUEUE_PASS,
+            confirm_timeout=settings.QUEUE_CONFIRM_TIMEOUT,
+            retries=settings.QUEUE_PUBLISH_RETRIES
+        )
+    return queue
 
-def get_queue() -> Queue:
+def get_queue() -> Publisher:
     return queue
 
+def close_queue():
+    global queue
+    if queue is not None:
+        queue.close()
+        queue = None
+
 settings = get_settings()
@@ -1,13 +1,20 @@
 from contextlib import asynccontextmanager
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 
 from app.api.middleware.logging import LoggingMiddleware
 from app.api.middleware.security import SecurityMiddleware
+from app.api.v1.endpoints.webhooks import feed_dispatcher, webhook_dispatcher
 from app.api.v1.router import api_router
-from app.core.config import connect_queue, get_settings
+from app.core.config import close_queue, connect_queue, get_settings
 from app.core.logging import setup_logging
+from app.schedule.facebook_comments import stop_comments_scheduler
+from app.schedule.facebook_posts import stop_posts_scheduler
+from app.services.facebook_services import open_comment_state
+from app.utils.http import close_http_client, create_http_client, http_pool_stats
 
 settings = get_settings()
 
@@ -15,7 +22,19 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     setup_logging()
     connect_queue(settings)
+    create_http_client(settings)
+    # Connects to Redis when the comment dedupe or cursors use it, which blocks
+    await asyncio.to_thread(open_comment_state, settings)
+    webhook_dispatcher.start()
+    feed_dispatcher.start()
     yield
+    # The schedulers and the webhook dispatchers run on this event loop; stop them before it goes away
+    await stop_posts_scheduler()
+    await stop_comments_scheduler()
+    await webhook_dispatcher.stop()
+    await feed_dispatcher.stop()
+    await asyncio.to_thread(close_queue)
+    await close_http_client()
 
 
 def create_app() -> FastAPI:
@@ -64,4 +83,11 @@ def health_check():
             "status": "OK",
         },
         status_code=200,
-    )
\ No newline at end of file
+    )
+
+@app.get("/metrics/http")
+def http_metrics():
+    return JSONResponse(
+        content=http_pool_stats(),
+        status_code=200,
+    )
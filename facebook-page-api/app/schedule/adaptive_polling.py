@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import heapq
+import threading
+import time
+
+
+@dataclass
+class PostPollState:
+    post_id: str
+    interval: float
+    next_poll_at: float
+    rate: float = 0.0
+    last_polled_at: Optional[float] = None
+    polling: bool = False
+
+
+class AdaptivePollQueue:
+    """Priority queue of posts ordered by their next poll time.
+
+    After each poll a post's interval is re-derived from its comment arrival
+    rate (an exponentially weighted average of new comments per second), so a
+    post gets polled about once per `target_comments` new comments. Polls that
+    find nothing multiply the interval by `backoff`, up to `max_interval`.
+    A token bucket refilled at `budget_per_minute` caps the Graph API requests
+    spent across all posts; posts that do not fit wait, most overdue first.
+    """
+
+    def __init__(self, min_interval: float = 3.0, max_interval: float = 300.0, target_comments: float = 5.0,
+                 backoff: float = 2.0, smoothing: float = 0.5, budget_per_minute: int = 600):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.target_comments = target_comments
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.budget_per_minute = budget_per_minute
+        self.tokens = float(budget_per_minute)
+        self.throttled = 0
+        self._refilled_at = time.monotonic()
+        self._states: Dict[str, PostPollState] = {}
+        self._heap: List[tuple] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def sync(self, post_ids: Iterable[str]):
+        """Track exactly post_ids; new posts are due immediately."""
+        post_ids = set(post_ids)
+        now = time.monotonic()
+        with self._lock:
+            for post_id in list(self._states):
+                if post_id not in post_ids:
+                    del self._states[post_id]
+
+            for post_id in post_ids - self._states.keys():
+                self._states[post_id] = PostPollState(post_id=post_id, interval=self.min_interval, next_poll_at=now)
+                self._push(self._states[post_id])
+
+    def take_due(self, cost_per_request: int = 1) -> List[str]:
+        """Pop the posts due now that the request budget can pay for.
+
+        cost_per_request is how many posts one request covers (1 per post,
+        up to 50 with batch requests)."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            self._refill(now)
+            affordable = int(self.tokens) * max(cost_per_request, 1)
+
+            while self._heap and self._heap[0][0] <= now:
+                next_poll_at, _, post_id = self._heap[0]
+                state = self._states.get(post_id)
+                if state is None or state.polling or state.next_poll_at != next_poll_at:
+                    heapq.heappop(self._heap)
+                    continue
+                if len(due) >= affordable:
+                    self.throttled += 1
+                    break
+
+                heapq.heappop(self._heap)
+                state.polling = True
+                due.append(post_id)
+
+            requests = -(-len(due) // max(cost_per_request, 1))
+            self.tokens -= requests
+
+        return due
+
+    def record(self, post_id: str, new_comments: Optional[int]):
+        """Reschedule a polled post from the number of new comments it had (None when the poll failed)."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(post_id)
+            if state is None:
+                return
+
+            if new_comments:
+                elapsed = max(now - (state.last_polled_at or now - state.interval), 1e-3)
+                observed = new_comments / elapsed
+                state.rate = self.smoothing * observed + (1 - self.smoothing) * state.rate if state.rate else observed
+                state.interval = min(max(self.target_comments / state.rate, self.min_interval), self.max_interval)
+            elif new_comments is not None:
+                state.rate *= 1 - self.smoothing
+                state.interval = min(state.interval * self.backoff, self.max_interval)
+
+            if new_comments is not None:
+                state.last_polled_at = now
+            state.polling = False
+            state.next_poll_at = now + state.interval
+            self._push(state)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            return {
+                "budget_per_minute": self.budget_per_minute,
+                "tokens": round(self.tokens, 1),
+                "throttled": self.throttled,
+                "posts": {
+                    post_id: {
+                        "interval": round(state.interval, 1),
+                        "rate_per_minute": round(state.rate * 60, 2),
+                        "next_poll_in": round(max(state.next_poll_at - now, 0), 1),
+                    }
+                    for post_id, state in self._states.items()
+                },
+            }
+
+    def _push(self, state: PostPollState):
+        self._sequence += 1
+        heapq.heappush(self._heap, (state.next_poll_at, self._sequence, state.post_id))
+
+    def _refill(self, now: float):
+        self.tokens = min(self.tokens + (now - self._refilled_at) * self.budget_per_minute / 60, self.budget_per_minute)
+        self._refilled_at = now
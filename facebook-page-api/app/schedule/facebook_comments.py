@@ -1,15 +1,25 @@
 from app.core.config import get_settings
-from app.services.facebook_services import fetch_and_queue_comments_service
-from apscheduler.executors.pool import ThreadPoolExecutor
+from app.schedule.adaptive_polling import AdaptivePollQueue
+from app.services.facebook_services import (
+    GRAPH_BATCH_LIMIT,
+    get_comment_dedupe_stats,
+    sync_comments,
+    sync_comments_batch,
+)
+from app.utils.graph_usage import get_graph_usage
+from app.utils.http import get_http_client
+from apscheduler.executors.asyncio import AsyncIOExecutor
 from apscheduler.jobstores.memory import MemoryJobStore
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 import asyncio
+import httpx
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +27,7 @@ class FacebookCommentsScheduler:
     def __init__(self):
         self.scheduler = None
         self.settings = get_settings()
+        self.poll_queue: Optional[AdaptivePollQueue] = None
         self.jobs_info = {
             "fetch_comments": {
                 "id": "fetch_comments_job",
@@ -38,18 +49,21 @@ class FacebookCommentsScheduler:
                 logger.warning("Scheduler is disabled in settings")
                 return
 
+            cron_schedule, trigger_type = self._reconcile_schedule(cron_schedule, trigger_type)
+
             jobstores = {
                 'default': MemoryJobStore()
             }
+            # Jobs run as coroutines on the app's event loop, not on a thread pool
             executors = {
-                'default': ThreadPoolExecutor(self.settings.SCHEDULER_THREAD_POOL_SIZE)
+                'default': AsyncIOExecutor()
             }
             job_defaults = {
                 'coalesce': self.settings.SCHEDULER_COALESCE,
                 'max_instances': self.settings.SCHEDULER_MAX_INSTANCES
             }
 
-            self.scheduler = BackgroundScheduler(
+            self.scheduler = AsyncIOScheduler(
                 jobstores=jobstores,
                 executors=executors,
                 job_defaults=job_defaults,
@@ -59,6 +73,7 @@ class FacebookCommentsScheduler:
             self.jobs_info["fetch_comments"]["post_ids"] = post_ids
             self.jobs_info["fetch_comments"]["schedule"] = cron_schedule
             self.jobs_info["fetch_comments"]["trigger_type"] = trigger_type
+            self.poll_queue = self._create_poll_queue(post_ids, cron_schedule) if trigger_type == "adaptive" else None
             self._add_jobs()
 
             self.scheduler.start()
@@ -103,7 +118,20 @@ class FacebookCommentsScheduler:
         try:
             trigger_type = self.jobs_info["fetch_comments"].get("trigger_type", "cron")
 
-            if trigger_type == "interval":
+            if trigger_type == "adaptive":
+                # Tick often; the poll queue decides which posts are due on each tick
+                self.scheduler.add_job(
+                    func=self._fetch_comments_job,
+                    trigger=IntervalTrigger(seconds=self.settings.COMMENT_ADAPTIVE_TICK),
+                    id=self.jobs_info["fetch_comments"]["id"],
+                    name=self.jobs_info["fetch_comments"]["name"],
+                    replace_existing=True,
+                    misfire_grace_time=self.settings.SCHEDULER_MISFIRE_GRACE_TIME
+                )
+
+                logger.info(f"Comments adaptive polling added, backing off quiet posts up to {self.poll_queue.max_interval} seconds")
+
+            elif trigger_type == "interval":
                 # Handle interval trigger (seconds)
                 if isinstance(self.jobs_info["fetch_comments"]["schedule"], int):
                     seconds = self.jobs_info["fetch_comments"]["schedule"]
@@ -151,35 +179,35 @@ class FacebookCommentsScheduler:
             logger.error(f"Error adding comments jobs to scheduler: {e}")
             raise
 
-    def _fetch_comments_job(self):
+    async def _fetch_comments_job(self):
         try:
-            post_ids = self.jobs_info["fetch_comments"]["post_ids"]
-            logger.info(f"Starting scheduled comments fetch job for {len(post_ids)} posts")
-            self.jobs_info["fetch_comments"]["last_run"] = datetime.now().isoformat()
-
+            # Polling gives way first when the Graph API usage runs high, so sends keep their budget
+            if not get_graph_usage().poll_allowed("fetch_comments"):
+                logger.warning(f"Skipping comments fetch, Graph API usage at {get_graph_usage().usage():.0f}%")
+                return
 
+            adaptive = self.poll_queue is not None
+            if adaptive:
+                # Only the posts whose adaptive interval has elapsed, as far as the request budget allows
+                batch_size = self._batch_size() if self.settings.COMMENT_POLL_MODE == "batch" else 1
+                post_ids = self.poll_queue.take_due(batch_size)
+                if not post_ids:
+                    return
+            else:
+                post_ids = self.jobs_info["fetch_comments"]["post_ids"]
 
-            async def fetch_comments_async():
-                try:
-                    settings = get_settings()
-                    successful_posts = 0
+            logger.info(f"Starting scheduled comments fetch job for {len(post_ids)} posts")
+            self.jobs_info["fetch_comments"]["last_run"] = datetime.now().isoformat()
 
+            started_at = time.perf_counter()
+            new_comments: Dict[str, Optional[int]] = {}
+            try:
+                new_comments = await self._poll_posts(post_ids)
+            finally:
+                if adaptive:
                     for post_id in post_ids:
-                        logger.info(f"Fetching comments for post {post_id}")
-
-                        success = await fetch_and_queue_comments_service(post_id, settings)
-                        if success:
-                            successful_posts += 1
-                            logger.info(f"Successfully processed comments for post {post_id}")
-                        else:
-                            logger.error(f"Failed to process comments for post {post_id}")
-
-                    logger.info(f"Completed comments fetch job. Successfully processed {successful_posts}/{len(post_ids)} posts")
-
-                except Exception as e:
-                    logger.error(f"Error in fetch_comments_async: {e}")
-
-            asyncio.run(fetch_comments_async())
+                        self.poll_queue.record(post_id, new_comments.get(post_id))
+            self.jobs_info["fetch_comments"]["last_duration"] = round(time.perf_counter() - started_at, 3)
 
             if self.scheduler and self.scheduler.get_job(self.jobs_info["fetch_comments"]["id"]):
                 next_run = self.scheduler.get_job(self.jobs_info["fetch_comments"]["id"]).next_run_time
@@ -191,6 +219,100 @@ class FacebookCommentsScheduler:
         except Exception as e:
             logger.error(f"Error in scheduled comments fetch job: {e}")
 
+    async def _poll_posts(self, post_ids: List[str]) -> Dict[str, Optional[int]]:
+        """Sync post_ids with bounded concurrency; returns the new comment count per post (None when it failed)."""
+        settings = get_settings()
+        semaphore = asyncio.Semaphore(max(int(settings.COMMENT_FETCH_CONCURRENCY), 1))
+        post_latency: Dict[str, float] = {}
+        new_comments: Dict[str, Optional[int]] = {}
+        results = {"succeeded": 0, "failed": 0, "timed_out": 0}
+
+        batch_mode = settings.COMMENT_POLL_MODE == "batch"
+
+        async def fetch_group(client: httpx.AsyncClient, group: List[str]):
+            async with semaphore:
+                logger.info(f"Fetching comments for posts {', '.join(group)}")
+                started_at = time.perf_counter()
+                try:
+                    if batch_mode:
+                        outcome = await asyncio.wait_for(
+                            sync_comments_batch(group, settings, client),
+                            timeout=settings.COMMENT_FETCH_TIMEOUT
+                        )
+                    else:
+                        outcome = {group[0]: await asyncio.wait_for(
+                            sync_comments(group[0], settings, client),
+                            timeout=settings.COMMENT_FETCH_TIMEOUT
+                        )}
+
+                    new_comments.update(outcome)
+                    for post_id, count in outcome.items():
+                        results["succeeded" if count is not None else "failed"] += 1
+                        if count is not None:
+                            logger.info(f"Successfully processed comments for post {post_id}")
+                        else:
+                            logger.error(f"Failed to process comments for post {post_id}")
+                except asyncio.TimeoutError:
+                    results["timed_out"] += len(group)
+                    logger.error(f"Timed out fetching comments for posts {', '.join(group)} after {settings.COMMENT_FETCH_TIMEOUT}s")
+                finally:
+                    latency = round(time.perf_counter() - started_at, 3)
+                    for post_id in group:
+                        post_latency[post_id] = latency
+
+        if batch_mode:
+            size = self._batch_size()
+            groups = [post_ids[index:index + size] for index in range(0, len(post_ids), size)]
+        else:
+            groups = [[post_id] for post_id in post_ids]
+
+        try:
+            client = self._get_client(settings)
+            await asyncio.gather(*(fetch_group(client, group) for group in groups))
+        except Exception as e:
+            logger.error(f"Error polling comments: {e}")
+
+        tracked = set(self.jobs_info["fetch_comments"]["post_ids"])
+        latencies = {**self.jobs_info["fetch_comments"].get("post_latency", {}), **post_latency}
+        self.jobs_info["fetch_comments"]["last_results"] = results
+        self.jobs_info["fetch_comments"]["post_latency"] = {post_id: latency for post_id, latency in latencies.items() if post_id in tracked}
+
+        logger.info(f"Completed comments fetch job. Successfully processed {results['succeeded']}/{len(post_ids)} posts")
+        return new_comments
+
+    def _get_client(self, settings) -> httpx.AsyncClient:
+        """The application's pooled Graph API client; the semaphore in _poll_posts bounds how much of it a tick uses."""
+        return get_http_client(settings)
+
+    def _create_poll_queue(self, post_ids: List[str], schedule) -> AdaptivePollQueue:
+        """Adaptive polling uses the requested schedule (seconds) as the interval cap for quiet posts."""
+        poll_queue = AdaptivePollQueue(
+            min_interval=self.settings.COMMENT_ADAPTIVE_MIN_INTERVAL,
+            max_interval=float(schedule),
+            target_comments=self.settings.COMMENT_ADAPTIVE_TARGET_COMMENTS,
+            backoff=self.settings.COMMENT_ADAPTIVE_BACKOFF,
+            budget_per_minute=self.settings.COMMENT_POLL_BUDGET_PER_MINUTE,
+        )
+        poll_queue.sync(post_ids)
+        return poll_queue
+
+    def _reconcile_schedule(self, schedule, trigger_type: str):
+        """With feed webhooks delivering comments as they are posted, polling only sweeps
+        up the ones a webhook missed, every COMMENT_RECONCILE_INTERVAL seconds at most."""
+        self.jobs_info["fetch_comments"]["reconcile"] = self.settings.COMMENT_WEBHOOK_ENABLED
+        if not self.settings.COMMENT_WEBHOOK_ENABLED:
+            return schedule, trigger_type
+
+        seconds = self.settings.COMMENT_RECONCILE_INTERVAL
+        if trigger_type in ("interval", "adaptive"):
+            seconds = max(int(schedule), seconds)
+
+        logger.info(f"Comments arrive by feed webhook; polling reconciles every {seconds} seconds instead of {trigger_type} {schedule}")
+        return seconds, "interval"
+
+    def _batch_size(self) -> int:
+        return min(max(int(self.settings.COMMENT_BATCH_SIZE), 1), GRAPH_BATCH_LIMIT)
+
     def is_running(self) -> bool:
         return self.scheduler is not None and self.scheduler.running
 
@@ -203,6 +325,9 @@ class FacebookCommentsScheduler:
                 else:
                     job_info["next_run"] = None
 
+        self.jobs_info["fetch_comments"]["dedupe"] = get_comment_dedupe_stats()
+        self.jobs_info["fetch_comments"]["adaptive"] = self.poll_queue.snapshot() if self.poll_queue else None
+        self.jobs_info["fetch_comments"]["graph_usage"] = get_graph_usage().snapshot()
         return self.jobs_info
 
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
@@ -253,11 +378,19 @@ class FacebookCommentsScheduler:
                 new_cron_schedule = self.settings.FACEBOOK_COMMENTS_CRON_SCHEDULE
 
             if self.scheduler and self.scheduler.running:
+                new_cron_schedule, trigger_type = self._reconcile_schedule(new_cron_schedule, trigger_type)
                 self.jobs_info["fetch_comments"]["schedule"] = new_cron_schedule
                 self.jobs_info["fetch_comments"]["trigger_type"] = trigger_type
                 self.jobs_info["fetch_comments"]["post_ids"] = post_ids
 
-                if trigger_type == "interval":
+                if trigger_type == "adaptive":
+                    self.poll_queue = self._create_poll_queue(post_ids, new_cron_schedule)
+                    self.scheduler.reschedule_job(
+                        job_id=self.jobs_info["fetch_comments"]["id"],
+                        trigger=IntervalTrigger(seconds=self.settings.COMMENT_ADAPTIVE_TICK)
+                    )
+                elif trigger_type == "interval":
+                    self.poll_queue = None
                     if isinstance(new_cron_schedule, int):
                         seconds = new_cron_schedule
                     else:
@@ -268,6 +401,7 @@ class FacebookCommentsScheduler:
                         trigger=IntervalTrigger(seconds=seconds)
                     )
                 else:
+                    self.poll_queue = None
                     cron_parts = new_cron_schedule.split()
                     if len(cron_parts) != 5:
                         raise ValueError("Invalid cron format. Expected 5 parts: minute hour day month day_of_week")
@@ -298,6 +432,8 @@ class FacebookCommentsScheduler:
             current_post_ids = self.jobs_info["fetch_comments"]["post_ids"]
             new_post_ids = list(set(current_post_ids + post_ids))
             self.jobs_info["fetch_comments"]["post_ids"] = new_post_ids
+            if self.poll_queue:
+                self.poll_queue.sync(new_post_ids)
             logger.info(f"Added {len(post_ids)} new post IDs to comments scheduler")
         except Exception as e:
             logger.error(f"Error adding post IDs: {e}")
@@ -308,6 +444,8 @@ class FacebookCommentsScheduler:
             current_post_ids = self.jobs_info["fetch_comments"]["post_ids"]
             updated_post_ids = [pid for pid in current_post_ids if pid not in post_ids]
             self.jobs_info["fetch_comments"]["post_ids"] = updated_post_ids
+            if self.poll_queue:
+                self.poll_queue.sync(updated_post_ids)
             logger.info(f"Removed {len(post_ids)} post IDs from comments scheduler")
         except Exception as e:
             logger.error(f"Error removing post IDs: {e}")
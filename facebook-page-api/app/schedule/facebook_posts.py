@@ -1,14 +1,16 @@
 from app.core.config import get_settings
 from app.services.facebook_services import fetch_and_queue_posts_service
-from apscheduler.executors.pool import ThreadPoolExecutor
+from app.utils.graph_usage import get_graph_usage
+from app.utils.http import get_http_client
+from apscheduler.executors.asyncio import AsyncIOExecutor
 from apscheduler.jobstores.memory import MemoryJobStore
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from typing import Dict, Any, Optional, Union
 
-import asyncio
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
@@ -47,8 +49,9 @@ class FacebookPostsScheduler:
             jobstores = {
                 'default': MemoryJobStore()
             }
+            # Jobs run as coroutines on the app's event loop, not on a thread pool
             executors = {
-                'default': ThreadPoolExecutor(self.settings.SCHEDULER_THREAD_POOL_SIZE)
+                'default': AsyncIOExecutor()
             }
             job_defaults = {
                 'coalesce': self.settings.SCHEDULER_COALESCE,
@@ -56,7 +59,7 @@ class FacebookPostsScheduler:
             }
 
             # Create scheduler
-            self.scheduler = BackgroundScheduler(
+            self.scheduler = AsyncIOScheduler(
                 jobstores=jobstores,
                 executors=executors,
                 job_defaults=job_defaults,
@@ -161,32 +164,27 @@ class FacebookPostsScheduler:
             logger.error(f"Error adding jobs to scheduler: {e}")
             raise
 
-    def _fetch_posts_job(self):
+    async def _fetch_posts_job(self):
         """Job function to fetch posts"""
         try:
+            if not get_graph_usage().poll_allowed("fetch_posts"):
+                logger.warning(f"Skipping post fetch, Graph API usage at {get_graph_usage().usage():.0f}%")
+                return
+
             page_id = self.jobs_info["fetch_posts"]["page_id"]
             logger.info(f"Starting scheduled post fetch job for page {page_id}")
             self.jobs_info["fetch_posts"]["last_run"] = datetime.now().isoformat()
 
-            async def fetch_posts_async():
-                try:
-                    settings = get_settings()
-
-                    logger.info(f"Fetching posts for page {page_id}")
-
-                    success = await fetch_and_queue_posts_service(page_id, settings)
+            settings = get_settings()
 
-                    if success:
-                        logger.info(f"Successfully processed posts for page {page_id}")
-                    else:
-                        logger.error(f"Failed to process posts for page {page_id}")
-
-                    logger.info(f"Completed posts fetch job. Successfully processed posts for page {page_id}")
+            logger.info(f"Fetching posts for page {page_id}")
 
-                except Exception as e:
-                    logger.error(f"Error in fetch_posts_async: {e}")
+            success = await fetch_and_queue_posts_service(page_id, settings, self._get_client(settings))
 
-            asyncio.run(fetch_posts_async())
+            if success:
+                logger.info(f"Successfully processed posts for page {page_id}")
+            else:
+                logger.error(f"Failed to process posts for page {page_id}")
 
             # Update next run time
             if self.scheduler and self.scheduler.get_job(self.jobs_info["fetch_posts"]["id"]):
@@ -200,6 +198,10 @@ class FacebookPostsScheduler:
             logger.error(f"Error in scheduled post fetch job: {e}")
             # Don't raise the exception to prevent job from being removed
 
+    def _get_client(self, settings) -> httpx.AsyncClient:
+        """The application's pooled Graph API client"""
+        return get_http_client(settings)
+
     def is_running(self) -> bool:
         """Check if scheduler is running"""
         return self.scheduler is not None and self.scheduler.running
@@ -215,6 +217,7 @@ class FacebookPostsScheduler:
                 else:
                     job_info["next_run"] = None
 
+        self.jobs_info["fetch_posts"]["graph_usage"] = get_graph_usage().snapshot()
         return self.jobs_info
 
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
@@ -1,13 +1,131 @@
-from app.utils.queue import Queue
+from app.core.config import connect_queue
+from app.utils.cursor_store import CommentCursorStore, advance, is_synced
+from app.utils.dedupe import SeenFilter
+from app.utils.http import get_http_client, request_timeout
+from app.utils.redis import Redis
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
 
+import asyncio
 import httpx
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-async def fetch_and_queue_posts_service(page_id: str, settings) -> bool:
+# Graph API limit on requests per batch
+GRAPH_BATCH_LIMIT = 50
+
+redis: Optional[Redis] = None
+seen_comments: Optional[SeenFilter] = None
+comment_cursors: Optional[CommentCursorStore] = None
+state_lock = threading.Lock()
+
+def get_redis(settings) -> Optional[Redis]:
+    """Redis connection shared by the comment dedupe and the comment cursors.
+    None when Redis cannot be reached in REDIS_CONNECT_ATTEMPTS, and both keep their state in memory.
+    Connecting blocks; open_comment_state makes the first connection off the event loop."""
+    global redis
+    if redis is None:
+        connection = Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD
+        )
+        if not connection.connect(max_attempts=int(settings.REDIS_CONNECT_ATTEMPTS)):
+            logger.warning(f"Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} is unavailable, keeping comment dedupe and cursors in memory")
+            return None
+        redis = connection
+    return redis
+
+def get_seen_comments(settings) -> Optional[SeenFilter]:
+    """Filter of comment ids already published, created on first use."""
+    global seen_comments
+    if not settings.COMMENT_DEDUPE_ENABLED:
+        return None
+
+    with state_lock:
+        if seen_comments is None:
+            seen_comments = SeenFilter(
+                "published_comments",
+                max_size=settings.COMMENT_DEDUPE_SIZE,
+                ttl=settings.COMMENT_DEDUPE_TTL,
+                redis=get_redis(settings) if settings.COMMENT_DEDUPE_REDIS_ENABLED else None
+            )
+
+    return seen_comments
+
+def get_comment_cursors(settings) -> CommentCursorStore:
+    """Per-post high-water marks of the comment sync, created on first use."""
+    global comment_cursors
+    with state_lock:
+        if comment_cursors is None:
+            comment_cursors = CommentCursorStore(
+                redis=get_redis(settings) if settings.COMMENT_CURSOR_REDIS_ENABLED else None
+            )
+
+    return comment_cursors
+
+def open_comment_state(settings):
+    """Create the comment dedupe and the comment cursors before the schedulers and webhooks use them.
+    Blocks while Redis connects, so the lifespan runs it in a thread."""
+    get_seen_comments(settings)
+    get_comment_cursors(settings)
+
+def get_comment_dedupe_stats() -> Optional[Dict[str, Any]]:
+    return seen_comments.stats() if seen_comments else None
+
+def unseen_comments(comments: List[Dict[str, Any]], settings) -> List[Dict[str, Any]]:
+    """Drop the comments already published, by an earlier sync or by a feed webhook, and repeats within comments."""
+    seen = get_seen_comments(settings)
+    if seen is None or not comments:
+        return comments
+
+    unseen = set(seen.unseen([comment["id"] for comment in comments]))
+    result = []
+    for comment in comments:
+        if comment["id"] in unseen:
+            unseen.discard(comment["id"])
+            result.append(comment)
+    return result
+
+def mark_published_comments(comments: List[Dict[str, Any]], settings):
+    seen = get_seen_comments(settings)
+    if seen is not None and comments:
+        seen.mark([comment["id"] for comment in comments])
+
+def feed_comment_message(value: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The message sync_comments publishes for a comment, built from a Page feed webhook change value.
+    None for anything but a new top-level comment; polling reads top-level comments only."""
+    if value.get("item") != "comment" or value.get("verb") != "add":
+        return None
+
+    post_id = value.get("post_id")
+    if not post_id or not value.get("comment_id") or value.get("parent_id", post_id) != post_id:
+        return None
+
+    # Webhooks send epoch seconds where the Graph API returns ISO 8601
+    created_time = value.get("created_time")
+    if isinstance(created_time, (int, float)):
+        created_time = datetime.fromtimestamp(created_time, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+0000")
+
+    return {
+        "id": value.get("comment_id"),
+        "message": value.get("message", ""),
+        "created_time": created_time,
+        "from_name": value.get("from", {}).get("name", "UNKNOWN") if value.get("from") else "UNKNOWN",
+        "from_id": value.get("from", {}).get("id") if value.get("from") else "0000000000000999",
+        "post_id": post_id,
+        "type": "text"
+    }
+
+async def fetch_and_queue_posts_service(page_id: str, settings, client: Optional[httpx.AsyncClient] = None) -> bool:
     """Service function to fetch Facebook posts and queue them for processing"""
+    client = client or get_http_client(settings)
+
     try:
         url = f"{settings.FACEBOOK_BASE_URL}/{page_id}/posts"
         params = {
@@ -16,110 +134,199 @@ async def fetch_and_queue_posts_service(page_id: str, settings) -> bool:
             "limit": 50
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+        response = await client.get(url, params=params)
+        response.raise_for_status()
 
-            data = response.json()
+        data = response.json()
 
-            if "error" in data:
-                logger.error(f"Facebook API Error: {data['error'].get('message', 'Unknown error')}")
-                return False
+        if "error" in data:
+            logger.error(f"Facebook API Error: {data['error'].get('message', 'Unknown error')}")
+            return False
 
-            queue = Queue(
-                host=settings.QUEUE_HOST,
-                username=settings.QUEUE_USER,
-                password=settings.QUEUE_PASS
-            )
-            queue.connect()
-
-            posts_queued = 0
-            for post in data.get("data", []):
-                processed_data = {
-                    "id": post.get("id"),
-                    "message": post.get("message"),
-                    "created_time": post.get("created_time"),
-                    "from_name": post.get("from", {}).get("name", "UNKNOWN") if post.get("from") else "UNKNOWN",
-                    "from_id": post.get("from", {}).get("id", "0000000000000999") if post.get("from") else "0000000000000999",
-                    "page_id": page_id,
-                    "media_url": None,
-                    "media_type": None,
-                    "type": "text"
-                }
-
-                queue.publish("facebook_posts", processed_data)
-                posts_queued += 1
-
-            logger.info(f"Successfully queued {posts_queued} posts for page {page_id}")
-            return True
+        posts = []
+        for post in data.get("data", []):
+            posts.append({
+                "id": post.get("id"),
+                "message": post.get("message"),
+                "created_time": post.get("created_time"),
+                "from_name": post.get("from", {}).get("name", "UNKNOWN") if post.get("from") else "UNKNOWN",
+                "from_id": post.get("from", {}).get("id", "0000000000000999") if post.get("from") else "0000000000000999",
+                "page_id": page_id,
+                "media_url": None,
+                "media_type": None,
+                "type": "text"
+            })
+
+        # The queue client blocks, keep it off the event loop
+        await asyncio.to_thread(publish_messages, "facebook_posts", posts, settings)
+
+        logger.info(f"Successfully queued {len(posts)} posts for page {page_id}")
+        return True
 
     except Exception as e:
         logger.error(f"Error fetching and queuing posts for page {page_id}: {str(e)}")
         return False
 
-async def fetch_and_queue_comments_service(post_id: str, settings) -> bool:
-    """Service function to fetch Facebook comments and queue them for processing"""
+def comment_page_params(settings) -> Dict[str, Any]:
+    return {
+        "fields": "id,from,message,created_time",
+        "order": "reverse_chronological",
+        "limit": settings.COMMENT_SYNC_PAGE_SIZE
+    }
+
+async def fetch_and_queue_comments_service(post_id: str, settings, client: Optional[httpx.AsyncClient] = None) -> bool:
+    """Service function to fetch the comments posted since the last sync and queue them for processing"""
+    return await sync_comments(post_id, settings, client) is not None
+
+async def fetch_and_queue_comments_batch_service(post_ids: List[str], settings, client: Optional[httpx.AsyncClient] = None) -> Dict[str, bool]:
+    """Same as fetch_and_queue_comments_service for up to 50 posts read with one Graph API batch request"""
+    results = await sync_comments_batch(post_ids, settings, client)
+    return {post_id: new_comments is not None for post_id, new_comments in results.items()}
+
+async def sync_comments(post_id: str, settings, client: Optional[httpx.AsyncClient] = None,
+                        first_page: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Fetch the comments posted since the last sync and queue them for processing.
+    A post without a cursor (first sync, or cursors kept in memory and lost on restart)
+    only has its newest page read, so history is not queued again for ordering.
+    Returns how many new comments the post had, or None when the sync failed.
+    first_page, when given, is the already fetched first page (from a batch request)."""
+    client = client or get_http_client(settings)
+
     try:
+        cursors = get_comment_cursors(settings)
+        # Cursors and the dedupe may read and write Redis, which blocks; keep them off the event loop
+        cursor = await asyncio.to_thread(cursors.get, post_id)
+
         url = f"{settings.FACEBOOK_BASE_URL}/{post_id}/comments"
-        params = {
-            "access_token": settings.FACEBOOK_PAGE_ACCESS_TOKEN,
-            "fields": "id,from,message,created_time",
-            "order": "reverse_chronological",
-            "limit": 10
-        }
+        params = {"access_token": settings.FACEBOOK_PAGE_ACCESS_TOKEN, **comment_page_params(settings)}
 
-        print("[comment] url", url)
-        print("[comment] params", params)
+        # Newest first; stop at the first comment the cursor already covers
+        new_comments = []
+        reached_cursor = False
+        pages = 0
+        data = first_page
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+        while url and pages < settings.COMMENT_SYNC_MAX_PAGES:
+            if data is None:
+                response = await client.get(url, params=params)
+                response.raise_for_status()
 
-            data = response.json()
+                data = response.json()
 
             if "error" in data:
                 logger.error(f"Facebook API Error for post {post_id}: {data['error'].get('message', 'Unknown error')}")
-                return False
-
-            queue = Queue(
-                host=settings.QUEUE_HOST,
-                username=settings.QUEUE_USER,
-                password=settings.QUEUE_PASS
-            )
-            queue.connect()
+                return None
 
-            comments = []
+            pages += 1
             for comment in data.get("data", []):
-                comment_data = {
-                    "id": comment.get("id"),
-                    "message": comment.get("message", ""),
-                    "created_time": comment.get("created_time"),
-                    "from_name": comment.get("from", {}).get("name", "UNKNOWN") if comment.get("from") else "UNKNOWN",
-                    "from_id": comment.get("from", {}).get("id") if comment.get("from") else "0000000000000999",
-                    "post_id": post_id,
-                    "type": "text"
-                }
-
-                comments.append(comment_data)
-
-            print("[comment] comments", json.dumps(comments, indent=4))
-
-            if comments:
-                for comment in comments:
-                    queue.publish("facebook_comments", comment)
-
-                logger.info(f"Successfully fetched and queued {len(comments)} comments for post {post_id}")
-                return True
-            else:
-                logger.info(f"No comments found for post {post_id}")
-                return True
+                if is_synced(comment, cursor):
+                    reached_cursor = True
+                    break
+                new_comments.append(comment)
+
+            # Without a cursor the newest page starts one; older pages are history
+            if reached_cursor or not cursor:
+                break
+
+            # paging.next already carries the token and the query parameters
+            url = data.get("paging", {}).get("next")
+            params = None
+            data = None
+
+        if cursor and not reached_cursor and url:
+            logger.warning(f"Comment sync for post {post_id} stopped after {pages} pages before reaching the last synced comment")
+
+        comments = []
+        for comment in reversed(new_comments):
+            comment_data = {
+                "id": comment.get("id"),
+                "message": comment.get("message", ""),
+                "created_time": comment.get("created_time"),
+                "from_name": comment.get("from", {}).get("name", "UNKNOWN") if comment.get("from") else "UNKNOWN",
+                "from_id": comment.get("from", {}).get("id") if comment.get("from") else "0000000000000999",
+                "post_id": post_id,
+                "type": "text"
+            }
+
+            comments.append(comment_data)
+
+        fetched = len(comments)
+        comments = await asyncio.to_thread(unseen_comments, comments, settings)
+        if fetched - len(comments):
+            logger.info(f"Skipped {fetched - len(comments)} already published comments for post {post_id}")
+
+        if comments:
+            # Publishing blocks on RabbitMQ, keep it off the event loop so other posts keep polling
+            await asyncio.to_thread(publish_comments, comments, settings)
+            await asyncio.to_thread(mark_published_comments, comments, settings)
+
+            logger.info(f"Successfully fetched and queued {len(comments)} new comments for post {post_id} from {pages} pages")
+        else:
+            logger.info(f"No new comments found for post {post_id}")
+
+        if new_comments:
+            await asyncio.to_thread(cursors.set, post_id, advance(cursor, new_comments))
+        return len(new_comments)
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error fetching comments for post {post_id}: {e.response.text}")
-        return False
+        return None
     except httpx.RequestError as e:
         logger.error(f"Request error fetching comments for post {post_id}: {str(e)}")
-        return False
+        return None
     except Exception as e:
         logger.error(f"Unexpected error fetching comments for post {post_id}: {str(e)}")
-        return False
\ No newline at end of file
+        return None
+
+async def sync_comments_batch(post_ids: List[str], settings, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Optional[int]]:
+    """Read the first comment page of up to 50 posts with one Graph API batch request,
+    then sync each post from its own page. Returns the sync_comments result per post."""
+    client = client or get_http_client(settings)
+
+    if len(post_ids) > GRAPH_BATCH_LIMIT:
+        raise ValueError(f"A Graph API batch holds at most {GRAPH_BATCH_LIMIT} requests, got {len(post_ids)}")
+
+    try:
+        query = urlencode(comment_page_params(settings))
+        batch = [{"method": "GET", "relative_url": f"{post_id}/comments?{query}"} for post_id in post_ids]
+
+        response = await client.post(
+            f"{settings.FACEBOOK_BASE_URL}/",
+            data={
+                "access_token": settings.FACEBOOK_PAGE_ACCESS_TOKEN,
+                "include_headers": "false",
+                "batch": json.dumps(batch)
+            },
+            timeout=request_timeout(settings, settings.HTTP_BATCH_TIMEOUT)
+        )
+        response.raise_for_status()
+
+        responses = response.json()
+        if isinstance(responses, dict) and "error" in responses:
+            logger.error(f"Facebook API Error for comments batch of {len(post_ids)} posts: {responses['error'].get('message', 'Unknown error')}")
+            return {post_id: None for post_id in post_ids}
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error fetching comments batch of {len(post_ids)} posts: {e.response.text}")
+        return {post_id: None for post_id in post_ids}
+    except httpx.RequestError as e:
+        logger.error(f"Request error fetching comments batch of {len(post_ids)} posts: {str(e)}")
+        return {post_id: None for post_id in post_ids}
+
+    async def sync_post(post_id: str, item: Optional[Dict[str, Any]]) -> Optional[int]:
+        # Entries are null when Facebook timed the request out inside the batch
+        if not item or item.get("code") != 200:
+            logger.error(f"Batched comments request failed for post {post_id}: {item.get('body') if item else 'no response'}")
+            return None
+        return await sync_comments(post_id, settings, client, first_page=json.loads(item["body"]))
+
+    results = await asyncio.gather(*(sync_post(post_id, item) for post_id, item in zip(post_ids, responses)))
+    return dict(zip(post_ids, results))
+
+def publish_comments(comments: List[Dict[str, Any]], settings):
+    """Publish comments to the comment worker queue."""
+    publish_messages("facebook_comments", comments, settings)
+
+def publish_messages(queue_name: str, messages: List[Dict[str, Any]], settings):
+    """Publish a batch over the shared publisher and wait once for the broker's confirms."""
+    connect_queue(settings).publish_many(queue_name, messages)
@@ -0,0 +1,115 @@
+from app.core.config import connect_queue, get_settings
+from typing import Any, Callable, Dict, List, Optional
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDispatcher:
+    """Bounded in-process queue between a webhook endpoint and RabbitMQ.
+
+    The endpoint only submits the received body and returns, so Facebook's
+    webhook deadline never waits on the broker. A background task drains the
+    queue, turns every body it can take at once into messages with `extract`,
+    and publishes them to `queue_name` in one confirmed batch. `on_published`,
+    when given, is called with each batch once the broker has confirmed it.
+    """
+
+    def __init__(self, queue_name: str, extract: Callable[[Any], List[Dict[str, Any]]],
+                 on_published: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.settings = get_settings()
+        self.queue_name = queue_name
+        self.extract = extract
+        self.on_published = on_published
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.settings.WEBHOOK_QUEUE_SIZE)
+        self.task: Optional[asyncio.Task] = None
+        self.stats_counters = {"accepted": 0, "rejected": 0, "published": 0, "failed": 0}
+
+    def submit(self, body: Any) -> bool:
+        """Queue a webhook body for publishing; False when the queue is full."""
+        try:
+            self.queue.put_nowait(body)
+        except asyncio.QueueFull:
+            self.stats_counters["rejected"] += 1
+            return False
+
+        self.stats_counters["accepted"] += 1
+        return True
+
+    def full(self) -> bool:
+        return self.queue.full()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Webhook dispatcher started for {self.queue_name}")
+
+    async def stop(self):
+        """Publish what is still queued, up to WEBHOOK_DRAIN_TIMEOUT seconds, then stop."""
+        if self.task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=self.settings.WEBHOOK_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Webhook dispatcher stopped with {self.queue.qsize()} bodies not published")
+
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        # The queue is tied to this event loop once the task has waited on it
+        self.queue = asyncio.Queue(maxsize=self.settings.WEBHOOK_QUEUE_SIZE)
+        logger.info(f"Webhook dispatcher stopped for {self.queue_name}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counters,
+            "queued": self.queue.qsize(),
+            "max_size": self.queue.maxsize,
+            "running": self.task is not None and not self.task.done(),
+        }
+
+    async def _run(self):
+        while True:
+            bodies = [await self.queue.get()]
+            while len(bodies) < self.settings.WEBHOOK_BATCH_SIZE and not self.queue.empty():
+                bodies.append(self.queue.get_nowait())
+
+            try:
+                await self._publish(bodies)
+            finally:
+                for _ in bodies:
+                    self.queue.task_done()
+
+    def _extract(self, bodies: List[Any]) -> List[Dict[str, Any]]:
+        messages = []
+        for body in bodies:
+            try:
+                messages.extend(self.extract(body))
+            except Exception as e:
+                logger.error(f"Error extracting webhook messages: {e}", exc_info=True)
+        return messages
+
+    async def _publish(self, bodies: List[Any]):
+        # extract and on_published may wait on Redis (the comment dedupe), keep them off the event loop
+        messages = await asyncio.to_thread(self._extract, bodies)
+
+        if not messages:
+            return
+
+        try:
+            # The queue client blocks, keep it off the event loop
+            await asyncio.to_thread(connect_queue(self.settings).publish_many, self.queue_name, messages)
+            self.stats_counters["published"] += len(messages)
+            logger.info(f"Published {len(messages)} webhook messages to {self.queue_name}")
+            if self.on_published:
+                await asyncio.to_thread(self.on_published, messages)
+        except Exception as e:
+            self.stats_counters["failed"] += len(messages)
+            logger.error(f"Failed to publish {len(messages)} webhook messages to {self.queue_name} "
+                         f"({', '.join(str(message.get('id')) for message in messages)}): {e}")
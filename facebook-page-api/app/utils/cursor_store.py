@@ -0,0 +1,77 @@
+from .logging import log_message
+from .redis import Redis
+from typing import Any, Dict, Optional
+
+import json
+import threading
+
+class CommentCursorStore:
+    """High-water mark of the comments already synced, one per post.
+
+    A cursor is the newest created_time seen plus the ids of the comments at
+    that exact second, since several comments can share one timestamp. With a
+    Redis connection the cursors live in one hash and survive restarts;
+    otherwise they are kept in memory only, and after a restart each post
+    starts again from its newest page of comments.
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, key: str = "comments:cursors"):
+        self.redis = redis
+        self.key = key
+        self._cursors: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, post_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._cursors.get(post_id)
+        if cursor is not None or self.redis is None or self.redis.client is None:
+            return cursor
+
+        try:
+            stored = self.redis.client.hget(self.key, post_id)
+        except Exception as e:
+            log_message("CommentCursorStore", "warning", f"Redis read failed for post {post_id}: {e}")
+            return None
+
+        if stored is None:
+            return None
+
+        cursor = json.loads(stored)
+        with self._lock:
+            self._cursors[post_id] = cursor
+        return cursor
+
+    def set(self, post_id: str, cursor: Dict[str, Any]):
+        with self._lock:
+            self._cursors[post_id] = cursor
+
+        if self.redis is not None and self.redis.client is not None:
+            try:
+                self.redis.client.hset(self.key, post_id, json.dumps(cursor))
+            except Exception as e:
+                log_message("CommentCursorStore", "warning", f"Redis write failed for post {post_id}: {e}")
+
+
+def is_synced(comment: Dict[str, Any], cursor: Optional[Dict[str, Any]]) -> bool:
+    """Whether a comment is at or behind the cursor. Graph API created_time is always UTC
+    (YYYY-MM-DDTHH:MM:SS+0000), so the strings compare in time order."""
+    if not cursor:
+        return False
+
+    created_time = comment.get("created_time") or ""
+    if created_time != cursor["created_time"]:
+        return created_time < cursor["created_time"]
+    return comment.get("id") in cursor["comment_ids"]
+
+
+def advance(cursor: Optional[Dict[str, Any]], comments: list) -> Optional[Dict[str, Any]]:
+    """Move the cursor to the newest of comments (given newest first)."""
+    if not comments:
+        return cursor
+
+    newest = comments[0].get("created_time")
+    comment_ids = [comment.get("id") for comment in comments if comment.get("created_time") == newest]
+    if cursor and cursor["created_time"] == newest:
+        comment_ids = list(dict.fromkeys(cursor["comment_ids"] + comment_ids))
+
+    return {"created_time": newest, "comment_ids": comment_ids}
@@ -0,0 +1,135 @@
+from .logging import log_message
+from typing import Any, Dict, Mapping, Optional
+
+import json
+import threading
+import time
+
+USAGE_HEADERS = ("x-app-usage", "x-page-usage", "x-business-use-case-usage")
+USAGE_METRICS = ("call_count", "total_cputime", "total_time")
+
+# Estimate shared by every Graph API response, created with the HTTP client
+graph_usage: Optional["GraphUsage"] = None
+
+
+class GraphUsage:
+    """How much of the Graph API rate limit we have used, from the usage headers on each response.
+
+    X-App-Usage and X-Page-Usage report call_count, total_cputime and total_time
+    as a percentage of the limit; X-Business-Use-Case-Usage reports the same per
+    business and use case, with estimated_time_to_regain_access (minutes) once a
+    limit is hit. Usage is the highest of those percentages, trusted for
+    `stale_after` seconds since Facebook's windows keep rolling.
+
+    Pollers are slowed first: below `slow_at` percent they run freely, from
+    there the gap between their runs grows to `max_poll_delay` at `stop_at`, and
+    beyond it (or while access is blocked) they do not run. That leaves the
+    remaining budget to customer-facing sends, which are never held back here.
+    """
+
+    def __init__(self, slow_at: float = 50.0, stop_at: float = 85.0, max_poll_delay: float = 300.0, stale_after: float = 300.0):
+        self.slow_at = float(slow_at)
+        self.stop_at = float(stop_at)
+        self.max_poll_delay = float(max_poll_delay)
+        self.stale_after = float(stale_after)
+        self.headers: Dict[str, Dict[str, Any]] = {}
+        self.skipped_polls: Dict[str, int] = {}
+        self._usage = 0.0
+        self._updated_at: Optional[float] = None
+        self._blocked_until = 0.0
+        self._last_polls: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, headers: Mapping[str, str]):
+        """Update the estimate from a response's headers; responses without usage headers leave it as it is."""
+        found = {}
+        for name in USAGE_HEADERS:
+            value = headers.get(name)
+            if not value:
+                continue
+            try:
+                found[name] = json.loads(value)
+            except ValueError:
+                log_message("GraphUsage", "warning", f"Ignoring malformed {name} header: {value}")
+
+        if not found:
+            return
+
+        usage, regain_minutes = 0.0, 0.0
+        for name, value in found.items():
+            # The business use case header nests one list of use cases per business id
+            entries = [entry for use_cases in value.values() for entry in use_cases] if name == "x-business-use-case-usage" else [value]
+            for entry in entries:
+                usage = max([usage] + [float(entry.get(metric) or 0) for metric in USAGE_METRICS])
+                regain_minutes = max(regain_minutes, float(entry.get("estimated_time_to_regain_access") or 0))
+
+        now = time.monotonic()
+        with self._lock:
+            self.headers.update(found)
+            self._usage = usage
+            self._updated_at = now
+            if regain_minutes:
+                self._blocked_until = max(self._blocked_until, now + regain_minutes * 60)
+
+        if usage >= self.slow_at:
+            log_message("GraphUsage", "warning", f"Graph API usage at {usage:.0f}% of the rate limit")
+
+    def usage(self) -> float:
+        """Latest usage percentage, 0 once the last report is older than stale_after."""
+        if self._updated_at is None or time.monotonic() - self._updated_at > self.stale_after:
+            return 0.0
+        return self._usage
+
+    def blocked_for(self) -> float:
+        """Seconds until Facebook said access comes back, 0 when not blocked."""
+        return max(self._blocked_until - time.monotonic(), 0.0)
+
+    def poll_delay(self) -> Optional[float]:
+        """Minimum seconds between a poller's runs at the current usage; None when pollers must not run."""
+        usage = self.usage()
+        if self.blocked_for() or usage >= self.stop_at:
+            return None
+        if usage < self.slow_at:
+            return 0.0
+        return self.max_poll_delay * (usage - self.slow_at) / (self.stop_at - self.slow_at)
+
+    def poll_allowed(self, poller: str) -> bool:
+        """Whether `poller` may run now; its run is recorded when it may."""
+        delay = self.poll_delay()
+        now = time.monotonic()
+        with self._lock:
+            last_poll = self._last_polls.get(poller)
+            if delay is None or (last_poll is not None and now - last_poll < delay):
+                self.skipped_polls[poller] = self.skipped_polls.get(poller, 0) + 1
+                return False
+            self._last_polls[poller] = now
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        delay = self.poll_delay()
+        return {
+            "usage": self.usage(),
+            "age": round(time.monotonic() - self._updated_at, 3) if self._updated_at is not None else None,
+            "blocked_for": round(self.blocked_for(), 3),
+            "poll_delay": round(delay, 3) if delay is not None else None,
+            "polling": "stopped" if delay is None else "slowed" if delay else "normal",
+            "slow_at": self.slow_at,
+            "stop_at": self.stop_at,
+            "skipped_polls": dict(self.skipped_polls),
+            "headers": dict(self.headers),
+        }
+
+
+def get_graph_usage(settings=None) -> GraphUsage:
+    global graph_usage
+    if graph_usage is None:
+        if settings is None:
+            from app.core.config import get_settings
+            settings = get_settings()
+        graph_usage = GraphUsage(
+            slow_at=settings.GRAPH_USAGE_SLOW_AT,
+            stop_at=settings.GRAPH_USAGE_STOP_AT,
+            max_poll_delay=settings.GRAPH_USAGE_MAX_POLL_DELAY,
+            stale_after=settings.GRAPH_USAGE_STALE_AFTER
+        )
+    return graph_usage
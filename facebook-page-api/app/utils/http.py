@@ -0,0 +1,90 @@
+import httpx
+import importlib.util
+from typing import Any, Dict, Optional
+from .graph_usage import get_graph_usage
+from .logging import log_message
+
+# Application-wide Graph API client, created in the app lifespan
+client: Optional[httpx.AsyncClient] = None
+requests_sent = 0
+
+
+def create_http_client(settings) -> httpx.AsyncClient:
+    """Pooled keep-alive client for every Graph API call; HTTP/2 when enabled and h2 is installed.
+    Every response updates the Graph API usage estimate."""
+    global client
+
+    http2 = settings.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+    if settings.HTTP2_ENABLED and not http2:
+        log_message("HTTP", "warning", "HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=request_timeout(settings, settings.HTTP_READ_TIMEOUT),
+        http2=http2,
+        event_hooks={"request": [_count_request], "response": [_record_usage(get_graph_usage(settings))]}
+    )
+    log_message("HTTP", "debug", f"HTTP client created (max {settings.HTTP_MAX_CONNECTIONS} connections, http2={http2})")
+    return client
+
+
+def get_http_client(settings=None) -> httpx.AsyncClient:
+    """The shared client; created on first use when the app lifespan did not create it (scripts, tests)."""
+    if client is None or client.is_closed:
+        if settings is None:
+            from app.core.config import get_settings
+            settings = get_settings()
+        return create_http_client(settings)
+    return client
+
+
+async def close_http_client():
+    global client
+    if client is not None:
+        await client.aclose()
+        client = None
+        log_message("HTTP", "debug", "HTTP client closed.")
+
+
+def request_timeout(settings, seconds: float) -> httpx.Timeout:
+    """Timeout for one kind of request: its own read/write budget, the shared connect and pool limits."""
+    return httpx.Timeout(seconds, connect=settings.HTTP_CONNECT_TIMEOUT, pool=settings.HTTP_POOL_TIMEOUT)
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    """Connection pool utilization of the shared client."""
+    if client is None or client.is_closed:
+        return {"open": False, "requests": requests_sent}
+
+    # httpx does not expose its pool, read httpcore's
+    pool = getattr(client._transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    waiting = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+
+    return {
+        "open": True,
+        "http2": getattr(pool, "_http2", False),
+        "max_connections": getattr(pool, "_max_connections", None),
+        "max_keepalive_connections": getattr(pool, "_max_keepalive_connections", None),
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "waiting": waiting,
+        "requests": requests_sent,
+    }
+
+
+async def _count_request(request: httpx.Request):
+    global requests_sent
+    requests_sent += 1
+
+
+def _record_usage(usage):
+    async def record(response: httpx.Response):
+        usage.record(response.headers)
+    return record
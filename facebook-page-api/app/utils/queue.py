@@ -1,6 +1,8 @@
 import pika
 import json
+import threading
 import time
+from typing import Any, Dict, Iterable, List
 from .logging import log_message
 
 class Queue:
@@ -13,6 +15,7 @@ class Queue:
         self.reconnect_delay = reconnect_delay
         self.consumer_active = True
         self.publisher_active = False
+        self.declared = set()
 
     def connect(self):
         """Establishes a connection to RabbitMQ with retries."""
@@ -26,6 +29,7 @@ class Queue:
 
                 self.connection = pika.BlockingConnection(params)
                 self.channel = self.connection.channel()
+                self.declared = set()
 
                 log_message("Queue", "debug", "Connected to RabbitMQ.")
                 return
@@ -48,7 +52,9 @@ class Queue:
             self.ensure_connection()
             log_message("Queue", "debug", "Consumer temporarily paused after publishing.")
 
-            self.channel.queue_declare(queue=queue_name, durable=True)
+            if queue_name not in self.declared:
+                self.channel.queue_declare(queue=queue_name, durable=True)
+                self.declared.add(queue_name)
 
             if queue_name != "temp_queue":
                 self.channel.basic_publish(
@@ -59,7 +65,6 @@ class Queue:
                 )
                 log_message("Queue", "info", f"Published to {queue_name}: {msg}")
 
-            time.sleep(1)
             self.consumer_active = True
             self.publisher_active = False
             log_message("Queue", "debug", "Consumer resumed after publishing.")
@@ -106,4 +111,182 @@ class Queue:
         """Closes the RabbitMQ connection gracefully."""
         if self.connection and not self.connection.is_closed:
             self.connection.close()
-            log_message("Queue", "debug", "RabbitMQ connection closed.")
\ No newline at end of file
+            log_message("Queue", "debug", "RabbitMQ connection closed.")
+
+class PublishError(Exception):
+    pass
+
+
+class Publisher:
+    """Publishes with publisher confirms over one connection and channel per thread.
+
+    BlockingConnection is not thread-safe, so every thread that publishes opens
+    its own and keeps it. Queues are declared once per channel. publish_many
+    writes the whole batch before waiting, then waits once for the broker to
+    confirm all of it; nacked or unconfirmed messages are published again.
+    """
+
+    def __init__(self, host, username, password, confirm_timeout=30, retries=3, reconnect_delay=1):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.confirm_timeout = confirm_timeout
+        self.retries = retries
+        self.reconnect_delay = reconnect_delay
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "batches": 0, "nacked": 0, "retries": 0}
+
+    def publish(self, queue_name: str, msg: Dict[str, Any]):
+        self.publish_many(queue_name, [msg])
+
+    def publish_many(self, queue_name: str, messages: Iterable[Dict[str, Any]]) -> int:
+        """Publish messages in order and return once the broker has confirmed all of them.
+        Raises PublishError when they are still not confirmed after the retries."""
+        pending = list(messages)
+        if not pending:
+            return 0
+
+        total = len(pending)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries", 1)
+                time.sleep(self.reconnect_delay)
+
+            try:
+                pending = self._publish_confirmed(queue_name, pending)
+            except Exception as e:
+                log_message("Queue", "error", f"Publish to {queue_name} failed: {e}. Reconnecting...")
+                pending = self._disconnect() or pending
+                continue
+
+            if not pending:
+                self._count("published", total)
+                self._count("batches", 1)
+                log_message("Queue", "debug", f"Published {total} messages to {queue_name}")
+                return total
+
+            self._count("nacked", len(pending))
+            log_message("Queue", "warning", f"Broker nacked {len(pending)} messages to {queue_name}, publishing them again")
+
+        raise PublishError(f"{len(pending)} of {total} messages to {queue_name} were not confirmed")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "connections": len(self._connections)}
+
+    def close(self):
+        """Close every thread's connection; call once publishing has stopped."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        for connection in connections:
+            try:
+                if connection.is_open:
+                    connection.close()
+            except Exception as e:
+                log_message("Queue", "warning", f"Error closing RabbitMQ connection: {e}")
+        self._local = threading.local()
+
+    def _publish_confirmed(self, queue_name: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Pipeline messages and wait for their confirms; returns the nacked ones."""
+        local = self._channel()
+        if queue_name not in local.declared:
+            local.channel.queue_declare(queue=queue_name, durable=True)
+            local.declared.add(queue_name)
+
+        # Delivery tags count up from 1 per channel in confirm mode
+        local.nacked = []
+        for offset, message in enumerate(messages, start=1):
+            local.unconfirmed[local.delivery_tag + offset] = message
+        local.delivery_tag += len(messages)
+
+        for message in messages:
+            local.channel.basic_publish(
+                exchange='',
+                routing_key=queue_name,
+                body=json.dumps(message),
+                properties=pika.BasicProperties(delivery_mode=2)
+            )
+
+        deadline = time.monotonic() + self.confirm_timeout
+        while local.unconfirmed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{len(local.unconfirmed)} messages not confirmed after {self.confirm_timeout}s")
+            local.connection.process_data_events(time_limit=min(remaining, 1))
+
+        return local.nacked
+
+    def _channel(self):
+        local = self._local
+        if getattr(local, "channel", None) is not None and local.channel.is_open and local.connection.is_open:
+            return local
+
+        log_message("Queue", "debug", "Connecting publisher to RabbitMQ...")
+        params = pika.ConnectionParameters(
+            host=self.host,
+            credentials=pika.PlainCredentials(self.username, self.password)
+        )
+        connection = pika.BlockingConnection(params)
+        channel = connection.channel()
+
+        local.connection = connection
+        local.channel = channel
+        local.declared = set()
+        local.unconfirmed = {}
+        local.nacked = []
+        local.delivery_tag = 0
+
+        # Confirm mode on the underlying channel: BlockingChannel.confirm_delivery would
+        # make basic_publish wait for every single confirm, here they are collected instead
+        selected = []
+        channel._impl.confirm_delivery(
+            ack_nack_callback=lambda frame: self._on_confirm(local, frame.method),
+            callback=selected.append
+        )
+        while not selected:
+            connection.process_data_events(time_limit=1)
+
+        with self._lock:
+            self._connections.append(connection)
+        log_message("Queue", "debug", "Publisher connected to RabbitMQ.")
+        return local
+
+    def _on_confirm(self, local, method):
+        if method.multiple:
+            tags = [tag for tag in local.unconfirmed if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+
+        for tag in tags:
+            message = local.unconfirmed.pop(tag, None)
+            if message is not None and isinstance(method, pika.spec.Basic.Nack):
+                local.nacked.append(message)
+
+    def _disconnect(self) -> List[Dict[str, Any]]:
+        """Drop this thread's connection; returns the messages it left unconfirmed."""
+        local = self._local
+        connection = getattr(local, "connection", None)
+        unconfirmed = getattr(local, "nacked", []) + list(getattr(local, "unconfirmed", {}).values())
+        local.channel = None
+        local.connection = None
+        local.unconfirmed = {}
+        local.nacked = []
+        if connection is None:
+            return unconfirmed
+
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            if connection.is_open:
+                connection.close()
+        except Exception:
+            pass
+        return unconfirmed
+
+    def _count(self, key: str, amount: int):
+        with self._lock:
+            self._stats[key] += amount
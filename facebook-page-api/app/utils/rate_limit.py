@@ -0,0 +1,56 @@
+from typing import Any, Dict
+
+import asyncio
+import time
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens a second, bursting up to `capacity`.
+
+    acquire() waits until a token is available, so callers sharing a bucket
+    never go over the rate together. pause() empties the bucket for a while,
+    for when the remote side reports it is already over its limit.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = max(int(capacity), 1)
+        self.tokens = float(self.capacity)
+        self.waits = 0
+        self.waited = 0.0
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # One waiter at a time, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                delay = max(self._paused_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 1.0)
+                self.waits += 1
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "paused_for": round(max(self._paused_until - time.monotonic(), 0.0), 3),
+            "waits": self.waits,
+            "waited": round(self.waited, 3),
+        }
+
+    def _refill(self, now: float):
+        self.tokens = min(self.tokens + (now - self._refilled_at) * self.rate, self.capacity)
+        self._refilled_at = now
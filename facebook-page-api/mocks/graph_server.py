@@ -0,0 +1,119 @@
+"""Stub of the Graph API comment and Send API endpoints for tests and benchmarks.
+
+Serves GET /{version}/{post_id}/comments (reverse chronological, cursor paging)
+and the batch endpoint POST /{version}/ from in-memory comments, and accepts
+Messenger sends on POST /{version}/me/messages. Every request can be delayed by
+`latency` seconds to stand in for the network round trip. With `send_rate`,
+sends beyond that many a second are refused with the Send API throttling error.
+
+    poetry run uvicorn mocks.graph_server:app --port 8090
+    FACEBOOK_BASE_URL=http://localhost:8090/v23.0
+"""
+
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import asyncio
+import json
+import time
+
+
+def create_app(comments: Optional[Dict[str, List[Dict[str, Any]]]] = None, latency: float = 0.0,
+               send_rate: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="Graph API stub")
+    # Newest first per post, as the comments edge returns them with order=reverse_chronological
+    app.state.comments = comments if comments is not None else {}
+    app.state.latency = latency
+    app.state.requests = 0
+    app.state.batch_requests = 0
+    app.state.send_rate = send_rate
+    app.state.sent = []
+    app.state.throttled = 0
+    app.state.send_window = {"second": 0, "count": 0}
+
+    def list_comments(base_url: str, post_id: str, params: Dict[str, str]) -> Dict[str, Any]:
+        if post_id not in app.state.comments:
+            return {"error": {"message": f"Unsupported get request. Object with ID '{post_id}' does not exist", "code": 100}}
+
+        limit = int(params.get("limit", 25))
+        offset = int(params.get("after", 0))
+        page = app.state.comments[post_id][offset:offset + limit]
+
+        result: Dict[str, Any] = {"data": page, "paging": {"cursors": {"before": str(offset), "after": str(offset + len(page))}}}
+        if offset + limit < len(app.state.comments[post_id]):
+            next_params = {**params, "after": str(offset + limit)}
+            result["paging"]["next"] = f"{base_url}/{post_id}/comments?{urlencode(next_params)}"
+        return result
+
+    @app.get("/{version}/{post_id}/comments")
+    async def get_comments(version: str, post_id: str, request: Request):
+        app.state.requests += 1
+        await asyncio.sleep(app.state.latency)
+
+        base_url = f"{str(request.base_url).rstrip('/')}/{version}"
+        result = list_comments(base_url, post_id, dict(request.query_params))
+        return JSONResponse(result, status_code=400 if "error" in result else 200)
+
+    @app.post("/{version}/me/messages")
+    async def send_message(version: str, request: Request):
+        app.state.requests += 1
+        await asyncio.sleep(app.state.latency)
+
+        window = app.state.send_window
+        second = int(time.monotonic())
+        if window["second"] != second:
+            window.update(second=second, count=0)
+        window["count"] += 1
+        if app.state.send_rate is not None and window["count"] > app.state.send_rate:
+            app.state.throttled += 1
+            return JSONResponse({"error": {"message": "Calls to this api have exceeded the rate limit.", "code": 613}}, status_code=400)
+
+        body = await request.json()
+        app.state.sent.append(body)
+        return JSONResponse({"recipient_id": body["recipient"]["id"], "message_id": f"mid.{len(app.state.sent)}"})
+
+    @app.post("/{version}/")
+    @app.post("/{version}")
+    async def batch(version: str, request: Request, batch: str = Form(...)):
+        app.state.requests += 1
+        app.state.batch_requests += 1
+        await asyncio.sleep(app.state.latency)
+
+        requests = json.loads(batch)
+        if len(requests) > 50:
+            return JSONResponse({"error": {"message": "Too many requests in batch message. Maximum batch size is 50", "code": 1}}, status_code=400)
+
+        base_url = f"{str(request.base_url).rstrip('/')}/{version}"
+        responses = []
+        for item in requests:
+            url = urlsplit(item["relative_url"])
+            post_id = url.path.strip("/").split("/")[0]
+            result = list_comments(base_url, post_id, dict(parse_qsl(url.query)))
+            responses.append({"code": 400 if "error" in result else 200, "headers": [], "body": json.dumps(result)})
+
+        return JSONResponse(responses)
+
+    return app
+
+
+def generate_comments(post_ids: List[str], per_post: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Comments for each post, newest first, one second apart."""
+    started_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    comments = {}
+    for post_id in post_ids:
+        comments[post_id] = [
+            {
+                "id": f"{post_id}_{index}",
+                "message": f"CF A{index % 10}",
+                "created_time": (started_at + timedelta(seconds=index)).strftime("%Y-%m-%dT%H:%M:%S+0000"),
+                "from": {"id": f"user_{index}", "name": f"User {index}"},
+            }
+            for index in reversed(range(per_post))
+        ]
+    return comments
+
+
+app = create_app(generate_comments([f"post_{index}" for index in range(100)], per_post=20), latency=0.05)
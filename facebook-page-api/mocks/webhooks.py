@@ -0,0 +1,54 @@
+"""Page webhook payloads, shaped like the ones Facebook delivers, for tests and the webhook replayer.
+
+feed_webhook wraps feed changes (new comments) and messaging_webhook wraps
+Messenger events into the body Facebook POSTs to the webhook endpoint.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import time
+
+
+def comment_change(post_id: str, comment_id: str, message: str, created_time: Optional[int] = None,
+                   from_id: str = "user_1", from_name: str = "User 1", verb: str = "add",
+                   parent_id: Optional[str] = None) -> Dict[str, Any]:
+    """A feed change for a comment; parent_id defaults to the post (a top-level comment)."""
+    return {
+        "field": "feed",
+        "value": {
+            "from": {"id": from_id, "name": from_name},
+            "post": {"id": post_id, "status_type": "added_video", "is_published": True},
+            "message": message,
+            "post_id": post_id,
+            "comment_id": comment_id,
+            "created_time": created_time if created_time is not None else int(time.time()),
+            "item": "comment",
+            "parent_id": parent_id or post_id,
+            "verb": verb,
+        },
+    }
+
+
+def feed_webhook(page_id: str, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "object": "page",
+        "entry": [{"id": page_id, "time": int(time.time()), "changes": changes}],
+    }
+
+
+def messaging_webhook(page_id: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "object": "page",
+        "entry": [{"id": page_id, "time": int(time.time() * 1000), "messaging": events}],
+    }
+
+
+def generate_comment_webhooks(page_id: str, post_id: str, count: int, per_body: int = 1) -> List[Dict[str, Any]]:
+    """count new comments on post_id, per_body comments to a webhook body, one second apart."""
+    started_at = int(time.time())
+    changes = [
+        comment_change(post_id, f"{post_id.split('_')[-1]}_{index}", f"CF A{index % 10}", started_at + index,
+                       from_id=f"user_{index}", from_name=f"User {index}")
+        for index in range(count)
+    ]
+    return [feed_webhook(page_id, changes[index:index + per_body]) for index in range(0, count, per_body)]
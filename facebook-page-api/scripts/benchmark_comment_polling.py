@@ -0,0 +1,108 @@
+"""Compare one-request-per-post comment polling with Graph API batch polling.
+
+Starts the stub Graph server (mocks/graph_server.py) on a local port with an
+artificial per-request latency, then polls the same posts in both modes and
+reports the tick duration and the number of HTTP requests sent. Publishing is
+replaced by a counter so RabbitMQ is not needed.
+
+    poetry run python scripts/benchmark_comment_polling.py --posts 200 --latency 0.08 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import uvicorn
+
+import app.services.facebook_services as facebook_services
+from app.services.facebook_services import GRAPH_BATCH_LIMIT, fetch_and_queue_comments_batch_service, fetch_and_queue_comments_service
+from mocks.graph_server import create_app, generate_comments
+
+
+def start_stub(posts: int, per_post: int, latency: float, port: int):
+    stub = create_app(generate_comments([f"post_{index}" for index in range(posts)], per_post), latency=latency)
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return stub, server
+
+
+def make_settings(port: int, page_size: int):
+    settings = MagicMock()
+    settings.FACEBOOK_BASE_URL = f"http://127.0.0.1:{port}/v23.0"
+    settings.FACEBOOK_PAGE_ACCESS_TOKEN = "benchmark"
+    settings.COMMENT_SYNC_PAGE_SIZE = page_size
+    settings.COMMENT_SYNC_MAX_PAGES = 10
+    settings.COMMENT_DEDUPE_ENABLED = False
+    settings.COMMENT_CURSOR_REDIS_ENABLED = False
+    return settings
+
+
+async def poll(mode: str, post_ids, settings, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(group):
+        async with semaphore:
+            if mode == "batch":
+                return await fetch_and_queue_comments_batch_service(group, settings, client)
+            return {group[0]: await fetch_and_queue_comments_service(group[0], settings, client)}
+
+    if mode == "batch":
+        groups = [post_ids[index:index + GRAPH_BATCH_LIMIT] for index in range(0, len(post_ids), GRAPH_BATCH_LIMIT)]
+    else:
+        groups = [[post_id] for post_id in post_ids]
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+        outcomes = await asyncio.gather(*(run(group) for group in groups))
+    return sum(success for outcome in outcomes for success in outcome.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=20, help="comments per post")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds added to every stub request")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    stub, server = start_stub(args.posts, args.comments, args.latency, args.port)
+    settings = make_settings(args.port, args.page_size)
+    post_ids = [f"post_{index}" for index in range(args.posts)]
+
+    published = 0
+
+    def count_published(comments, settings):
+        nonlocal published
+        published += len(comments)
+
+    facebook_services.publish_comments = count_published
+
+    print(f"{'mode':<8} {'tick s':>8} {'requests':>9} {'posts ok':>9} {'published':>10}")
+    try:
+        for mode in ("single", "batch"):
+            facebook_services.comment_cursors = None
+            stub.state.requests = 0
+            published = 0
+
+            started_at = time.perf_counter()
+            succeeded = asyncio.run(poll(mode, post_ids, settings, args.concurrency))
+            elapsed = time.perf_counter() - started_at
+
+            print(f"{mode:<8} {elapsed:>8.2f} {stub.state.requests:>9} {succeeded:>9} {published:>10}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
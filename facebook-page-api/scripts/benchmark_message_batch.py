@@ -0,0 +1,118 @@
+"""Compare sequential and concurrent Messenger batch sending.
+
+Starts the stub Graph server (mocks/graph_server.py) on a local port with an
+artificial per-request latency, then sends the same batch one message at a
+time (the old send_message_batch) and through iter_message_batch, which sends
+recipients concurrently within the token bucket. With --send-rate the stub
+refuses sends beyond that many a second, so retries show up in the results.
+
+    poetry run python scripts/benchmark_message_batch.py --messages 500 --recipients 250 --latency 0.08
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import uvicorn
+
+import app.api.v1.endpoints.messengers as messengers
+from app.api.v1.endpoints.messengers import SendTextMessageRequest, iter_message_batch, send_facebook_text_message
+from app.utils.http import close_http_client
+from mocks.graph_server import create_app
+
+
+def start_stub(latency: float, send_rate, port: int):
+    stub = create_app(latency=latency, send_rate=send_rate)
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return stub, server
+
+
+def make_settings(port: int, args):
+    settings = MagicMock()
+    settings.FACEBOOK_BASE_URL = f"http://127.0.0.1:{port}/v23.0"
+    settings.FACEBOOK_PAGE_ACCESS_TOKEN = "benchmark"
+    settings.HTTP_MAX_CONNECTIONS = args.concurrency
+    settings.HTTP_MAX_KEEPALIVE_CONNECTIONS = args.concurrency
+    settings.HTTP_KEEPALIVE_EXPIRY = 30.0
+    settings.HTTP2_ENABLED = False
+    settings.HTTP_CONNECT_TIMEOUT = 5.0
+    settings.HTTP_POOL_TIMEOUT = 30.0
+    settings.HTTP_READ_TIMEOUT = 30.0
+    settings.HTTP_SEND_TIMEOUT = 30.0
+    settings.MESSENGER_SEND_RATE = args.rate
+    settings.MESSENGER_SEND_BURST = args.burst
+    settings.MESSENGER_SEND_CONCURRENCY = args.concurrency
+    settings.MESSENGER_SEND_RETRIES = 3
+    settings.MESSENGER_SEND_BACKOFF = 0.5
+    return settings
+
+
+async def sequential(messages, settings):
+    results = [await send_facebook_text_message(msg.recipient_id, msg.message, settings) for msg in messages]
+    await close_http_client()
+    return sum(result.success for result in results), len(messages)
+
+
+async def concurrent(messages, settings):
+    messengers.send_limiter = None
+    results = [result async for result in iter_message_batch(messages, settings)]
+    await close_http_client()
+    return sum(result["success"] for result in results), sum(result["attempts"] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--recipients", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds added to every stub request")
+    parser.add_argument("--rate", type=float, default=250.0, help="token bucket rate, sends a second")
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--send-rate", type=int, default=None, help="sends a second the stub accepts before throttling")
+    parser.add_argument("--port", type=int, default=8092)
+    args = parser.parse_args()
+
+    stub, server = start_stub(args.latency, args.send_rate, args.port)
+    settings = make_settings(args.port, args)
+    messages = [
+        SendTextMessageRequest(recipient_id=f"user_{index % args.recipients}", message=f"message {index}")
+        for index in range(args.messages)
+    ]
+
+    print(f"{'mode':<11} {'seconds':>8} {'msg/s':>8} {'sent ok':>8} {'attempts':>9} {'throttled':>10}")
+    try:
+        for mode, run in (("sequential", sequential), ("concurrent", concurrent)):
+            stub.state.sent = []
+            stub.state.throttled = 0
+
+            started_at = time.perf_counter()
+            succeeded, attempts = asyncio.run(run(messages, settings))
+            elapsed = time.perf_counter() - started_at
+
+            print(f"{mode:<11} {elapsed:>8.2f} {len(messages) / elapsed:>8.1f} {succeeded:>8} {attempts:>9} {stub.state.throttled:>10}")
+
+        # Per-recipient order as the stub received it
+        order = Counter()
+        for body in stub.state.sent:
+            recipient = body["recipient"]["id"]
+            index = int(body["message"]["text"].split()[-1])
+            assert index // args.recipients == order[recipient], f"{recipient} received message {index} out of order"
+            order[recipient] += 1
+        print("per-recipient order preserved")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure RabbitMQ publish throughput of Queue.publish, Publisher.publish and Publisher.publish_many.
+
+Needs a local broker, e.g. `docker compose up -d queue` from the repository
+root. Messages go to a throwaway queue that is deleted afterwards.
+
+    poetry run python scripts/benchmark_publisher.py --messages 2000 --batch-size 100
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.utils.queue import Publisher, Queue
+
+QUEUE_NAME = "benchmark_publisher"
+
+
+def make_messages(count: int):
+    return [
+        {
+            "id": f"post_1_{index}",
+            "post_id": "post_1",
+            "message": f"CF A{index % 10}",
+            "created_time": "2024-01-01T00:00:00+0000",
+            "from_id": f"user_{index}",
+            "from_name": f"User {index}",
+        }
+        for index in range(count)
+    ]
+
+
+def run_queue(args, messages):
+    queue = Queue(host=args.host, username=args.user, password=args.password)
+    queue.connect()
+    try:
+        for message in messages:
+            queue.publish(QUEUE_NAME, message)
+    finally:
+        queue.close()
+
+
+def run_publish(args, messages):
+    publisher = Publisher(host=args.host, username=args.user, password=args.password)
+    try:
+        for message in messages:
+            publisher.publish(QUEUE_NAME, message)
+    finally:
+        publisher.close()
+
+
+def run_publish_many(args, messages):
+    publisher = Publisher(host=args.host, username=args.user, password=args.password)
+    try:
+        for index in range(0, len(messages), args.batch_size):
+            publisher.publish_many(QUEUE_NAME, messages[index:index + args.batch_size])
+    finally:
+        publisher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="guest")
+    parser.add_argument("--password", default="guest")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    modes = [
+        ("Queue.publish", run_queue),
+        ("publish", run_publish),
+        (f"publish_many/{args.batch_size}", run_publish_many),
+    ]
+
+    print(f"{'mode':<18} {'seconds':>8} {'msg/s':>9}")
+    try:
+        for name, run in modes:
+            started_at = time.perf_counter()
+            run(args, messages)
+            elapsed = time.perf_counter() - started_at
+            print(f"{name:<18} {elapsed:>8.2f} {len(messages) / elapsed:>9.0f}")
+    finally:
+        queue = Queue(host=args.host, username=args.user, password=args.password)
+        queue.connect()
+        queue.channel.queue_delete(queue=QUEUE_NAME)
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
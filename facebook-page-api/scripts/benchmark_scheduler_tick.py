@@ -0,0 +1,137 @@
+"""Measure the per-tick cost of the comment scheduler before and after the long-lived event loop.
+
+"per-tick" reproduces the old job: every tick runs on a scheduler thread,
+starts a new event loop with asyncio.run and opens a new httpx.AsyncClient.
+"long-lived" awaits FacebookCommentsScheduler._fetch_comments_job on one
+event loop, reusing the shared HTTP client across ticks. Both poll the stub Graph server
+(mocks/graph_server.py) with no added latency, so the tick time is mostly
+setup. Publishing is replaced by a counter so RabbitMQ is not needed.
+
+    poetry run python scripts/benchmark_scheduler_tick.py --ticks 50 --posts 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import uvicorn
+
+import app.services.facebook_services as facebook_services
+from app.schedule.facebook_comments import FacebookCommentsScheduler
+from app.services.facebook_services import sync_comments
+from app.utils.http import close_http_client
+from mocks.graph_server import create_app, generate_comments
+
+
+def start_stub(post_ids, port: int):
+    stub = create_app(generate_comments(post_ids, per_post=5))
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return stub, server
+
+
+def make_settings(port: int, concurrency: int):
+    settings = MagicMock()
+    settings.FACEBOOK_BASE_URL = f"http://127.0.0.1:{port}/v23.0"
+    settings.FACEBOOK_PAGE_ACCESS_TOKEN = "benchmark"
+    settings.COMMENT_SYNC_PAGE_SIZE = 100
+    settings.COMMENT_SYNC_MAX_PAGES = 10
+    settings.COMMENT_DEDUPE_ENABLED = False
+    settings.COMMENT_CURSOR_REDIS_ENABLED = False
+    settings.COMMENT_FETCH_CONCURRENCY = concurrency
+    settings.COMMENT_FETCH_TIMEOUT = 30.0
+    settings.COMMENT_POLL_MODE = "single"
+    return settings
+
+
+def per_tick(post_ids, settings, concurrency: int, ticks: int):
+    """The old job body, run from a thread like the BackgroundScheduler did."""
+    durations, setups = [], []
+
+    def job():
+        started_at = time.perf_counter()
+
+        async def tick():
+            limits = httpx.Limits(max_connections=concurrency)
+            async with httpx.AsyncClient(limits=limits) as client:
+                setups.append(time.perf_counter() - started_at)
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def fetch(post_id):
+                    async with semaphore:
+                        return await sync_comments(post_id, settings, client)
+
+                await asyncio.gather(*(fetch(post_id) for post_id in post_ids))
+
+        asyncio.run(tick())
+        durations.append(time.perf_counter() - started_at)
+
+    for _ in range(ticks):
+        thread = threading.Thread(target=job)
+        thread.start()
+        thread.join()
+    return durations, setups
+
+
+def long_lived(post_ids, settings, ticks: int):
+    durations, setups = [], []
+
+    async def run():
+        with patch("app.schedule.facebook_comments.get_settings", return_value=settings):
+            scheduler = FacebookCommentsScheduler()
+            scheduler.jobs_info["fetch_comments"]["post_ids"] = post_ids
+            for _ in range(ticks):
+                started_at = time.perf_counter()
+                scheduler._get_client(settings)
+                setups.append(time.perf_counter() - started_at)
+                await scheduler._fetch_comments_job()
+                durations.append(time.perf_counter() - started_at)
+            await close_http_client()
+
+    asyncio.run(run())
+    return durations, setups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8091)
+    args = parser.parse_args()
+
+    post_ids = [f"post_{index}" for index in range(args.posts)]
+    stub, server = start_stub(post_ids, args.port)
+    settings = make_settings(args.port, args.concurrency)
+    facebook_services.publish_comments = lambda comments, settings: None
+
+    print(f"{'mode':<11} {'tick ms':>8} {'p95 ms':>8} {'setup ms':>9}")
+    try:
+        for mode in ("per-tick", "long-lived"):
+            facebook_services.comment_cursors = None
+            if mode == "per-tick":
+                durations, setups = per_tick(post_ids, settings, args.concurrency, args.ticks)
+            else:
+                durations, setups = long_lived(post_ids, settings, args.ticks)
+
+            # The first tick pays for the cursor-less first sync in both modes
+            durations, setups = durations[1:], setups[1:]
+            p95 = statistics.quantiles(durations, n=20)[-1]
+            print(f"{mode:<11} {statistics.mean(durations) * 1000:>8.2f} {p95 * 1000:>8.2f} {statistics.mean(setups) * 1000:>9.2f}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Replay Page webhooks against a running facebook-page-api.
+
+Posts recorded webhook bodies (JSON files holding one body or a list of
+bodies) or generated feed comment webhooks to the webhook endpoint, and
+reports the status codes and how long each acknowledgement took.
+
+    poetry run python scripts/replay_webhooks.py --url http://localhost:3002/api/v1/webhook/ --generate 200 --post-id 123_456
+    poetry run python scripts/replay_webhooks.py --file recorded_webhooks.json --repeat 2
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from mocks.webhooks import generate_comment_webhooks
+
+
+def load_bodies(path: str):
+    data = json.loads(Path(path).read_text())
+    return data if isinstance(data, list) else [data]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:3002/api/v1/webhook/")
+    parser.add_argument("--file", action="append", default=[], help="recorded webhook body or list of bodies")
+    parser.add_argument("--generate", type=int, default=0, help="number of feed comments to generate")
+    parser.add_argument("--page-id", default="123")
+    parser.add_argument("--post-id", default="123_456")
+    parser.add_argument("--per-body", type=int, default=1, help="generated comments per webhook body")
+    parser.add_argument("--repeat", type=int, default=1, help="send every body this many times, as Facebook retries do")
+    parser.add_argument("--rate", type=float, default=0, help="bodies per second, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    bodies = [body for path in args.file for body in load_bodies(path)]
+    if args.generate:
+        bodies += generate_comment_webhooks(args.page_id, args.post_id, args.generate, args.per_body)
+    if not bodies:
+        parser.error("nothing to replay, pass --file or --generate")
+
+    statuses = Counter()
+    latencies = []
+    with httpx.Client(timeout=30) as client:
+        for _ in range(args.repeat):
+            for body in bodies:
+                started_at = time.perf_counter()
+                response = client.post(args.url, json=body)
+                latencies.append(time.perf_counter() - started_at)
+                statuses[response.status_code] += 1
+                if args.rate:
+                    time.sleep(max(1 / args.rate - latencies[-1], 0))
+
+        stats = client.get(f"{args.url.rstrip('/')}/stats")
+
+    print(f"sent {sum(statuses.values())} bodies: {dict(statuses)}")
+    print(f"ack ms: mean {statistics.mean(latencies) * 1000:.2f}, max {max(latencies) * 1000:.2f}")
+    if stats.status_code == 200:
+        print(f"dispatchers: {json.dumps(stats.json())}")
+
+
+if __name__ == "__main__":
+    main()
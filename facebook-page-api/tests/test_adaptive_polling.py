@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import patch
+
+from app.schedule.adaptive_polling import AdaptivePollQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdaptivePollQueue:
+    """Test cases for AdaptivePollQueue"""
+
+    @pytest.fixture
+    def clock(self):
+        clock = FakeClock()
+        with patch("app.schedule.adaptive_polling.time.monotonic", clock):
+            yield clock
+
+    def test_new_posts_are_due_immediately(self, clock):
+        poll_queue = AdaptivePollQueue()
+        poll_queue.sync(["post_1", "post_2"])
+
+        assert sorted(poll_queue.take_due()) == ["post_1", "post_2"]
+        # Posts being polled are not handed out twice
+        assert poll_queue.take_due() == []
+
+    def test_quiet_post_backs_off_exponentially_up_to_the_cap(self, clock):
+        poll_queue = AdaptivePollQueue(min_interval=3, max_interval=20, backoff=2)
+        poll_queue.sync(["post_1"])
+
+        intervals = []
+        for _ in range(5):
+            assert poll_queue.take_due() == ["post_1"]
+            poll_queue.record("post_1", 0)
+            intervals.append(poll_queue.snapshot()["posts"]["post_1"]["interval"])
+            clock.now += intervals[-1]
+
+        assert intervals == [6, 12, 20, 20, 20]
+
+    def test_hot_post_is_polled_about_once_per_target_comments(self, clock):
+        poll_queue = AdaptivePollQueue(min_interval=1, max_interval=300, target_comments=5, smoothing=1.0)
+        poll_queue.sync(["post_1"])
+
+        poll_queue.take_due()
+        poll_queue.record("post_1", 10)
+        clock.now += 1
+        poll_queue.take_due()
+        poll_queue.record("post_1", 2)
+
+        # 2 comments in 1 second -> 5 comments every 2.5 seconds
+        assert poll_queue.snapshot()["posts"]["post_1"]["interval"] == 2.5
+
+    def test_failed_poll_keeps_the_interval(self, clock):
+        poll_queue = AdaptivePollQueue(min_interval=3)
+        poll_queue.sync(["post_1"])
+
+        poll_queue.take_due()
+        poll_queue.record("post_1", None)
+
+        assert poll_queue.snapshot()["posts"]["post_1"]["interval"] == 3
+        clock.now += 3
+        assert poll_queue.take_due() == ["post_1"]
+
+    def test_budget_limits_requests_most_overdue_first(self, clock):
+        poll_queue = AdaptivePollQueue(budget_per_minute=2)
+        poll_queue.sync(["post_1"])
+        clock.now += 1
+        poll_queue.sync(["post_1", "post_2"])
+        clock.now += 1
+        poll_queue.sync(["post_1", "post_2", "post_3"])
+
+        assert poll_queue.take_due() == ["post_1", "post_2"]
+        assert poll_queue.take_due() == []
+        assert poll_queue.snapshot()["throttled"] >= 1
+
+        # 2 requests per minute refill one request every 30 seconds
+        clock.now += 30
+        assert poll_queue.take_due() == ["post_3"]
+
+    def test_batch_requests_cover_several_posts_per_token(self, clock):
+        poll_queue = AdaptivePollQueue(budget_per_minute=1)
+        poll_queue.sync([f"post_{index}" for index in range(60)])
+
+        assert len(poll_queue.take_due(cost_per_request=50)) == 50
+        assert poll_queue.take_due(cost_per_request=50) == []
+
+    def test_removed_posts_are_dropped(self, clock):
+        poll_queue = AdaptivePollQueue()
+        poll_queue.sync(["post_1", "post_2"])
+        poll_queue.sync(["post_2"])
+
+        assert poll_queue.take_due() == ["post_2"]
+        poll_queue.record("post_1", 3)
+        assert list(poll_queue.snapshot()["posts"]) == ["post_2"]
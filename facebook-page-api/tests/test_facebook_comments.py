@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.core.config import get_settings
+from app.schedule.facebook_comments import FacebookCommentsScheduler
+from app.utils.graph_usage import GraphUsage
+from app.utils.http import close_http_client, create_http_client
+
+
+class TestFetchCommentsJob:
+    """Test cases for FacebookCommentsScheduler._fetch_comments_job"""
+
+    @pytest.fixture
+    def mock_settings(self):
+        """Mock settings with a small fan-out and a short per-post timeout"""
+        mock_settings = MagicMock()
+        mock_settings.COMMENT_FETCH_CONCURRENCY = 3
+        mock_settings.COMMENT_FETCH_TIMEOUT = 0.5
+        mock_settings.COMMENT_POLL_MODE = "single"
+        mock_settings.COMMENT_ADAPTIVE_MIN_INTERVAL = 3.0
+        mock_settings.COMMENT_ADAPTIVE_TARGET_COMMENTS = 5.0
+        mock_settings.COMMENT_ADAPTIVE_BACKOFF = 2.0
+        mock_settings.COMMENT_POLL_BUDGET_PER_MINUTE = 600
+        mock_settings.COMMENT_WEBHOOK_ENABLED = False
+        mock_settings.COMMENT_RECONCILE_INTERVAL = 300
+        return mock_settings
+
+    @pytest.fixture(autouse=True)
+    def http_client(self):
+        """The application's pooled client, as the lifespan creates it"""
+        client = create_http_client(get_settings())
+        yield client
+        asyncio.run(close_http_client())
+
+    @pytest.fixture
+    def scheduler(self, mock_settings):
+        with patch("app.schedule.facebook_comments.get_settings", return_value=mock_settings):
+            scheduler = FacebookCommentsScheduler()
+            yield scheduler
+
+    @pytest.mark.asyncio
+    async def test_posts_are_fetched_concurrently(self, scheduler):
+        """At most COMMENT_FETCH_CONCURRENCY posts are polled at once, all sharing one client"""
+        running = 0
+        peak = 0
+        clients = set()
+
+        async def fake_fetch(post_id, settings, client):
+            nonlocal running, peak
+            clients.add(id(client))
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.2)
+            running -= 1
+            return None if post_id == "post_4" else 0
+
+        scheduler.jobs_info["fetch_comments"]["post_ids"] = [f"post_{i}" for i in range(6)]
+        with patch("app.schedule.facebook_comments.sync_comments", side_effect=fake_fetch):
+            await scheduler._fetch_comments_job()
+
+        jobs_info = scheduler.get_jobs_info()["fetch_comments"]
+        assert peak == 3
+        assert len(clients) == 1
+        assert jobs_info["last_results"] == {"succeeded": 5, "failed": 1, "timed_out": 0}
+        assert set(jobs_info["post_latency"]) == {f"post_{i}" for i in range(6)}
+        assert jobs_info["last_duration"] < 1.0
+
+    @pytest.mark.asyncio
+    async def test_slow_post_times_out_without_blocking_the_tick(self, scheduler):
+        """A post slower than COMMENT_FETCH_TIMEOUT is abandoned and counted"""
+        async def fake_fetch(post_id, settings, client):
+            await asyncio.sleep(5 if post_id == "slow" else 0.01)
+            return 0
+
+        scheduler.jobs_info["fetch_comments"]["post_ids"] = ["slow", "fast"]
+        with patch("app.schedule.facebook_comments.sync_comments", side_effect=fake_fetch):
+            await scheduler._fetch_comments_job()
+
+        jobs_info = scheduler.get_jobs_info()["fetch_comments"]
+        assert jobs_info["last_results"] == {"succeeded": 1, "failed": 0, "timed_out": 1}
+        assert jobs_info["last_duration"] < 2
+
+    @pytest.mark.asyncio
+    async def test_adaptive_tick_polls_only_due_posts(self, scheduler):
+        """In adaptive mode a tick polls the due posts and reschedules them from their comment counts"""
+        polled = []
+
+        async def fake_fetch(post_id, settings, client):
+            polled.append(post_id)
+            return 20 if post_id == "hot" else 0
+
+        scheduler.jobs_info["fetch_comments"]["post_ids"] = ["hot", "quiet"]
+        scheduler.poll_queue = scheduler._create_poll_queue(["hot", "quiet"], 300)
+        with patch("app.schedule.facebook_comments.sync_comments", side_effect=fake_fetch):
+            await scheduler._fetch_comments_job()
+            await scheduler._fetch_comments_job()
+
+        assert sorted(polled) == ["hot", "quiet"]
+
+        adaptive = scheduler.get_jobs_info()["fetch_comments"]["adaptive"]
+        assert adaptive["posts"]["hot"]["interval"] == 3.0
+        assert adaptive["posts"]["quiet"]["interval"] == 6.0
+
+    @pytest.mark.asyncio
+    async def test_ticks_use_the_shared_client(self, scheduler, http_client):
+        """Every tick polls over the application's pooled client, which the scheduler does not close"""
+        clients = []
+
+        async def fake_fetch(post_id, settings, client):
+            clients.append(client)
+            return 0
+
+        scheduler.jobs_info["fetch_comments"]["post_ids"] = ["post_1"]
+        with patch("app.schedule.facebook_comments.sync_comments", side_effect=fake_fetch):
+            await scheduler._fetch_comments_job()
+            await scheduler._fetch_comments_job()
+
+        assert clients == [http_client, http_client]
+
+        scheduler.stop_scheduler()
+        assert not http_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_high_graph_usage_skips_the_tick(self, scheduler):
+        """Polling is the first to give way when the usage headers report the rate limit is nearly used up"""
+        usage = GraphUsage(slow_at=50, stop_at=85)
+        usage.record({"x-app-usage": '{"call_count": 90, "total_cputime": 10, "total_time": 10}'})
+        polled = []
+
+        async def fake_fetch(post_id, settings, client):
+            polled.append(post_id)
+            return 0
+
+        scheduler.jobs_info["fetch_comments"]["post_ids"] = ["post_1"]
+        with patch("app.schedule.facebook_comments.get_graph_usage", return_value=usage), \
+             patch("app.schedule.facebook_comments.sync_comments", side_effect=fake_fetch):
+            await scheduler._fetch_comments_job()
+            graph_usage = scheduler.get_jobs_info()["fetch_comments"]["graph_usage"]
+
+        assert polled == []
+        assert graph_usage["usage"] == 90
+        assert graph_usage["polling"] == "stopped"
+        assert graph_usage["skipped_polls"] == {"fetch_comments": 1}
+
+    def test_feed_webhooks_turn_polling_into_a_sweep(self, scheduler, mock_settings):
+        """With comment webhooks enabled any schedule becomes a reconciliation interval of at least COMMENT_RECONCILE_INTERVAL"""
+        assert scheduler._reconcile_schedule(10, "interval") == (10, "interval")
+
+        mock_settings.COMMENT_WEBHOOK_ENABLED = True
+
+        assert scheduler._reconcile_schedule(10, "adaptive") == (300, "interval")
+        assert scheduler._reconcile_schedule("*/5 * * * *", "cron") == (300, "interval")
+        assert scheduler._reconcile_schedule(900, "interval") == (900, "interval")
+        assert scheduler.jobs_info["fetch_comments"]["reconcile"] is True
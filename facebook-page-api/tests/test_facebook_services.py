@@ -0,0 +1,306 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+
+import app.services.facebook_services as facebook_services
+from app.services.facebook_services import fetch_and_queue_comments_batch_service, fetch_and_queue_comments_service
+from app.utils.dedupe import SeenFilter
+from app.utils.redis import Redis
+from mocks.graph_server import create_app, generate_comments
+
+
+class TestFetchAndQueueComments:
+    """Test cases for fetch_and_queue_comments_service"""
+
+    @pytest.fixture
+    def mock_settings(self):
+        """Mock settings with the in-process comment dedupe enabled"""
+        mock_settings = MagicMock()
+        mock_settings.FACEBOOK_BASE_URL = "https://graph.facebook.com/v18.0"
+        mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.COMMENT_DEDUPE_ENABLED = True
+        mock_settings.COMMENT_DEDUPE_REDIS_ENABLED = False
+        mock_settings.COMMENT_DEDUPE_SIZE = 100
+        mock_settings.COMMENT_DEDUPE_TTL = 60
+        mock_settings.COMMENT_SYNC_PAGE_SIZE = 2
+        mock_settings.COMMENT_SYNC_MAX_PAGES = 10
+        mock_settings.COMMENT_CURSOR_REDIS_ENABLED = False
+        return mock_settings
+
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+        yield
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+
+    def _mock_response(self, comment_ids, created_time="2024-01-01T00:00:00+0000", next_url=None):
+        data = {
+            "data": [
+                {
+                    "id": comment_id,
+                    "message": "CF A1",
+                    "created_time": created_time,
+                    "from": {"id": "user_1", "name": "User"},
+                }
+                for comment_id in comment_ids
+            ]
+        }
+        if next_url:
+            data["paging"] = {"next": next_url}
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = data
+        mock_response.raise_for_status = MagicMock()
+        return mock_response
+
+    def _mock_client(self, *responses):
+        mock_client = AsyncMock()
+        mock_client.get.side_effect = list(responses)
+        return mock_client
+
+    @pytest.mark.asyncio
+    async def test_pages_until_last_synced_comment(self, mock_settings):
+        """Each tick follows paging.next and stops at the comments synced before"""
+        with patch("app.services.facebook_services.get_http_client") as mock_get_http_client, \
+             patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            mock_queue = mock_connect_queue.return_value
+
+            mock_get_http_client.return_value = self._mock_client(
+                self._mock_response(["c2", "c1"], "2024-01-01T00:00:01+0000"),
+            )
+            assert await fetch_and_queue_comments_service("post_1", mock_settings) is True
+
+            mock_client = self._mock_client(
+                self._mock_response(["c6", "c5"], "2024-01-01T00:00:03+0000", next_url="https://graph/next1"),
+                self._mock_response(["c4", "c3"], "2024-01-01T00:00:02+0000", next_url="https://graph/next2"),
+                self._mock_response(["c2", "c1"], "2024-01-01T00:00:01+0000", next_url="https://graph/next3"),
+            )
+            mock_get_http_client.return_value = mock_client
+            assert await fetch_and_queue_comments_service("post_1", mock_settings) is True
+
+            assert mock_client.get.call_count == 3
+            assert mock_client.get.call_args_list[1].args[0] == "https://graph/next1"
+
+            published = [comment["id"] for call in mock_queue.publish_many.call_args_list for comment in call.args[1]]
+            assert published == ["c1", "c2", "c3", "c4", "c5", "c6"]
+
+            cursor = facebook_services.comment_cursors.get("post_1")
+            assert cursor == {"created_time": "2024-01-01T00:00:03+0000", "comment_ids": ["c6", "c5"]}
+
+    @pytest.mark.asyncio
+    async def test_first_sync_reads_only_the_newest_page(self, mock_settings):
+        """Without a cursor older pages are not paged back through and queued again"""
+        with patch("app.services.facebook_services.get_http_client") as mock_get_http_client, \
+             patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            mock_client = self._mock_client(
+                self._mock_response(["c4", "c3"], "2024-01-01T00:00:02+0000", next_url="https://graph/next1"),
+                self._mock_response(["c2", "c1"], "2024-01-01T00:00:01+0000"),
+            )
+            mock_get_http_client.return_value = mock_client
+            assert await fetch_and_queue_comments_service("post_1", mock_settings) is True
+
+            assert mock_client.get.call_count == 1
+            published = [comment["id"] for call in mock_connect_queue.return_value.publish_many.call_args_list for comment in call.args[1]]
+            assert published == ["c3", "c4"]
+            assert facebook_services.comment_cursors.get("post_1")["comment_ids"] == ["c4", "c3"]
+
+    @pytest.mark.asyncio
+    async def test_new_comment_in_the_same_second_is_synced(self, mock_settings):
+        """A comment sharing the cursor's timestamp is still picked up"""
+        with patch("app.services.facebook_services.get_http_client") as mock_get_http_client, \
+             patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            mock_queue = mock_connect_queue.return_value
+
+            mock_get_http_client.return_value = self._mock_client(self._mock_response(["c1"]))
+            await fetch_and_queue_comments_service("post_1", mock_settings)
+
+            mock_get_http_client.return_value = self._mock_client(self._mock_response(["c2", "c1"]))
+            await fetch_and_queue_comments_service("post_1", mock_settings)
+
+            published = [comment["id"] for call in mock_queue.publish_many.call_args_list for comment in call.args[1]]
+            assert published == ["c1", "c2"]
+            assert facebook_services.comment_cursors.get("post_1")["comment_ids"] == ["c1", "c2"]
+
+    @pytest.mark.asyncio
+    async def test_republished_comments_are_skipped(self, mock_settings):
+        """Comments fetched again after the cursor is lost are not published twice"""
+        with patch("app.services.facebook_services.get_http_client") as mock_get_http_client, \
+             patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            mock_queue = mock_connect_queue.return_value
+
+            mock_get_http_client.return_value = self._mock_client(self._mock_response(["c2", "c1"]))
+            assert await fetch_and_queue_comments_service("post_1", mock_settings) is True
+
+            facebook_services.comment_cursors = None
+            mock_get_http_client.return_value = self._mock_client(self._mock_response(["c3", "c2", "c1"]))
+            assert await fetch_and_queue_comments_service("post_1", mock_settings) is True
+
+            published = [comment["id"] for call in mock_queue.publish_many.call_args_list for comment in call.args[1]]
+            assert published == ["c1", "c2", "c3"]
+
+            stats = facebook_services.get_comment_dedupe_stats()
+            assert stats["checked"] == 5
+            assert stats["duplicates"] == 2
+            assert stats["dedupe_ratio"] == 0.4
+
+    @pytest.mark.asyncio
+    async def test_dedupe_disabled_publishes_everything(self, mock_settings):
+        """With the dedupe disabled every fetched comment is published"""
+        mock_settings.COMMENT_DEDUPE_ENABLED = False
+
+        with patch("app.services.facebook_services.get_http_client") as mock_get_http_client, \
+             patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            for _ in range(2):
+                facebook_services.comment_cursors = None
+                mock_get_http_client.return_value = self._mock_client(self._mock_response(["c1"]))
+                await fetch_and_queue_comments_service("post_1", mock_settings)
+
+            assert sum(len(call.args[1]) for call in mock_connect_queue.return_value.publish_many.call_args_list) == 2
+            assert facebook_services.get_comment_dedupe_stats() is None
+
+
+class TestFetchAndQueueCommentsBatch:
+    """Test cases for fetch_and_queue_comments_batch_service against the stub Graph server"""
+
+    @pytest.fixture
+    def mock_settings(self):
+        mock_settings = MagicMock()
+        mock_settings.FACEBOOK_BASE_URL = "http://graph.test/v23.0"
+        mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.COMMENT_DEDUPE_ENABLED = False
+        mock_settings.COMMENT_SYNC_PAGE_SIZE = 2
+        mock_settings.COMMENT_SYNC_MAX_PAGES = 10
+        mock_settings.COMMENT_CURSOR_REDIS_ENABLED = False
+        return mock_settings
+
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        facebook_services.comment_cursors = None
+        yield
+        facebook_services.comment_cursors = None
+
+    @pytest.mark.asyncio
+    async def test_batch_is_demultiplexed_per_post(self, mock_settings):
+        """One batch request reads every post; longer posts page on individually"""
+        stub = create_app(generate_comments(["post_1", "post_2"], per_post=5))
+        stub.state.comments["post_3"] = []
+        # Posts synced before, so the sync pages back to their cursors
+        cursors = facebook_services.get_comment_cursors(mock_settings)
+        for post_id in ("post_1", "post_2"):
+            cursors.set(post_id, {"created_time": "2023-12-31T00:00:00+0000", "comment_ids": []})
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stub)) as client:
+            with patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+                results = await fetch_and_queue_comments_batch_service(["post_1", "post_2", "post_3", "missing"], mock_settings, client)
+
+        assert results == {"post_1": True, "post_2": True, "post_3": True, "missing": False}
+        # 1 batch + 2 follow-up pages for each of the two 5-comment posts
+        assert stub.state.batch_requests == 1
+        assert stub.state.requests == 5
+
+        published = [comment for call in mock_connect_queue.return_value.publish_many.call_args_list for comment in call.args[1]]
+        assert [comment["id"] for comment in published if comment["post_id"] == "post_1"] == [f"post_1_{index}" for index in range(5)]
+        assert len(published) == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_resumes_from_cursors(self, mock_settings):
+        """A second batch only publishes the comments added since the first; the first only its newest page"""
+        stub = create_app(generate_comments(["post_1"], per_post=3))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stub)) as client:
+            with patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+                await fetch_and_queue_comments_batch_service(["post_1"], mock_settings, client)
+                stub.state.comments["post_1"].insert(0, {
+                    "id": "post_1_new", "message": "CF B1", "created_time": "2024-01-01T00:01:00+0000",
+                    "from": {"id": "user_9", "name": "User 9"},
+                })
+                await fetch_and_queue_comments_batch_service(["post_1"], mock_settings, client)
+
+        published = [comment["id"] for call in mock_connect_queue.return_value.publish_many.call_args_list for comment in call.args[1]]
+        assert published == ["post_1_1", "post_1_2", "post_1_new"]
+
+    @pytest.mark.asyncio
+    async def test_more_than_graph_limit_is_rejected(self, mock_settings):
+        with pytest.raises(ValueError):
+            await fetch_and_queue_comments_batch_service([f"post_{index}" for index in range(51)], mock_settings, AsyncMock())
+
+
+class TestSeenFilter:
+    """Test cases for SeenFilter"""
+
+    def test_unseen_returns_new_ids_once(self):
+        seen = SeenFilter("test", max_size=10, ttl=60)
+
+        assert seen.unseen(["a", "b", "a"]) == ["a", "b"]
+        seen.mark(["a"])
+        assert seen.unseen(["a", "b"]) == ["b"]
+
+    def test_shared_redis_is_consulted(self):
+        client = MagicMock()
+        pipeline = client.pipeline.return_value
+        pipeline.execute.return_value = [1, 0]
+        redis = MagicMock()
+        redis.client = client
+
+        seen = SeenFilter("test", max_size=10, ttl=60, redis=redis)
+
+        assert seen.unseen(["a", "b"]) == ["b"]
+        pipeline.exists.assert_any_call("seen:test:a")
+        assert seen.stats()["duplicates"] == 1
+
+    def test_redis_errors_fall_back_to_local(self):
+        redis = MagicMock()
+        redis.client.pipeline.side_effect = ConnectionError("down")
+
+        seen = SeenFilter("test", max_size=10, ttl=60, redis=redis)
+
+        assert seen.unseen(["a"]) == ["a"]
+        seen.mark(["a"])
+        assert seen.unseen(["a"]) == []
+
+
+class TestCommentState:
+    """Test cases for the Redis connection behind the comment dedupe and cursors"""
+
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        facebook_services.redis = None
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+        yield
+        facebook_services.redis = None
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+
+    def test_connect_gives_up_after_max_attempts(self):
+        with patch("app.utils.redis.redis.Redis") as mock_redis, patch("app.utils.redis.time.sleep") as mock_sleep:
+            mock_redis.return_value.ping.side_effect = ConnectionError("down")
+
+            connection = Redis("cache", 6379)
+            assert connection.connect(max_attempts=3) is False
+
+        assert mock_redis.return_value.ping.call_count == 3
+        assert mock_sleep.call_count == 2
+        assert connection.client is None
+
+    def test_unreachable_redis_keeps_state_in_memory(self):
+        mock_settings = MagicMock()
+        mock_settings.COMMENT_DEDUPE_ENABLED = True
+        mock_settings.COMMENT_DEDUPE_REDIS_ENABLED = True
+        mock_settings.COMMENT_DEDUPE_SIZE = 10
+        mock_settings.COMMENT_DEDUPE_TTL = 60
+        mock_settings.COMMENT_CURSOR_REDIS_ENABLED = True
+        mock_settings.REDIS_CONNECT_ATTEMPTS = 1
+
+        with patch("app.utils.redis.redis.Redis") as mock_redis:
+            mock_redis.return_value.ping.side_effect = ConnectionError("down")
+            facebook_services.open_comment_state(mock_settings)
+
+        cursors = facebook_services.comment_cursors
+        assert cursors.redis is None
+        assert facebook_services.seen_comments.redis is None
+
+        cursors.set("post_1", {"created_time": "2024-01-01T00:00:00+0000", "comment_ids": ["c1"]})
+        assert cursors.get("post_1")["comment_ids"] == ["c1"]
@@ -48,8 +48,8 @@ class TestFacebookPageProfile:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_page_profile(
                 page_id="123456789",
@@ -86,8 +86,8 @@ class TestFacebookPageProfile:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_page_profile(
                 page_id="123456789",
@@ -114,8 +114,8 @@ class TestFacebookPageProfile:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_page_profile(
@@ -140,8 +140,8 @@ class TestFacebookPageProfile:
             response=mock_response
         )
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_page_profile(
@@ -158,8 +158,8 @@ class TestFacebookPageProfile:
         mock_client = AsyncMock()
         mock_client.get.side_effect = RequestError("Connection failed")
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_page_profile(
@@ -212,8 +212,8 @@ class TestFacebookPagePosts:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_page_posts(
                 page_id="123456789",
@@ -247,8 +247,8 @@ class TestFacebookPagePosts:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             await get_facebook_page_posts(
                 page_id="123456789",
@@ -287,8 +287,8 @@ class TestFacebookPagePosts:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_page_posts(
                 page_id="123456789",
@@ -319,8 +319,8 @@ class TestFacebookPagePosts:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_page_posts(
                 page_id="123456789",
@@ -347,8 +347,8 @@ class TestFacebookPagePosts:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_page_posts(
@@ -401,8 +401,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_post_comments(
                 post_id="post_123",
@@ -445,8 +445,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             await get_facebook_post_comments(
                 post_id="post_123",
@@ -482,8 +482,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_post_comments(
                 post_id="post_123",
@@ -514,8 +514,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_post_comments(
                 post_id="post_123",
@@ -545,8 +545,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await get_facebook_post_comments(
                 post_id="post_123",
@@ -573,8 +573,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_post_comments(
@@ -599,8 +599,8 @@ class TestFacebookPostComments:
             response=mock_response
         )
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_post_comments(
@@ -617,8 +617,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.side_effect = RequestError("Network timeout")
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_post_comments(
@@ -635,8 +635,8 @@ class TestFacebookPostComments:
         mock_client = AsyncMock()
         mock_client.get.side_effect = Exception("Unexpected error")
 
-        with patch("app.api.v1.endpoints.facebooks.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.facebooks.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             with pytest.raises(HTTPException) as exc_info:
                 await get_facebook_post_comments(
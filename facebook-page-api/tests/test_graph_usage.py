@@ -0,0 +1,80 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from app.utils.graph_usage import GraphUsage
+
+
+def usage_headers(app=None, page=None, business=None):
+    headers = {}
+    if app is not None:
+        headers["x-app-usage"] = json.dumps(app)
+    if page is not None:
+        headers["x-page-usage"] = json.dumps(page)
+    if business is not None:
+        headers["x-business-use-case-usage"] = json.dumps(business)
+    return headers
+
+
+class TestGraphUsage:
+    """Test cases for GraphUsage"""
+
+    @pytest.fixture
+    def usage(self):
+        return GraphUsage(slow_at=50, stop_at=90, max_poll_delay=100, stale_after=60)
+
+    def test_usage_is_the_highest_reported_percentage(self, usage):
+        usage.record(usage_headers(
+            app={"call_count": 12, "total_cputime": 5, "total_time": 8},
+            page={"call_count": 30, "total_cputime": 41, "total_time": 20},
+            business={"1234": [{"type": "messenger", "call_count": 62, "total_cputime": 10, "total_time": 10,
+                                 "estimated_time_to_regain_access": 0}]}
+        ))
+
+        assert usage.usage() == 62
+        assert usage.blocked_for() == 0
+
+    def test_responses_without_headers_keep_the_estimate(self, usage):
+        usage.record(usage_headers(app={"call_count": 70}))
+        usage.record({"content-type": "application/json"})
+        usage.record({"x-app-usage": "not json"})
+
+        assert usage.usage() == 70
+
+    def test_pollers_slow_down_then_stop(self, usage):
+        assert usage.poll_delay() == 0
+
+        usage.record(usage_headers(app={"call_count": 70}))
+        assert usage.poll_delay() == 50
+        assert usage.snapshot()["polling"] == "slowed"
+
+        usage.record(usage_headers(app={"call_count": 95}))
+        assert usage.poll_delay() is None
+        assert usage.snapshot()["polling"] == "stopped"
+
+    def test_regain_access_blocks_polling_even_at_low_usage(self, usage):
+        usage.record(usage_headers(business={"1234": [{"type": "pages", "call_count": 10, "estimated_time_to_regain_access": 5}]}))
+
+        assert 290 < usage.blocked_for() <= 300
+        assert usage.poll_delay() is None
+
+    def test_poll_allowed_spaces_runs_by_the_delay(self, usage):
+        usage.record(usage_headers(app={"call_count": 70}))
+
+        with patch("app.utils.graph_usage.time.monotonic", return_value=1000.0):
+            assert usage.poll_allowed("fetch_comments") is True
+            assert usage.poll_allowed("fetch_comments") is False
+            # Each poller keeps its own spacing
+            assert usage.poll_allowed("fetch_posts") is True
+
+        with patch("app.utils.graph_usage.time.monotonic", return_value=1051.0):
+            assert usage.poll_allowed("fetch_comments") is True
+
+        assert usage.snapshot()["skipped_polls"] == {"fetch_comments": 1}
+
+    def test_stale_reports_are_ignored(self, usage):
+        with patch("app.utils.graph_usage.time.monotonic", return_value=1000.0):
+            usage.record(usage_headers(app={"call_count": 95}))
+        with patch("app.utils.graph_usage.time.monotonic", return_value=1061.0):
+            assert usage.usage() == 0
+            assert usage.poll_delay() == 0
@@ -0,0 +1,92 @@
+import httpx
+import pytest
+from unittest.mock import MagicMock
+
+import app.utils.graph_usage as graph_usage
+import app.utils.http as http
+from app.utils.http import close_http_client, create_http_client, get_http_client, http_pool_stats, request_timeout
+
+
+class TestHttpClient:
+    """Test cases for the shared Graph API client"""
+
+    @pytest.fixture
+    def mock_settings(self):
+        mock_settings = MagicMock()
+        mock_settings.HTTP_MAX_CONNECTIONS = 7
+        mock_settings.HTTP_MAX_KEEPALIVE_CONNECTIONS = 3
+        mock_settings.HTTP_KEEPALIVE_EXPIRY = 30.0
+        mock_settings.HTTP2_ENABLED = False
+        mock_settings.HTTP_CONNECT_TIMEOUT = 5.0
+        mock_settings.HTTP_POOL_TIMEOUT = 2.0
+        mock_settings.HTTP_READ_TIMEOUT = 15.0
+        mock_settings.GRAPH_USAGE_SLOW_AT = 50.0
+        mock_settings.GRAPH_USAGE_STOP_AT = 85.0
+        mock_settings.GRAPH_USAGE_MAX_POLL_DELAY = 300.0
+        mock_settings.GRAPH_USAGE_STALE_AFTER = 300.0
+        return mock_settings
+
+    @pytest.fixture(autouse=True)
+    async def reset_client(self):
+        graph_usage.graph_usage = None
+        yield
+        await close_http_client()
+        graph_usage.graph_usage = None
+
+    def test_request_timeout_keeps_connect_and_pool_limits(self, mock_settings):
+        assert request_timeout(mock_settings, 60.0) == httpx.Timeout(60.0, connect=5.0, pool=2.0)
+
+    @pytest.mark.asyncio
+    async def test_client_is_created_once(self, mock_settings):
+        client = get_http_client(mock_settings)
+
+        assert get_http_client(mock_settings) is client
+        assert client.timeout == httpx.Timeout(15.0, connect=5.0, pool=2.0)
+
+        await close_http_client()
+        assert client.is_closed
+        assert get_http_client(mock_settings) is not client
+
+    @pytest.mark.asyncio
+    async def test_http2_needs_h2(self, mock_settings, monkeypatch):
+        """HTTP2_ENABLED without the h2 package falls back to HTTP/1.1 instead of failing"""
+        mock_settings.HTTP2_ENABLED = True
+        monkeypatch.setattr(http.importlib.util, "find_spec", lambda name: None)
+
+        create_http_client(mock_settings)
+
+        assert http_pool_stats()["http2"] is False
+
+    @pytest.mark.asyncio
+    async def test_pool_stats(self, mock_settings):
+        """Connections opened through the client are reported, and stay pooled for reuse"""
+        async def graph(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        assert http_pool_stats()["open"] is False
+
+        client = create_http_client(mock_settings)
+        stats = http_pool_stats()
+        assert stats["max_connections"] == 7
+        assert stats["max_keepalive_connections"] == 3
+        assert stats["connections"] == 0
+
+        # Requests go through the client's event hooks with a stand-in transport
+        requests_before = stats["requests"]
+        client._transport = httpx.ASGITransport(app=graph)
+        await client.get("http://graph.test/me")
+        assert http_pool_stats()["requests"] == requests_before + 1
+
+    @pytest.mark.asyncio
+    async def test_responses_update_graph_usage(self, mock_settings):
+        async def graph(scope, receive, send):
+            headers = [(b"x-app-usage", b'{"call_count": 72, "total_cputime": 3, "total_time": 4}')]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        client = create_http_client(mock_settings)
+        client._transport = httpx.ASGITransport(app=graph)
+        await client.get("http://graph.test/me")
+
+        assert graph_usage.get_graph_usage().usage() == 72
@@ -1,7 +1,9 @@
+import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi import HTTPException
-from httpx import HTTPStatusError, RequestError
+from httpx import HTTPStatusError, RequestError, Timeout
 
 from app.api.v1.endpoints.messengers import (
     format_text_message,
@@ -22,6 +24,7 @@ from app.api.v1.endpoints.messengers import (
     SendMessageResponse,
     BatchMessageResponse,
 )
+import app.api.v1.endpoints.messengers as messengers
 
 
 class TestMessageFormatting:
@@ -86,6 +89,9 @@ class TestSendFacebookTextMessage:
         mock_settings = MagicMock()
         mock_settings.FACEBOOK_BASE_URL = "https://graph.facebook.com/v18.0"
         mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.HTTP_SEND_TIMEOUT = 30.0
+        mock_settings.HTTP_CONNECT_TIMEOUT = 5.0
+        mock_settings.HTTP_POOL_TIMEOUT = 5.0
         return mock_settings
 
     @pytest.mark.asyncio
@@ -102,8 +108,8 @@ class TestSendFacebookTextMessage:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_text_message(
                 recipient_id="123456",
@@ -126,7 +132,7 @@ class TestSendFacebookTextMessage:
                 },
                 params={"access_token": "test_access_token"},
                 headers={"Content-Type": "application/json"},
-                timeout=30.0
+                timeout=Timeout(30.0, connect=5.0, pool=5.0)
             )
 
     @pytest.mark.asyncio
@@ -147,8 +153,8 @@ class TestSendFacebookTextMessage:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_text_message(
                 recipient_id="invalid_id",
@@ -173,8 +179,8 @@ class TestSendFacebookTextMessage:
             response=mock_response
         )
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_text_message(
                 recipient_id="123456",
@@ -191,8 +197,8 @@ class TestSendFacebookTextMessage:
         mock_client = AsyncMock()
         mock_client.post.side_effect = RequestError("Connection failed")
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_text_message(
                 recipient_id="123456",
@@ -209,8 +215,8 @@ class TestSendFacebookTextMessage:
         mock_client = AsyncMock()
         mock_client.post.side_effect = Exception("Unexpected error")
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_text_message(
                 recipient_id="123456",
@@ -231,6 +237,9 @@ class TestSendFacebookImageMessage:
         mock_settings = MagicMock()
         mock_settings.FACEBOOK_BASE_URL = "https://graph.facebook.com/v18.0"
         mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.HTTP_SEND_TIMEOUT = 30.0
+        mock_settings.HTTP_CONNECT_TIMEOUT = 5.0
+        mock_settings.HTTP_POOL_TIMEOUT = 5.0
         return mock_settings
 
     @pytest.mark.asyncio
@@ -247,8 +256,8 @@ class TestSendFacebookImageMessage:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_image_message(
                 recipient_id="123456",
@@ -276,7 +285,7 @@ class TestSendFacebookImageMessage:
                 },
                 params={"access_token": "test_access_token"},
                 headers={"Content-Type": "application/json"},
-                timeout=30.0
+                timeout=Timeout(30.0, connect=5.0, pool=5.0)
             )
 
     @pytest.mark.asyncio
@@ -297,8 +306,8 @@ class TestSendFacebookImageMessage:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_image_message(
                 recipient_id="123456",
@@ -319,6 +328,9 @@ class TestSendFacebookTemplateMessage:
         mock_settings = MagicMock()
         mock_settings.FACEBOOK_BASE_URL = "https://graph.facebook.com/v18.0"
         mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.HTTP_SEND_TIMEOUT = 30.0
+        mock_settings.HTTP_CONNECT_TIMEOUT = 5.0
+        mock_settings.HTTP_POOL_TIMEOUT = 5.0
         return mock_settings
 
     @pytest.mark.asyncio
@@ -341,8 +353,8 @@ class TestSendFacebookTemplateMessage:
             buttons=[{"type": "web_url", "title": "Visit", "url": "https://example.com"}]
         )
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_template_message(
                 recipient_id="123456",
@@ -374,7 +386,7 @@ class TestSendFacebookTemplateMessage:
                 },
                 params={"access_token": "test_access_token"},
                 headers={"Content-Type": "application/json"},
-                timeout=30.0
+                timeout=Timeout(30.0, connect=5.0, pool=5.0)
             )
 
     @pytest.mark.asyncio
@@ -401,8 +413,8 @@ class TestSendFacebookTemplateMessage:
             buttons=[]
         )
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_facebook_template_message(
                 recipient_id="123456",
@@ -423,8 +435,22 @@ class TestMessengerEndpoints:
         mock_settings = MagicMock()
         mock_settings.FACEBOOK_BASE_URL = "https://graph.facebook.com/v18.0"
         mock_settings.FACEBOOK_PAGE_ACCESS_TOKEN = "test_access_token"
+        mock_settings.HTTP_SEND_TIMEOUT = 30.0
+        mock_settings.HTTP_CONNECT_TIMEOUT = 5.0
+        mock_settings.HTTP_POOL_TIMEOUT = 5.0
+        mock_settings.MESSENGER_SEND_RATE = 1000.0
+        mock_settings.MESSENGER_SEND_BURST = 100
+        mock_settings.MESSENGER_SEND_CONCURRENCY = 10
+        mock_settings.MESSENGER_SEND_RETRIES = 3
+        mock_settings.MESSENGER_SEND_BACKOFF = 0.01
         return mock_settings
 
+    @pytest.fixture(autouse=True)
+    def reset_send_limiter(self):
+        messengers.send_limiter = None
+        yield
+        messengers.send_limiter = None
+
     @pytest.mark.asyncio
     async def test_send_text_message_endpoint_success(self, mock_settings):
         """Test successful text message endpoint"""
@@ -444,8 +470,8 @@ class TestMessengerEndpoints:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_text_message(request, mock_settings)
 
@@ -472,8 +498,8 @@ class TestMessengerEndpoints:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_image_message(request, mock_settings)
 
@@ -505,8 +531,8 @@ class TestMessengerEndpoints:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_template_message(request, mock_settings)
 
@@ -532,8 +558,8 @@ class TestMessengerEndpoints:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_message_batch(request, mock_settings)
 
@@ -567,8 +593,8 @@ class TestMessengerEndpoints:
 
         mock_client.post.side_effect = [success_response, error_response]
 
-        with patch("app.api.v1.endpoints.messengers.httpx.AsyncClient") as mock_async_client:
-            mock_async_client.return_value.__aenter__.return_value = mock_client
+        with patch("app.api.v1.endpoints.messengers.get_http_client") as mock_get_http_client:
+            mock_get_http_client.return_value = mock_client
 
             result = await send_message_batch(request, mock_settings)
 
@@ -579,6 +605,96 @@ class TestMessengerEndpoints:
             assert len(result.results) == 2
 
 
+    def _response(self, status_code, data):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = data
+        return response
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_is_concurrent_and_ordered_per_recipient(self, mock_settings):
+        """Different recipients are sent in parallel; one recipient's messages go out in request order"""
+        running = 0
+        peak = 0
+        sent = []
+
+        async def post(url, json, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            sent.append((json["recipient"]["id"], json["message"]["text"]))
+            return self._response(200, {"message_id": f"mid.{len(sent)}"})
+
+        messages = [SendTextMessageRequest(recipient_id=f"user_{index % 5}", message=str(index)) for index in range(20)]
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = post
+
+        with patch("app.api.v1.endpoints.messengers.get_http_client", return_value=mock_client):
+            result = await send_message_batch(SendMessageBatchRequest(messages=messages), mock_settings)
+
+        assert result.successful_messages == 20
+        assert [r["index"] for r in result.results] == list(range(20))
+        assert peak == 5
+        for recipient in range(5):
+            texts = [text for recipient_id, text in sent if recipient_id == f"user_{recipient}"]
+            assert texts == [str(index) for index in range(recipient, 20, 5)]
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_retries_rate_limited_sends(self, mock_settings):
+        """Throttling error codes are retried with backoff; other errors are not"""
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = [
+            self._response(400, {"error": {"message": "Calls to this api have exceeded the rate limit", "code": 613}}),
+            self._response(200, {"message_id": "mid.1"}),
+            self._response(400, {"error": {"message": "Invalid recipient", "code": 100}}),
+        ]
+        messages = [
+            SendTextMessageRequest(recipient_id="123456", message="Hello"),
+            SendTextMessageRequest(recipient_id="123456", message="Again"),
+        ]
+
+        with patch("app.api.v1.endpoints.messengers.get_http_client", return_value=mock_client):
+            result = await send_message_batch(SendMessageBatchRequest(messages=messages), mock_settings)
+
+        assert result.results[0]["success"] is True
+        assert result.results[0]["attempts"] == 2
+        assert result.results[1]["success"] is False
+        assert result.results[1]["attempts"] == 1
+        assert messengers.send_limiter.stats()["waits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_gives_up_after_retries(self, mock_settings):
+        mock_settings.MESSENGER_SEND_RETRIES = 2
+        mock_client = AsyncMock()
+        mock_client.post.return_value = self._response(400, {"error": {"message": "Too many messages", "code": 80006}})
+
+        with patch("app.api.v1.endpoints.messengers.get_http_client", return_value=mock_client):
+            result = await send_message_batch(
+                SendMessageBatchRequest(messages=[SendTextMessageRequest(recipient_id="123456", message="Hello")]),
+                mock_settings
+            )
+
+        assert result.failed_messages == 1
+        assert result.results[0]["attempts"] == 3
+        assert mock_client.post.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_stream(self, mock_settings):
+        """The streaming endpoint writes one JSON line per message as it completes"""
+        mock_client = AsyncMock()
+        mock_client.post.return_value = self._response(200, {"message_id": "mid.1"})
+        messages = [SendTextMessageRequest(recipient_id=f"user_{index}", message="Hello") for index in range(3)]
+
+        with patch("app.api.v1.endpoints.messengers.get_http_client", return_value=mock_client):
+            response = await messengers.send_message_batch_stream(SendMessageBatchRequest(messages=messages), mock_settings)
+            lines = [json.loads(line) async for line in response.body_iterator]
+
+        assert response.media_type == "application/x-ndjson"
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert all(line["success"] for line in lines)
+
 class TestResponseModels:
     """Test cases for response models"""
 
@@ -0,0 +1,111 @@
+import pika
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.utils.queue import Publisher, PublishError
+
+
+class FakeBroker:
+    """Stands in for pika.BlockingConnection: confirms what was published on the next process_data_events"""
+
+    def __init__(self, nack_tags=(), fail_publish_at=None):
+        self.nack_tags = set(nack_tags)
+        self.fail_publish_at = fail_publish_at
+        self.published = []
+        self.declared = []
+        self.waits = 0
+        self.connections = 0
+
+    def connect(self, params):
+        self.connections += 1
+        broker = self
+        state = {"tag": 0, "confirmed": 0, "on_confirm": None}
+
+        connection = MagicMock()
+        connection.is_open = True
+        channel = connection.channel.return_value
+        channel.is_open = True
+
+        def confirm_delivery(ack_nack_callback, callback):
+            state["on_confirm"] = ack_nack_callback
+            callback(MagicMock())
+
+        def basic_publish(exchange, routing_key, body, properties):
+            if broker.fail_publish_at is not None and len(broker.published) == broker.fail_publish_at:
+                broker.fail_publish_at = None
+                raise pika.exceptions.StreamLostError("connection lost")
+            state["tag"] += 1
+            broker.published.append(body)
+
+        def process_data_events(time_limit=None):
+            broker.waits += 1
+            for tag in range(state["confirmed"] + 1, state["tag"] + 1):
+                method = pika.spec.Basic.Nack(delivery_tag=tag) if tag in broker.nack_tags else pika.spec.Basic.Ack(delivery_tag=tag)
+                broker.nack_tags.discard(tag)
+                state["on_confirm"](MagicMock(method=method))
+            state["confirmed"] = state["tag"]
+
+        channel._impl.confirm_delivery.side_effect = confirm_delivery
+        channel.basic_publish.side_effect = basic_publish
+        channel.queue_declare.side_effect = lambda queue, durable: broker.declared.append(queue)
+        connection.process_data_events.side_effect = process_data_events
+        return connection
+
+
+class TestPublisher:
+    """Test cases for Publisher"""
+
+    def _publisher(self, broker):
+        patcher = patch("app.utils.queue.pika.BlockingConnection", side_effect=broker.connect)
+        patcher.start()
+        self.patchers.append(patcher)
+        return Publisher("localhost", "guest", "guest", confirm_timeout=1, retries=2, reconnect_delay=0)
+
+    @pytest.fixture(autouse=True)
+    def stop_patchers(self):
+        self.patchers = []
+        yield
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_batch_waits_for_confirms_once(self):
+        """A batch is written in full before waiting, over one connection, declaring the queue once"""
+        broker = FakeBroker()
+        publisher = self._publisher(broker)
+
+        assert publisher.publish_many("facebook_comments", [{"id": index} for index in range(10)]) == 10
+        publisher.publish_many("facebook_comments", [{"id": 10}])
+
+        assert len(broker.published) == 11
+        assert broker.declared == ["facebook_comments"]
+        assert broker.connections == 1
+        # One wait for the confirm mode switch, then one per batch
+        assert broker.waits == 2
+        assert publisher.stats()["published"] == 11
+
+    def test_nacked_messages_are_published_again(self):
+        broker = FakeBroker(nack_tags={2})
+        publisher = self._publisher(broker)
+
+        publisher.publish_many("facebook_comments", [{"id": "a"}, {"id": "b"}, {"id": "c"}])
+
+        assert broker.published == ['{"id": "a"}', '{"id": "b"}', '{"id": "c"}', '{"id": "b"}']
+        assert publisher.stats()["nacked"] == 1
+
+    def test_lost_connection_republishes_unconfirmed(self):
+        """Messages not confirmed when the connection drops are sent again on a new connection"""
+        broker = FakeBroker(fail_publish_at=2)
+        publisher = self._publisher(broker)
+
+        publisher.publish_many("facebook_comments", [{"id": "a"}, {"id": "b"}, {"id": "c"}])
+
+        assert broker.published == ['{"id": "a"}', '{"id": "b"}', '{"id": "a"}', '{"id": "b"}', '{"id": "c"}']
+        assert broker.connections == 2
+        assert publisher.stats()["retries"] == 1
+
+    def test_gives_up_after_retries(self):
+        broker = FakeBroker(nack_tags={1, 2, 3})
+        publisher = self._publisher(broker)
+
+        with pytest.raises(PublishError):
+            publisher.publish_many("facebook_comments", [{"id": "a"}])
@@ -0,0 +1,32 @@
+import asyncio
+import time
+import pytest
+
+from app.utils.rate_limit import TokenBucket
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket"""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_rate(self):
+        """The burst is served at once, after which tokens come at `rate` a second"""
+        bucket = TokenBucket(rate=100, capacity=5)
+
+        started_at = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(15)))
+        elapsed = time.monotonic() - started_at
+
+        # 10 tokens beyond the burst at 100/s
+        assert 0.09 <= elapsed < 0.5
+        assert bucket.stats()["waits"] >= 10
+
+    @pytest.mark.asyncio
+    async def test_pause_holds_every_caller(self):
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.pause(0.05)
+
+        started_at = time.monotonic()
+        await bucket.acquire()
+
+        assert time.monotonic() - started_at >= 0.05
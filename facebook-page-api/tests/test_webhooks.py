@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from httpx import HTTPStatusError, RequestError
@@ -8,12 +9,9 @@ from httpx import HTTPStatusError, RequestError
 from app.api.v1.endpoints.webhooks import (
     verify_webhook,
     handle_webhook,
-    process_webhook_body,
-    process_messaging_event,
-    process_text_message,
-    process_media_message,
     format_text_message,
     format_media_message,
+    extract_inbox_messages,
     FacebookWebhookBody,
     FacebookEntry,
     FacebookMessagingEvent,
@@ -22,6 +20,10 @@ from app.api.v1.endpoints.webhooks import (
     FacebookMessageAttachment,
 )
 from app.main import app
+from app.services.facebook_services import feed_comment_message, sync_comments
+from mocks.webhooks import comment_change, feed_webhook, generate_comment_webhooks
+import app.services.facebook_services as facebook_services
+from app.services.webhook_services import WebhookDispatcher
 
 
 class TestWebhookVerification:
@@ -120,231 +122,6 @@ class TestWebhookMessageProcessing:
 
         assert result["message"]["attachment"]["payload"]["is_reusable"] is False
 
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_text_message(self, mock_logger):
-        """Test processing text message"""
-        message = FacebookMessage(text="Hello, world!")
-
-        process_text_message("123456", message, 1234567890)
-
-        # Verify logger was called
-        mock_logger.info.assert_called_once()
-        call_args = mock_logger.info.call_args
-        assert call_args[0][0] == "Text message received"
-        assert call_args[1]["extra"]["event"] == "text_message"
-        assert call_args[1]["extra"]["sender_id"] == "123456"
-        assert call_args[1]["extra"]["timestamp"] == 1234567890
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_text_message_no_text(self, mock_logger):
-        """Test processing text message with no text"""
-        message = FacebookMessage(text=None)
-
-        process_text_message("123456", message, 1234567890)
-
-        # Verify logger was not called
-        mock_logger.info.assert_not_called()
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_media_message_image(self, mock_logger):
-        """Test processing media message with image"""
-        attachment = FacebookMessageAttachment(
-            type="image",
-            payload={"url": "https://example.com/image.jpg"}
-        )
-        message = FacebookMessage(attachments=[attachment])
-
-        process_media_message("123456", message, 1234567890)
-
-        # Verify logger was called
-        mock_logger.info.assert_called_once()
-        call_args = mock_logger.info.call_args
-        assert "Media message received: image" in call_args[0][0]
-        assert call_args[1]["extra"]["event"] == "media_message"
-        assert call_args[1]["extra"]["sender_id"] == "123456"
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_media_message_video(self, mock_logger):
-        """Test processing media message with video"""
-        attachment = FacebookMessageAttachment(
-            type="video",
-            payload={"url": "https://example.com/video.mp4"}
-        )
-        message = FacebookMessage(attachments=[attachment])
-
-        process_media_message("123456", message, 1234567890)
-
-        # Verify logger was called
-        mock_logger.info.assert_called_once()
-        call_args = mock_logger.info.call_args
-        assert "Media message received: video" in call_args[0][0]
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_media_message_no_attachments(self, mock_logger):
-        """Test processing media message with no attachments"""
-        message = FacebookMessage(attachments=None)
-
-        process_media_message("123456", message, 1234567890)
-
-        # Verify logger was not called
-        mock_logger.info.assert_not_called()
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_media_message_no_url(self, mock_logger):
-        """Test processing media message with no URL"""
-        attachment = FacebookMessageAttachment(
-            type="image",
-            payload={}
-        )
-        message = FacebookMessage(attachments=[attachment])
-
-        process_media_message("123456", message, 1234567890)
-
-        # Verify warning was logged
-        mock_logger.warning.assert_called_once()
-        assert "No URL found for image attachment" in mock_logger.warning.call_args[0][0]
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_media_message_unsupported_type(self, mock_logger):
-        """Test processing media message with unsupported type"""
-        attachment = FacebookMessageAttachment(
-            type="unsupported",
-            payload={"url": "https://example.com/file.xyz"}
-        )
-        message = FacebookMessage(attachments=[attachment])
-
-        process_media_message("123456", message, 1234567890)
-
-        # Verify warning was logged
-        mock_logger.warning.assert_called_once()
-        assert "Unsupported attachment type: unsupported" in mock_logger.warning.call_args[0][0]
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_messaging_event_text(self, mock_logger):
-        """Test processing messaging event with text message"""
-        sender = FacebookSender(id="123456")
-        message = FacebookMessage(text="Hello, world!")
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=message,
-            timestamp=1234567890
-        )
-
-        with patch("app.api.v1.endpoints.webhooks.process_text_message") as mock_process:
-            process_messaging_event(event)
-
-            mock_process.assert_called_once_with("123456", message, 1234567890)
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_messaging_event_media(self, mock_logger):
-        """Test processing messaging event with media message"""
-        sender = FacebookSender(id="123456")
-        attachment = FacebookMessageAttachment(
-            type="image",
-            payload={"url": "https://example.com/image.jpg"}
-        )
-        message = FacebookMessage(attachments=[attachment])
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=message,
-            timestamp=1234567890
-        )
-
-        with patch("app.api.v1.endpoints.webhooks.process_media_message") as mock_process:
-            process_messaging_event(event)
-
-            mock_process.assert_called_once_with("123456", message, 1234567890)
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_messaging_event_no_message(self, mock_logger):
-        """Test processing messaging event with no message"""
-        sender = FacebookSender(id="123456")
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=None,
-            timestamp=1234567890
-        )
-
-        with patch("app.api.v1.endpoints.webhooks.process_text_message") as mock_text_process:
-            with patch("app.api.v1.endpoints.webhooks.process_media_message") as mock_media_process:
-                process_messaging_event(event)
-
-                # Verify neither processing function was called
-                mock_text_process.assert_not_called()
-                mock_media_process.assert_not_called()
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_messaging_event_unsupported_type(self, mock_logger):
-        """Test processing messaging event with unsupported message type"""
-        sender = FacebookSender(id="123456")
-        message = FacebookMessage()  # No text or attachments
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=message,
-            timestamp=1234567890
-        )
-
-        process_messaging_event(event)
-
-        # Verify warning was logged
-        mock_logger.warning.assert_called_once()
-        assert "Unsupported message type" in mock_logger.warning.call_args[0][0]
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_webhook_body_page_object(self, mock_logger):
-        """Test processing webhook body with page object"""
-        sender = FacebookSender(id="123456")
-        message = FacebookMessage(text="Hello, world!")
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=message,
-            timestamp=1234567890
-        )
-        entry = FacebookEntry(messaging=[event])
-        body = FacebookWebhookBody(object="page", entry=[entry])
-
-        with patch("app.api.v1.endpoints.webhooks.process_messaging_event") as mock_process:
-            process_webhook_body(body)
-
-            mock_process.assert_called_once_with(event)
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_webhook_body_non_page_object(self, mock_logger):
-        """Test processing webhook body with non-page object"""
-        body = FacebookWebhookBody(object="user", entry=[])
-
-        with patch("app.api.v1.endpoints.webhooks.process_messaging_event") as mock_process:
-            process_webhook_body(body)
-
-            # Verify warning was logged
-            mock_logger.warning.assert_called_once()
-            assert "Received webhook for object type: user" in mock_logger.warning.call_args[0][0]
-
-            # Verify processing was not called
-            mock_process.assert_not_called()
-
-    @patch("app.api.v1.endpoints.webhooks.logger")
-    def test_process_webhook_body_processing_error(self, mock_logger):
-        """Test processing webhook body with processing error"""
-        sender = FacebookSender(id="123456")
-        message = FacebookMessage(text="Hello, world!")
-        event = FacebookMessagingEvent(
-            sender=sender,
-            message=message,
-            timestamp=1234567890
-        )
-        entry = FacebookEntry(messaging=[event])
-        body = FacebookWebhookBody(object="page", entry=[entry])
-
-        with patch("app.api.v1.endpoints.webhooks.process_messaging_event") as mock_process:
-            mock_process.side_effect = Exception("Processing error")
-
-            process_webhook_body(body)
-
-            # Verify error was logged
-            mock_logger.error.assert_called_once()
-            assert "Error processing messaging event" in mock_logger.error.call_args[0][0]
-
 
 class TestWebhookHandler:
     """Test cases for webhook handler endpoint"""
@@ -372,28 +149,25 @@ class TestWebhookHandler:
         }
 
         with patch("app.api.v1.endpoints.webhooks.get_settings") as mock_get_settings:
-            with patch("app.api.v1.endpoints.webhooks.get_queue") as mock_get_queue:
-                with patch("app.api.v1.endpoints.webhooks.Queue") as mock_queue_class:
-                    # Mock settings
-                    mock_settings = MagicMock()
-                    mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
-                    mock_settings.QUEUE_HOST = "localhost"
-                    mock_settings.QUEUE_USER = "guest"
-                    mock_settings.QUEUE_PASS = "guest"
-                    mock_get_settings.return_value = mock_settings
-
-                    # Mock queue
-                    mock_queue = MagicMock()
-                    mock_get_queue.return_value = None  # No existing queue
-                    mock_queue_class.return_value = mock_queue
-
-                    response = client.post("/api/v1/webhook/", json=webhook_data)
-
-                    assert response.status_code == 200
-                    response_data = response.json()
-                    assert response_data["status"] == "OK"
-                    assert "processed_events" in response_data
-                    assert response_data["processed_events"] >= 0
+            with patch("app.api.v1.endpoints.webhooks.webhook_dispatcher") as mock_dispatcher:
+                # Mock settings
+                mock_settings = MagicMock()
+                mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
+                mock_settings.QUEUE_HOST = "localhost"
+                mock_settings.QUEUE_USER = "guest"
+                mock_settings.QUEUE_PASS = "guest"
+                mock_get_settings.return_value = mock_settings
+
+                # Mock dispatcher
+                mock_dispatcher.full.return_value = False
+
+                response = client.post("/api/v1/webhook/", json=webhook_data)
+
+                assert response.status_code == 200
+                response_data = response.json()
+                assert response_data["status"] == "OK"
+                assert "processed_events" in response_data
+                assert response_data["processed_events"] >= 0
 
     def test_handle_webhook_invalid_payload(self, client):
         """Test webhook handling with invalid payload"""
@@ -403,8 +177,8 @@ class TestWebhookHandler:
                 {
                     "messaging": [
                         {
-                            "sender": {"id": "123456"},
-                            # Missing required fields
+                            # Missing required sender
+                            "message": {"text": "Hello, world!"},
                         }
                     ]
                 }
@@ -427,8 +201,8 @@ class TestWebhookHandler:
         assert response.status_code == 400
         assert "Invalid webhook payload" in response.json()["detail"]
 
-    def test_handle_webhook_processing_error(self, client):
-        """Test webhook handling with processing error"""
+    def test_handle_webhook_queue_full(self, client):
+        """Test webhook handling when the dispatcher queue is full"""
         webhook_data = {
             "object": "page",
             "entry": [
@@ -444,13 +218,13 @@ class TestWebhookHandler:
             ]
         }
 
-        with patch("app.api.v1.endpoints.webhooks.process_webhook_body") as mock_process:
-            mock_process.side_effect = Exception("Unexpected error")
+        with patch("app.api.v1.endpoints.webhooks.webhook_dispatcher") as mock_dispatcher:
+            mock_dispatcher.full.return_value = True
 
             response = client.post("/api/v1/webhook/", json=webhook_data)
 
-            assert response.status_code == 500
-            assert "Unexpected error" in response.json()["detail"]
+            assert response.status_code == 503
+            assert "Webhook queue is full" in response.json()["detail"]
 
 
 class TestWebhookIntegration:
@@ -498,28 +272,25 @@ class TestWebhookIntegration:
         }
 
         with patch("app.api.v1.endpoints.webhooks.get_settings") as mock_get_settings:
-            with patch("app.api.v1.endpoints.webhooks.get_queue") as mock_get_queue:
-                with patch("app.api.v1.endpoints.webhooks.Queue") as mock_queue_class:
-                    # Mock settings
-                    mock_settings = MagicMock()
-                    mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
-                    mock_settings.QUEUE_HOST = "localhost"
-                    mock_settings.QUEUE_USER = "guest"
-                    mock_settings.QUEUE_PASS = "guest"
-                    mock_get_settings.return_value = mock_settings
-
-                    # Mock queue
-                    mock_queue = MagicMock()
-                    mock_get_queue.return_value = None  # No existing queue
-                    mock_queue_class.return_value = mock_queue
-
-                    response = client.post("/api/v1/webhook/", json=webhook_data)
-
-                    assert response.status_code == 200
-                    response_data = response.json()
-                    assert response_data["status"] == "OK"
-                    assert "processed_events" in response_data
-                    assert response_data["processed_events"] >= 0
+            with patch("app.api.v1.endpoints.webhooks.webhook_dispatcher") as mock_dispatcher:
+                # Mock settings
+                mock_settings = MagicMock()
+                mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
+                mock_settings.QUEUE_HOST = "localhost"
+                mock_settings.QUEUE_USER = "guest"
+                mock_settings.QUEUE_PASS = "guest"
+                mock_get_settings.return_value = mock_settings
+
+                # Mock dispatcher
+                mock_dispatcher.full.return_value = False
+
+                response = client.post("/api/v1/webhook/", json=webhook_data)
+
+                assert response.status_code == 200
+                response_data = response.json()
+                assert response_data["status"] == "OK"
+                assert "processed_events" in response_data
+                assert response_data["processed_events"] >= 0
 
     def test_webhook_with_media_message_integration(self, client):
         """Test webhook handling with media message integration"""
@@ -548,28 +319,25 @@ class TestWebhookIntegration:
         }
 
         with patch("app.api.v1.endpoints.webhooks.get_settings") as mock_get_settings:
-            with patch("app.api.v1.endpoints.webhooks.get_queue") as mock_get_queue:
-                with patch("app.api.v1.endpoints.webhooks.Queue") as mock_queue_class:
-                    # Mock settings
-                    mock_settings = MagicMock()
-                    mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
-                    mock_settings.QUEUE_HOST = "localhost"
-                    mock_settings.QUEUE_USER = "guest"
-                    mock_settings.QUEUE_PASS = "guest"
-                    mock_get_settings.return_value = mock_settings
-
-                    # Mock queue
-                    mock_queue = MagicMock()
-                    mock_get_queue.return_value = None  # No existing queue
-                    mock_queue_class.return_value = mock_queue
-
-                    response = client.post("/api/v1/webhook/", json=webhook_data)
-
-                    assert response.status_code == 200
-                    response_data = response.json()
-                    assert response_data["status"] == "OK"
-                    assert "processed_events" in response_data
-                    assert response_data["processed_events"] >= 0
+            with patch("app.api.v1.endpoints.webhooks.webhook_dispatcher") as mock_dispatcher:
+                # Mock settings
+                mock_settings = MagicMock()
+                mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
+                mock_settings.QUEUE_HOST = "localhost"
+                mock_settings.QUEUE_USER = "guest"
+                mock_settings.QUEUE_PASS = "guest"
+                mock_get_settings.return_value = mock_settings
+
+                # Mock dispatcher
+                mock_dispatcher.full.return_value = False
+
+                response = client.post("/api/v1/webhook/", json=webhook_data)
+
+                assert response.status_code == 200
+                response_data = response.json()
+                assert response_data["status"] == "OK"
+                assert "processed_events" in response_data
+                assert response_data["processed_events"] >= 0
 
     def test_webhook_with_multiple_messages_integration(self, client):
         """Test webhook handling with multiple messages integration"""
@@ -594,25 +362,155 @@ class TestWebhookIntegration:
         }
 
         with patch("app.api.v1.endpoints.webhooks.get_settings") as mock_get_settings:
-            with patch("app.api.v1.endpoints.webhooks.get_queue") as mock_get_queue:
-                with patch("app.api.v1.endpoints.webhooks.Queue") as mock_queue_class:
-                    # Mock settings
-                    mock_settings = MagicMock()
-                    mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
-                    mock_settings.QUEUE_HOST = "localhost"
-                    mock_settings.QUEUE_USER = "guest"
-                    mock_settings.QUEUE_PASS = "guest"
-                    mock_get_settings.return_value = mock_settings
-
-                    # Mock queue
-                    mock_queue = MagicMock()
-                    mock_get_queue.return_value = None  # No existing queue
-                    mock_queue_class.return_value = mock_queue
-
-                    response = client.post("/api/v1/webhook/", json=webhook_data)
-
-                    assert response.status_code == 200
-                    assert response.json() == {"status": "OK", "processed_events": 2}
+            with patch("app.api.v1.endpoints.webhooks.webhook_dispatcher") as mock_dispatcher:
+                # Mock settings
+                mock_settings = MagicMock()
+                mock_settings.FACEBOOK_INBOX_VERIFY_TOKEN = "test_verify_token"
+                mock_settings.QUEUE_HOST = "localhost"
+                mock_settings.QUEUE_USER = "guest"
+                mock_settings.QUEUE_PASS = "guest"
+                mock_get_settings.return_value = mock_settings
+
+                # Mock dispatcher
+                mock_dispatcher.full.return_value = False
+
+                response = client.post("/api/v1/webhook/", json=webhook_data)
+
+                assert response.status_code == 200
+                assert response.json() == {"status": "OK", "processed_events": 2}
+                mock_dispatcher.submit.assert_called_once()
+
+
+class TestWebhookDispatcher:
+    """Test cases for publishing webhook bodies in the background"""
+
+    def _body(self, *entries):
+        return FacebookWebhookBody(object="page", entry=[
+            FacebookEntry(id=page_id, time=1700000000000, messaging=[
+                FacebookMessagingEvent(
+                    sender=FacebookSender(id=sender_id),
+                    message=FacebookMessage(mid=mid, text=f"text {mid}") if mid else None,
+                    timestamp=1700000001000
+                )
+                for sender_id, mid in events
+            ])
+            for page_id, events in entries
+        ])
+
+    def test_every_entry_and_event_is_extracted(self):
+        """Events from all entries are extracted; events without a message (read receipts) are skipped"""
+        body = self._body(
+            ("page_1", [("user_1", "m1"), ("user_2", None)]),
+            ("page_2", [("user_3", "m2"), ("user_4", "m3")]),
+        )
+
+        messages = extract_inbox_messages(body)
+
+        assert [message["id"] for message in messages] == ["m1", "m2", "m3"]
+        assert [message["page_id"] for message in messages] == ["page_1", "page_2", "page_2"]
+        assert messages[0]["created_time"] == "2023-11-14T22:13:21+0000"
+
+    @patch("app.api.v1.endpoints.webhooks.logger")
+    def test_unsupported_messages_are_logged(self, mock_logger):
+        """Unsupported attachments and empty messages are still published, with a warning"""
+        body = FacebookWebhookBody(object="page", entry=[FacebookEntry(id="page_1", messaging=[
+            FacebookMessagingEvent(sender=FacebookSender(id="user_1"), message=FacebookMessage(
+                mid="m1", attachments=[FacebookMessageAttachment(type="location", payload={})]
+            )),
+            FacebookMessagingEvent(sender=FacebookSender(id="user_2"), message=FacebookMessage(mid="m2")),
+        ])])
+
+        messages = extract_inbox_messages(body)
+
+        assert [message["id"] for message in messages] == ["m1", "m2"]
+        warnings = [call.args[0] for call in mock_logger.warning.call_args_list]
+        assert "Unsupported attachment type location in message m1 from user_1" in warnings
+        assert "Unsupported message type in message m2 from user_2" in warnings
+
+    @pytest.mark.asyncio
+    async def test_queued_bodies_are_published_in_one_batch(self):
+        dispatcher = WebhookDispatcher("facebook_inboxes", extract_inbox_messages)
+        assert dispatcher.submit(self._body(("page_1", [("user_1", "m1")])))
+        assert dispatcher.submit(self._body(("page_1", [("user_2", "m2"), ("user_3", "m3")])))
+
+        with patch("app.services.webhook_services.connect_queue") as mock_connect_queue:
+            dispatcher.start()
+            await dispatcher.stop()
+
+        publish_many = mock_connect_queue.return_value.publish_many
+        publish_many.assert_called_once()
+        assert publish_many.call_args.args[0] == "facebook_inboxes"
+        assert [message["id"] for message in publish_many.call_args.args[1]] == ["m1", "m2", "m3"]
+        assert dispatcher.stats()["published"] == 3
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self):
+        dispatcher = WebhookDispatcher("facebook_inboxes", extract_inbox_messages)
+        dispatcher.queue = asyncio.Queue(maxsize=1)
+
+        assert dispatcher.submit(self._body(("page_1", [("user_1", "m1")])))
+        assert not dispatcher.submit(self._body(("page_1", [("user_2", "m2")])))
+        assert dispatcher.stats()["rejected"] == 1
+
+
+class TestFeedWebhook:
+    """Test cases for comments arriving through Page feed webhooks"""
+
+    @pytest.fixture(autouse=True)
+    def reset_state(self):
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+        yield
+        facebook_services.seen_comments = None
+        facebook_services.comment_cursors = None
+
+    @pytest.mark.asyncio
+    async def test_feed_comment_matches_polled_message(self):
+        """A webhook comment is published exactly as polling publishes the same comment"""
+        mock_settings = MagicMock()
+        mock_settings.COMMENT_DEDUPE_ENABLED = False
+        mock_settings.COMMENT_CURSOR_REDIS_ENABLED = False
+        mock_settings.COMMENT_SYNC_MAX_PAGES = 10
+
+        response = MagicMock()
+        response.json.return_value = {"data": [{
+            "id": "456_1", "message": "CF A1", "created_time": "2023-11-14T22:13:20+0000",
+            "from": {"id": "user_1", "name": "User 1"},
+        }]}
+        client = MagicMock()
+        client.get = AsyncMock(return_value=response)
+
+        with patch("app.services.facebook_services.connect_queue") as mock_connect_queue:
+            await sync_comments("123_456", mock_settings, client)
+        polled = mock_connect_queue.return_value.publish_many.call_args.args[1][0]
+
+        change = comment_change("123_456", "456_1", "CF A1", created_time=1700000000)
+        assert feed_comment_message(change["value"]) == polled
+
+    def test_only_new_top_level_comments_are_taken(self):
+        assert feed_comment_message(comment_change("123_456", "456_1", "CF A1", verb="edited")["value"]) is None
+        assert feed_comment_message(comment_change("123_456", "456_2", "CF A1", parent_id="456_1")["value"]) is None
+        assert feed_comment_message({"item": "reaction", "verb": "add", "post_id": "123_456"}) is None
+
+    def test_replayed_webhooks_publish_each_comment_once(self):
+        """Feed webhooks, including Facebook's retries, reach the comment queue once per comment"""
+        bodies = generate_comment_webhooks("123", "123_456", count=3)
+        bodies.append(bodies[0])
+        bodies.append(feed_webhook("123", [comment_change("123_456", "456_9", "nice", verb="edited")]))
+
+        with patch("app.services.webhook_services.connect_queue") as mock_connect_queue, \
+             patch("app.main.close_queue"):
+            # Leaving the client runs the app shutdown, which drains the dispatchers
+            with TestClient(app) as client:
+                for body in bodies:
+                    assert client.post("/api/v1/webhook/", json=body).status_code == 200
+
+        published = [
+            (call.args[0], comment["id"])
+            for call in mock_connect_queue.return_value.publish_many.call_args_list
+            for comment in call.args[1]
+        ]
+        assert published == [("facebook_comments", "456_0"), ("facebook_comments", "456_1"), ("facebook_comments", "456_2")]
 
 
 class TestWebhookModels:
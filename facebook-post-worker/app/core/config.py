@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     DATABASE_TIMEOUT: int = os.getenv("DATABASE_TIMEOUT", 30)
     DATABASE_SSLMODE: str = os.getenv("DATABASE_SSLMODE", "disable")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "postgres")
+    DATABASE_POOL_MIN_CONNECTIONS: int = os.getenv("DATABASE_POOL_MIN_CONNECTIONS", 1)
+    DATABASE_POOL_MAX_CONNECTIONS: int = os.getenv("DATABASE_POOL_MAX_CONNECTIONS", 10)
 
     # Queue
     QUEUE_HOST: str = os.getenv("QUEUE_HOST", "localhost")
@@ -33,6 +35,8 @@ class Settings(BaseSettings):
     QUEUE_USER: str = os.getenv("QUEUE_USER", "guest")
     QUEUE_PASS: str = os.getenv("QUEUE_PASS", "guest")
     QUEUE_NAME: str = os.getenv("QUEUE_NAME", "facebook_posts")
+    QUEUE_CONSUMER_CONCURRENCY: int = os.getenv("QUEUE_CONSUMER_CONCURRENCY", 1)
+    QUEUE_PREFETCH_COUNT: int = os.getenv("QUEUE_PREFETCH_COUNT", 10)
 
     # Env
     DEBUG: bool = os.getenv("DEBUG", "False") == "True"
@@ -10,7 +10,11 @@ import sys
 
 
 class FacebookPostProcessor:
-    def __init__(self):
+    def __init__(self, database: Optional[Database] = None):
+        if database is not None:
+            self.database = database
+            return
+
         self.database = Database(
             host=settings.DATABASE_HOST,
             port=settings.DATABASE_PORT,
@@ -49,15 +53,12 @@ class FacebookPostProcessor:
             return result[0]["id"]
 
         query = """
-            INSERT INTO facebook_profiles (type, facebook_id, name) VALUES (%s, %s, %s) RETURNING id
-        """
-        result = self.database.execute_command(query, ("page", id, name))
-
-        # Get the newly created profile ID
-        query = """
-            SELECT id FROM facebook_profiles WHERE facebook_id = %s LIMIT 1
+            INSERT INTO facebook_profiles (type, facebook_id, name) VALUES (%s, %s, %s)
+            ON CONFLICT (facebook_id) DO UPDATE SET name = EXCLUDED.name
+            RETURNING id
         """
-        result = self.database.execute_query(query, (id,))
+        result = self.database.execute_query(query, ("page", id, name))
+        self.database.commit_transaction()
 
         return result[0]["id"]
 
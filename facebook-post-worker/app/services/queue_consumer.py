@@ -1,18 +1,21 @@
 from app.core.config import settings
 from app.services.facebook_post_processor import FacebookPostProcessor
+from app.utils.database import DatabasePool
 from app.utils.logging import log_message
 from app.utils.queue import Queue
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import threading
 
 
 class QueueConsumer:
-    def __init__(self):
-        self.queue = None
-        self.facebook_post_processor = FacebookPostProcessor()
-        self.consumer_thread = None
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = max(int(concurrency or settings.QUEUE_CONSUMER_CONCURRENCY), 1)
+        self.database_pool = None
+        self.queues: List[Queue] = []
+        self.consumer_threads: List[threading.Thread] = []
         self.is_running = False
+        self._lock = threading.Lock()
 
     def start(self):
         """Start the queue consumer."""
@@ -21,21 +24,39 @@ class QueueConsumer:
             return
 
         try:
-            # Initialize queue connection
-            self.queue = Queue(
-                host=settings.QUEUE_HOST,
-                username=settings.QUEUE_USER,
-                password=settings.QUEUE_PASS,
+            self.database_pool = DatabasePool(
+                settings.DATABASE_POOL_MIN_CONNECTIONS,
+                max(int(settings.DATABASE_POOL_MAX_CONNECTIONS), self.concurrency),
+                host=settings.DATABASE_HOST,
+                port=settings.DATABASE_PORT,
+                user=settings.DATABASE_USER,
+                password=settings.DATABASE_PASSWORD,
+                database=settings.DATABASE_NAME,
+                sslmode=settings.DATABASE_SSLMODE,
+                connect_timeout=settings.DATABASE_TIMEOUT,
             )
-            self.queue.connect()
 
-            # Start consumer thread
+            # Start one consumer thread per channel, each with its own queue connection
             self.is_running = True
-            self.consumer_thread = threading.Thread(target=self._consume_messages)
-            self.consumer_thread.daemon = True
-            self.consumer_thread.start()
-
-            log_message("QueueConsumer", "info", "Queue consumer started successfully")
+            self.queues = []
+            self.consumer_threads = []
+            for index in range(self.concurrency):
+                queue = Queue(
+                    host=settings.QUEUE_HOST,
+                    username=settings.QUEUE_USER,
+                    password=settings.QUEUE_PASS,
+                )
+                queue.connect()
+                self.queues.append(queue)
+
+                consumer_thread = threading.Thread(target=self._consume_messages, args=(queue,), name=f"QueueConsumer-{index}")
+                consumer_thread.daemon = True
+                self.consumer_threads.append(consumer_thread)
+
+            for consumer_thread in self.consumer_threads:
+                consumer_thread.start()
+
+            log_message("QueueConsumer", "info", f"Queue consumer started successfully with {self.concurrency} consumer threads")
 
         except Exception as e:
             log_message("QueueConsumer", "error", f"Failed to start queue consumer: {e}")
@@ -45,21 +66,32 @@ class QueueConsumer:
         """Stop the queue consumer."""
         self.is_running = False
 
-        if self.queue:
-            self.queue.close()
+        for queue in self.queues:
+            queue.close()
+
+        for consumer_thread in self.consumer_threads:
+            if consumer_thread.is_alive():
+                consumer_thread.join(timeout=5)
 
-        if self.consumer_thread and self.consumer_thread.is_alive():
-            self.consumer_thread.join(timeout=5)
+        if self.database_pool:
+            self.database_pool.closeall()
+            self.database_pool = None
 
         log_message("QueueConsumer", "info", "Queue consumer stopped")
 
-    def _consume_messages(self):
+    def _create_processor(self) -> FacebookPostProcessor:
+        """Create a processor bound to a connection borrowed from the shared pool."""
+        return FacebookPostProcessor(database=self.database_pool.get_database())
+
+    def _consume_messages(self, queue: Queue):
         """Consume messages from the queue."""
+        facebook_post_processor = self._create_processor()
+
         def message_callback(message: Dict[str, Any]):
             """Callback function for processing messages."""
             try:
                 log_message("QueueConsumer", "debug", f"Processing message: {message.get('id', 'unknown')}")
-                success = self.facebook_post_processor.process_facebook_post(message)
+                success = facebook_post_processor.process_facebook_post(message)
 
                 if success:
                     log_message("QueueConsumer", "debug", f"Message processed successfully: {message.get('id', 'unknown')}")
@@ -74,12 +106,16 @@ class QueueConsumer:
             log_message("QueueConsumer", "debug", "Consuming messages from queue")
 
         try:
-            self.queue.consume(
+            queue.consume(
                 queue_name=settings.QUEUE_NAME,
                 log=log_callback,
-                callback=message_callback
+                callback=message_callback,
+                prefetch_count=settings.QUEUE_PREFETCH_COUNT
             )
         except Exception as e:
             log_message("QueueConsumer", "error", f"Error in consume loop: {e}")
         finally:
-            self.is_running = False
\ No newline at end of file
+            facebook_post_processor.database.close()
+            with self._lock:
+                if not any(t.is_alive() for t in self.consumer_threads if t is not threading.current_thread()):
+                    self.is_running = False
@@ -3,6 +3,7 @@ import psycopg2.extras
 import time
 from typing import Optional, Dict, Any, List
 from .logging import log_message
+from psycopg2 import pool
 
 class Database:
     def __init__(self, host: str, port: int, user: str, password: str, database: str,
@@ -135,4 +136,63 @@ class Database:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
-        self.close()
\ No newline at end of file
+        self.close()
+
+class DatabasePool:
+    def __init__(self, minconn, maxconn, **db_params):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn, maxconn, cursor_factory=psycopg2.extras.RealDictCursor, **db_params
+        )
+
+    def get_conn(self):
+        return self.pool.getconn()
+
+    def put_conn(self, conn, close=False):
+        self.pool.putconn(conn, close=close)
+
+    def get_database(self) -> "PooledDatabase":
+        """Borrows a connection from the pool wrapped in the Database interface."""
+        database = PooledDatabase(self)
+        database.connect()
+        return database
+
+    def closeall(self):
+        self.pool.closeall()
+
+class PooledDatabase(Database):
+    """Database bound to a connection borrowed from a DatabasePool."""
+
+    def __init__(self, pool: DatabasePool, reconnect_delay: int = 1):
+        self.pool = pool
+        self.reconnect_delay = reconnect_delay
+        self.connection = None
+        self.cursor = None
+
+    def connect(self):
+        """Borrows a fresh connection from the pool, discarding a broken one."""
+        while True:
+            try:
+                if self.connection is not None:
+                    self.pool.put_conn(self.connection, close=True)
+                    self.connection = None
+
+                self.connection = self.pool.get_conn()
+                self.cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+                log_message("Database", "debug", "Borrowed connection from pool.")
+                return
+            except Exception as e:
+                if self.pool.pool.closed:
+                    raise
+                log_message("Database", "error", f"Borrowing connection failed: {e}. Retrying in {self.reconnect_delay} seconds...")
+                time.sleep(self.reconnect_delay)
+
+    def close(self):
+        """Returns the connection to the pool."""
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
+        if self.connection is not None:
+            self.pool.put_conn(self.connection, close=bool(self.connection.closed))
+            self.connection = None
+            log_message("Database", "debug", "Returned connection to pool.")
@@ -13,6 +13,7 @@ class Queue:
         self.reconnect_delay = reconnect_delay
         self.consumer_active = True
         self.publisher_active = False
+        self.closed = False
 
     def connect(self):
         """Establishes a connection to RabbitMQ with retries."""
@@ -71,13 +72,15 @@ class Queue:
             time.sleep(self.reconnect_delay)
             self.connect()
 
-    def consume(self, queue_name, log, callback):
+    def consume(self, queue_name, log, callback, prefetch_count=None):
         """Consumes messages with auto-reconnection and control over consumer activity."""
-        while True:
+        while not self.closed:
             try:
                 if self.consumer_active:
                     self.ensure_connection()
                     self.channel.queue_declare(queue=queue_name, durable=True)
+                    if prefetch_count:
+                        self.channel.basic_qos(prefetch_count=prefetch_count)
 
                     log_message("Queue", "info", f"Consuming messages from {queue_name}")
 
@@ -98,12 +101,15 @@ class Queue:
                     time.sleep(1)
 
             except (pika.exceptions.AMQPConnectionError, pika.exceptions.ChannelClosed, Exception) as e:
+                if self.closed:
+                    break
                 log_message("Queue", "error", f"Consumer error: {e}. Reconnecting in {self.reconnect_delay} seconds...")
                 time.sleep(self.reconnect_delay)
                 self.connect()
 
     def close(self):
         """Closes the RabbitMQ connection gracefully."""
+        self.closed = True
         if self.connection and not self.connection.is_closed:
             self.connection.close()
             log_message("Queue", "debug", "RabbitMQ connection closed.")
\ No newline at end of file
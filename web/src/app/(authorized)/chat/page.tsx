@@ -7,7 +7,7 @@ import { PaginationProvider } from '@/contexts';
 import usePaginatedRequest from '@/hooks/request/usePaginatedRequest';
 import useRequest from '@/hooks/request/useRequest';
 import type { FacebookCommentResponse, FacebookInboxResponse } from '@/types/api';
-import type { PaginationResponse } from '@/types/api/api-response';
+import type { CursorPaginationResponse } from '@/types/api/api-response';
 import type { FacebookProfileResponse } from '@/types/api/facebook-profile';
 
 import ChatContentSkeleton from './chatContent/ChatContentSkeleton';
@@ -32,7 +32,7 @@ const Chat = () => {
     handleRequest: loadMoreInbox,
     isLoading: isInboxLoading,
     reset: resetInbox, // Add reset function
-  } = usePaginatedRequest<PaginationResponse<FacebookInboxResponse>>({
+  } = usePaginatedRequest<CursorPaginationResponse<FacebookInboxResponse>>({
     url: API.INBOX,
     additionalParams: { limit: 20, group_by: 'profile_id' },
     disableFullscreenLoading: true,
@@ -43,7 +43,7 @@ const Chat = () => {
     handleRequest: loadMoreComment,
     isLoading: isCommentLoading,
     reset: resetComment, // Add reset function
-  } = usePaginatedRequest<PaginationResponse<FacebookCommentResponse>>({
+  } = usePaginatedRequest<CursorPaginationResponse<FacebookCommentResponse>>({
     url: API.COMMENT,
     additionalParams: { limit: 20, group_by: 'profile_id' },
     disableFullscreenLoading: true,
@@ -54,8 +54,8 @@ const Chat = () => {
   const [commentAccum, setCommentAccum] = useState<FacebookCommentResponse[]>([]);
   const [inboxHasNext, setInboxHasNext] = useState(false);
   const [commentHasNext, setCommentHasNext] = useState(false);
-  const [lastInboxCreatedAt, setLastInboxCreatedAt] = useState<string | null>(null);
-  const [lastCommentCreatedAt, setLastCommentCreatedAt] = useState<string | null>(null);
+  const [inboxCursor, setInboxCursor] = useState<string | null>(null);
+  const [commentCursor, setCommentCursor] = useState<string | null>(null);
 
   const [timeline, setTimeline] = useState<TimelineItem[]>([]);
   const [timelineOffset, setTimelineOffset] = useState(0);
@@ -71,8 +71,8 @@ const Chat = () => {
     setCommentAccum([]);
     setInboxHasNext(false);
     setCommentHasNext(false);
-    setLastInboxCreatedAt(null);
-    setLastCommentCreatedAt(null);
+    setInboxCursor(null);
+    setCommentCursor(null);
     setSelectedItem(null);
     setTimeline([]);
     setTimelineOffset(0);
@@ -268,13 +268,10 @@ const Chat = () => {
       return;
     }
     setInboxHasNext(Boolean(inboxData.has_next));
-    if ((inboxData.offset ?? 0) === 0) {
+    // The next page continues after this one's last row
+    setInboxCursor(inboxData.next_cursor ?? null);
+    if (!inboxData.has_prev) {
       setInboxAccum(inboxData.docs ?? []);
-      // Set last created_at for initial load
-      if (inboxData.docs?.length) {
-        const lastItem = inboxData.docs[inboxData.docs.length - 1];
-        setLastInboxCreatedAt(lastItem.created_at);
-      }
       return;
     }
     if (inboxData.docs?.length) {
@@ -283,9 +280,6 @@ const Chat = () => {
         const newDocs = (inboxData.docs ?? []).filter((d) => !existingIds.has(d.id));
         return [...curr, ...newDocs];
       });
-      // Update last created_at for load more
-      const lastItem = inboxData.docs[inboxData.docs.length - 1];
-      setLastInboxCreatedAt(lastItem.created_at);
     }
   }, [inboxData]);
 
@@ -294,13 +288,10 @@ const Chat = () => {
       return;
     }
     setCommentHasNext(Boolean(commentData.has_next));
-    if ((commentData.offset ?? 0) === 0) {
+    // The next page continues after this one's last row
+    setCommentCursor(commentData.next_cursor ?? null);
+    if (!commentData.has_prev) {
       setCommentAccum(commentData.docs ?? []);
-      // Set last created_at for initial load
-      if (commentData.docs?.length) {
-        const lastItem = commentData.docs[commentData.docs.length - 1];
-        setLastCommentCreatedAt(lastItem.created_at);
-      }
       return;
     }
     if (commentData.docs?.length) {
@@ -309,9 +300,6 @@ const Chat = () => {
         const newDocs = (commentData.docs ?? []).filter((d) => !existingIds.has(d.id));
         return [...curr, ...newDocs];
       });
-      // Update last created_at for load more
-      const lastItem = commentData.docs[commentData.docs.length - 1];
-      setLastCommentCreatedAt(lastItem.created_at);
     }
   }, [commentData]);
 
@@ -333,23 +321,19 @@ const Chat = () => {
               selectedItem={effectiveSelected}
               onSelect={handleSetSelectedItem}
               onLoadMore={() => {
-                const nextOffsetInbox = inboxAccum.length;
-                const nextOffsetComment = commentAccum.length;
-                if (inboxHasNext) {
+                if (inboxHasNext && inboxCursor) {
                   void loadMoreInbox({
                     params: {
-                      offset: nextOffsetInbox,
+                      cursor: inboxCursor,
                       limit: inboxData?.limit ?? 20,
-                      ...(lastInboxCreatedAt ? { before_created_at: lastInboxCreatedAt } : {}),
                     },
                   });
                 }
-                if (commentHasNext) {
+                if (commentHasNext && commentCursor) {
                   void loadMoreComment({
                     params: {
-                      offset: nextOffsetComment,
+                      cursor: commentCursor,
                       limit: commentData?.limit ?? 20,
-                      ...(lastCommentCreatedAt ? { before_created_at: lastCommentCreatedAt } : {}),
                     },
                   });
                 }
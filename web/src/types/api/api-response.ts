@@ -13,9 +13,16 @@ export type PaginationResponse<T> = {
   offset: number;
   has_next: boolean;
   has_prev: boolean;
+  // Pass back as `cursor` to fetch the page after this one
+  next_cursor?: string | null;
   timestamp: boolean;
 };
 
+// Pages fetched with a `cursor` skip the count
+export type CursorPaginationResponse<T> = Omit<PaginationResponse<T>, 'total'> & {
+  total: number | null;
+};
+
 // Generic error response
 export type ErrorResponse = { detail: string };
 